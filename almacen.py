@@ -0,0 +1,144 @@
+import os
+import pickle
+import threading
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # Sin pyarrow los snapshots caen a pickle
+    pa = None
+
+# --- ALMACÉN LOCAL ---
+# Guarda en disco lo ya procesado (historia limpia, huellas de filas, etc.) para
+# no repetir trabajo entre refrescos ni entre reinicios del proceso.
+
+DIR_ALMACEN = os.environ.get("CN_DIR_ALMACEN", ".almacen_cn")
+
+def _ruta(clave):
+    return os.path.join(DIR_ALMACEN, f"{clave}.pkl")
+
+def _temporal(ruta):
+    # Único por proceso e hilo: dos sesiones del mismo proceso no comparten temporal
+    return f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+def guardar(clave, objeto):
+    """Escritura atómica (archivo temporal + rename) para que otros procesos nunca lean a medias."""
+    os.makedirs(DIR_ALMACEN, exist_ok=True)
+    ruta = _ruta(clave)
+    temporal = _temporal(ruta)
+    with open(temporal, 'wb') as f:
+        pickle.dump(objeto, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporal, ruta)
+
+def cargar(clave):
+    """Devuelve lo guardado en `clave` o None si no existe / está corrupto."""
+    try:
+        with open(_ruta(clave), 'rb') as f:
+            return pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        return None
+
+# --- SNAPSHOTS COLUMNARES (Arrow/Feather) ---
+# Resultado completo de un cargador (tupla de DataFrames y valores sueltos) guardado
+# en formato columnar: el arranque en frío es una lectura mapeada en memoria que
+# conserva dtypes (Fecha datetime64, Monto float, categóricas, booleanos).
+
+def _escribir_atomico(ruta, escribir):
+    temporal = _temporal(ruta)
+    escribir(temporal)
+    os.replace(temporal, ruta)
+
+def _escribir_tabla(df, ruta_base):
+    """Arrow si se puede; pickle si la tabla tiene columnas con tipos mezclados."""
+    if pa is not None:
+        try:
+            tabla = pa.Table.from_pandas(df, preserve_index=True)
+            _escribir_atomico(f"{ruta_base}.arrow", lambda r: feather.write_feather(tabla, r, compression='uncompressed'))
+            return f"{ruta_base}.arrow"
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            pass
+    _escribir_atomico(f"{ruta_base}.pkl", lambda r: df.to_pickle(r))
+    return f"{ruta_base}.pkl"
+
+def _leer_tabla(ruta):
+    if ruta.endswith('.arrow'):
+        return feather.read_table(ruta, memory_map=True).to_pandas()
+    return pd.read_pickle(ruta)
+
+def guardar_snapshot(clave, resultado, version=None):
+    """Guarda el `resultado` de un cargador (DataFrame o tupla) como snapshot local."""
+    directorio = os.path.join(DIR_ALMACEN, "snapshots")
+    os.makedirs(directorio, exist_ok=True)
+    es_tupla = isinstance(resultado, tuple)
+    piezas = []
+    for i, valor in enumerate(resultado if es_tupla else (resultado,)):
+        if isinstance(valor, pd.DataFrame):
+            piezas.append(('tabla', _escribir_tabla(valor, os.path.join(directorio, f"{clave}_{i}"))))
+        else:
+            piezas.append(('valor', valor))
+    # El índice se escribe al final: nunca apunta a tablas a medias
+    guardar(f"snapshot_{clave}", {'es_tupla': es_tupla, 'piezas': piezas, 'version': version})
+
+def leer_snapshot(clave, version=None):
+    """Devuelve lo guardado por guardar_snapshot o None si no hay snapshot (o es de otra versión)."""
+    indice = cargar(f"snapshot_{clave}")
+    if indice is None or indice.get('version') != version:
+        return None
+    resultado = []
+    try:
+        for tipo, valor in indice['piezas']:
+            resultado.append(valor if tipo == 'valor' else _leer_tabla(valor))
+    except (OSError, ValueError, EOFError, pickle.UnpicklingError, AttributeError):
+        return None
+    return tuple(resultado) if indice['es_tupla'] else resultado[0]
+
+# --- TABLAS PARTICIONADAS ---
+# Una carpeta por tabla y un archivo columnar por partición (p. ej. un mes de un
+# lanzamiento): se reescribe solo la partición que cambió y se lee solo la que hace falta.
+#
+#   almacen.guardar_particion("vdp_filas/vdp", "2026-10", df_octubre)
+#   almacen.leer_particiones("vdp_filas/vdp", ["2026-09", "2026-10"])
+
+def _dir_particiones(tabla):
+    return os.path.join(DIR_ALMACEN, "particiones", *tabla.split("/"))
+
+def _rutas_particion(tabla, particion):
+    base = os.path.join(_dir_particiones(tabla), particion)
+    return f"{base}.arrow", f"{base}.pkl"
+
+def guardar_particion(tabla, particion, df):
+    os.makedirs(_dir_particiones(tabla), exist_ok=True)
+    ruta = _escribir_tabla(df, os.path.join(_dir_particiones(tabla), particion))
+    for vieja in _rutas_particion(tabla, particion):
+        if vieja != ruta and os.path.exists(vieja):
+            os.remove(vieja)  # La misma partición escrita antes en el otro formato
+
+def borrar_particion(tabla, particion):
+    for ruta in _rutas_particion(tabla, particion):
+        if os.path.exists(ruta):
+            os.remove(ruta)
+
+def particiones(tabla):
+    """Nombres (ordenados) de las particiones guardadas de `tabla`."""
+    try:
+        archivos = os.listdir(_dir_particiones(tabla))
+    except OSError:
+        return []
+    return sorted({os.path.splitext(a)[0] for a in archivos if a.endswith(('.arrow', '.pkl'))})
+
+def leer_particion(tabla, particion):
+    """DataFrame de la partición o None si no existe / está corrupta."""
+    for ruta in _rutas_particion(tabla, particion):
+        if os.path.exists(ruta):
+            try:
+                return _leer_tabla(ruta)
+            except (OSError, ValueError, EOFError, pickle.UnpicklingError, AttributeError):
+                return None
+    return None
+
+def leer_particiones(tabla, nombres=None):
+    """Particiones pedidas (todas si `nombres` es None) concatenadas; vacío si no hay ninguna."""
+    tablas = [leer_particion(tabla, p) for p in (particiones(tabla) if nombres is None else nombres)]
+    tablas = [t for t in tablas if t is not None]
+    return pd.concat(tablas) if tablas else pd.DataFrame()
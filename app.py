@@ -1,11 +1,14 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from datetime import datetime, timedelta
-import numpy as np
+import datos
+import perf
+import periodos
+from limpieza import filas_desplazadas, limpiar_ventas, limpiar_budget_dic, limpiar_budget_2026, COLUMNAS_BUDGET, CATEGORIAS_VENTAS
 
 # --- 1. CONFIGURACIÓN DE PÁGINA ---
 st.set_page_config(page_title="Agency Dashboard", page_icon="🚀", layout="wide")
+perf.corrida()
 
 # --- 2. PANTALLA DE BIENVENIDA ---
 def pantalla_bienvenida():
@@ -32,134 +35,62 @@ def pantalla_bienvenida():
 if not pantalla_bienvenida():
     st.stop()
 
-# --- 3. FUNCIÓN DE REPARACIÓN (Anti-Error GHL) ---
-def reparar_desplazamiento(df):
-    """Detecta y arregla filas desplazadas a la derecha (problema de GHL)"""
-    if df.empty: return df
-    df_fixed = df.copy()
-    col_0 = df_fixed.columns[0]
-    
-    filas_malas_mask = df_fixed[col_0].isna() | (df_fixed[col_0].astype(str).str.strip() == '')
-    
-    if filas_malas_mask.sum() > 0 and len(df_fixed.columns) >= 9:
-        valores = df_fixed.values
-        indices_malos = df_fixed.index[filas_malas_mask]
-        
-        for idx in indices_malos:
-            fila = valores[idx]
-            fila_corregida = np.roll(fila, -8) 
-            fila_corregida[-8:] = np.nan 
-            valores[idx] = fila_corregida
-            
-        df_fixed = pd.DataFrame(valores, columns=df.columns, index=df.index)
-    return df_fixed
-
-# --- 4. CARGA DE DATOS ---
+# --- 3. CARGA DE DATOS ---
 st.title("🚀 Creamos Negocios - Dashboard")
 
-@st.cache_data(ttl=300) 
+# Las limpiezas de cada hoja viven en limpieza.py (las mismas que mide el benchmark)
+@st.cache_data(ttl=datos.TTL_FUENTES)
+@datos.con_snapshot("app")
 def cargar_datos():
-    url_ventas = "https://docs.google.com/spreadsheets/d/e/2PACX-1vQuXaPCen61slzpr1TElxXoCROIxAgmgWT7pyWvel1dxq_Z_U1yZPrVrTbJfx9MwaL8_cluY3v2ywoB/pub?gid=0&single=true&output=csv"
-    url_gastos_dic = "https://docs.google.com/spreadsheets/d/e/2PACX-1vQGOLgPTDLie5gEbkViCbpebWfN9S_eb2h2GGlpWLjmfVgzfnwR_ncVTs4IqmKgmAFfxZTQHJlMBrIi/pub?gid=0&single=true&output=csv"
-    # Link Nuevo Budget (2026)
-    url_gastos_anual = "https://docs.google.com/spreadsheets/d/e/2PACX-1vTQKTt_taqoH2qNwWbs3t4doLsi0SuGavgdUNvpCKrqtlp5U9GaTqkTt9q-c1eWBnvPN88Qg5t0vXzK/pub?gid=692917105&single=true&output=csv"
-    
+    datos.precargar("ventas", "budget_dic", "budget_2026")  # Descarga en paralelo
     # --- PROCESAR VENTAS ---
+    filas_reparadas = 0
     try:
-        df_v = pd.read_csv(url_ventas)
-        df_v = reparar_desplazamiento(df_v)
-        
-        df_v['Fecha'] = pd.to_datetime(df_v['Fecha'], dayfirst=True, errors='coerce')
-        if df_v['Monto ($)'].dtype == 'O': 
-            df_v['Monto ($)'] = df_v['Monto ($)'].astype(str).str.replace(r'[$,]', '', regex=True)
-        df_v['Monto ($)'] = pd.to_numeric(df_v['Monto ($)'], errors='coerce').fillna(0)
-        
-        df_v['Closer'] = df_v['Closer'].fillna("Sin Asignar").astype(str).str.strip()
-        df_v['Resultado'] = df_v['Resultado'].fillna("Pendiente")
-        
-        if 'Email' in df_v.columns:
-            df_v['Email'] = df_v['Email'].astype(str).str.strip().str.lower()
-        else:
-            df_v['Email'] = df_v.index.astype(str)
-
-        def clasificar_estado(texto):
-            texto = str(texto).lower()
-            if "venta" in texto: return "✅ Venta"
-            if "no show" in texto: return "❌ No Show"
-            if "descalificado" in texto: return "🚫 Descalificado"
-            if "seguimiento" in texto: return "👀 Seguimiento"
-            if "re-agendado" in texto or "reagendado" in texto: return "📅 Re-Agendado"
-            return "Otro/Pendiente"
-        df_v['Estado_Simple'] = df_v['Resultado'].apply(clasificar_estado)
-
-        def es_asistencia_valida(row):
-            res = str(row['Resultado']).lower()
-            if "venta" in res: return True
-            if "seguimiento" in res: return True 
-            if "descalificado" in res: return True 
-            if "asistió" in res and "no show" not in res: return True
-            return False
-        df_v['Es_Asistencia'] = df_v.apply(es_asistencia_valida, axis=1)
+        # Solo se limpian las filas nuevas; la historia viene del almacén local (hoja entera o por bloques)
+        df_v, filas_reparadas = datos.cargar_fuente("app_ventas", "ventas", limpiar_ventas, CATEGORIAS_VENTAS, contar=filas_desplazadas)
     except Exception as e:
-        st.error(f"Error en Ventas: {e}")
+        datos.avisar(f"Error en Ventas: {e}")
         df_v = pd.DataFrame()
 
     # --- PROCESAR GASTOS ---
     try:
         # 1. Gastos Diciembre (Formato Viejo)
-        df_g1 = pd.read_csv(url_gastos_dic)
-        df_g1['Fecha'] = pd.to_datetime(df_g1['Fecha'], dayfirst=True, errors='coerce')
-        if df_g1['Gasto'].dtype == 'O': df_g1['Gasto'] = df_g1['Gasto'].astype(str).str.replace(r'[$,]', '', regex=True)
-        df_g1['Gasto'] = pd.to_numeric(df_g1['Gasto'], errors='coerce').fillna(0)
-        
-        # Rellenamos columnas faltantes en el viejo para que coincida
-        df_g1['Clics'] = 0
-        df_g1['Visitas'] = 0
-        
-        # Seleccionamos columnas estándar
-        if {'Fecha', 'Gasto'}.issubset(df_g1.columns): 
-            df_g1 = df_g1[['Fecha', 'Gasto', 'Clics', 'Visitas']]
+        df_g1 = limpiar_budget_dic(datos.leer_fuente("budget_dic"))
         
         # 2. Gastos Anuales (Formato Nuevo - Header en Fila 1)
-        df_g2 = pd.read_csv(url_gastos_anual) # Header=0 por defecto (correcto)
-        
-        # Aseguramos leer las 4 columnas (A, B, C, D) por posición para evitar errores de nombre
-        # Col A (0): Fecha, B (1): Gasto, C (2): Clics, D (3): Visitas
-        if len(df_g2.columns) >= 4:
-            df_g2 = df_g2.iloc[:, 0:4].copy()
-            df_g2.columns = ['Fecha', 'Gasto', 'Clics', 'Visitas'] # Renombrar estándar
-            
-            # Limpieza
-            df_g2['Fecha'] = pd.to_datetime(df_g2['Fecha'], errors='coerce')
-            
-            for col in ['Gasto', 'Clics', 'Visitas']:
-                if df_g2[col].dtype == 'O': 
-                    df_g2[col] = df_g2[col].astype(str).str.replace(r'[$,]', '', regex=True)
-                df_g2[col] = pd.to_numeric(df_g2[col], errors='coerce').fillna(0)
-        else:
-            st.warning("El archivo de Budget 2026 tiene menos de 4 columnas. Revisa el formato.")
-            df_g2 = pd.DataFrame(columns=['Fecha', 'Gasto', 'Clics', 'Visitas'])
+        # Las 4 columnas (A, B, C, D) se leen por posición para evitar errores de nombre
+        df_g2 = limpiar_budget_2026(datos.leer_fuente("budget_2026")) # Header=0 por defecto (correcto)
+        if df_g2 is None:
+            datos.avisar("El archivo de Budget 2026 tiene menos de 4 columnas. Revisa el formato.", st.warning)
+            df_g2 = pd.DataFrame(columns=COLUMNAS_BUDGET)
 
         # Unir ambos (Diciembre + 2026)
-        df_g = pd.concat([df_g1, df_g2], ignore_index=True).sort_values('Fecha')
+        df_g = periodos.ordenar_por_fecha(pd.concat([df_g1, df_g2], ignore_index=True))
         
     except Exception as e:
-        st.error(f"Error en Gastos: {e}")
-        df_g = pd.DataFrame(columns=['Fecha', 'Gasto', 'Clics', 'Visitas'])
+        datos.avisar(f"Error en Gastos: {e}")
+        df_g = pd.DataFrame(columns=COLUMNAS_BUDGET)
 
-    return df_v, df_g
+    df_v = periodos.ordenar_por_fecha(df_v)
+    return df_v, df_g, filas_reparadas, datos.huella_cubo(df_v)  # Huella: clave del cubo diario compartido
 
-df_ventas, df_gastos = cargar_datos()
+df_ventas, df_gastos, filas_reparadas, huella_ventas = datos.arranque_rapido("app", cargar_datos) # Snapshot local en frío
 
 if df_ventas.empty:
     st.warning("⚠️ Esperando datos... Revisa conexión con Sheets.")
     st.stop()
 
-# --- 5. SIDEBAR Y CONTROLES ---
+cubo = datos.cubo_ventas(huella_ventas, df_ventas)
+
+# --- 4. SIDEBAR Y CONTROLES ---
 st.sidebar.header("🎛️ Panel de Control")
 if st.sidebar.button("🔄 Actualizar Datos"):
+    datos.refrescar_fuentes()
     st.cache_data.clear()
     st.rerun()
+datos.panel_fuentes()
+if filas_reparadas:
+    st.sidebar.caption(f"🛠️ {filas_reparadas} filas desplazadas por GHL reparadas")
 
 st.sidebar.markdown("---")
 
@@ -168,40 +99,31 @@ filtro_tiempo = st.sidebar.selectbox(
     ["Este Mes", "Mes Anterior", "Hoy", "Ayer", "Esta Semana", "Últimos 7 días", "Últimos 30 días", "Personalizado"]
 )
 
-hoy = pd.to_datetime("today").date()
-
-if filtro_tiempo == "Hoy": f_inicio, f_fin = hoy, hoy
-elif filtro_tiempo == "Ayer": f_inicio, f_fin = hoy - timedelta(days=1), hoy - timedelta(days=1)
-elif filtro_tiempo == "Esta Semana": f_inicio, f_fin = hoy - timedelta(days=hoy.weekday()), hoy
-elif filtro_tiempo == "Últimos 7 días": f_inicio, f_fin = hoy - timedelta(days=7), hoy
-elif filtro_tiempo == "Este Mes": f_inicio, f_fin = hoy.replace(day=1), hoy
-elif filtro_tiempo == "Mes Anterior":
-    primer = hoy.replace(day=1)
-    f_fin = primer - timedelta(days=1)
-    f_inicio = f_fin.replace(day=1)
-elif filtro_tiempo == "Últimos 30 días": f_inicio, f_fin = hoy - timedelta(days=30), hoy
-else:
+hoy = periodos.hoy()
+
+if filtro_tiempo == "Personalizado":
     f_inicio = st.sidebar.date_input("Inicio", hoy)
     f_fin = st.sidebar.date_input("Fin", hoy)
+else:
+    f_inicio, f_fin = periodos.resolver(filtro_tiempo, hoy)
 
-lista_closers = ["Todos"] + sorted([c for c in df_ventas['Closer'].unique() if c])
+lista_closers = ["Todos"] + sorted([c for c in cubo.closers if c])
 closer_sel = st.sidebar.selectbox("Closer", lista_closers)
 
 st.sidebar.info(f"📅 {f_inicio} al {f_fin}")
 
-mask_v = (df_ventas['Fecha'].dt.date >= f_inicio) & (df_ventas['Fecha'].dt.date <= f_fin)
-df_v_filtrado = df_ventas.loc[mask_v].copy()
-
-if not df_gastos.empty:
-    mask_g = (df_gastos['Fecha'].dt.date >= f_inicio) & (df_gastos['Fecha'].dt.date <= f_fin)
-    df_g_filtrado = df_gastos.loc[mask_g].copy()
-else: 
-    df_g_filtrado = pd.DataFrame(columns=['Fecha', 'Gasto', 'Clics', 'Visitas'])
+# Ventas: corte del cubo diario (período + closer), sin re-filtrar las filas crudas
+with perf.etapa("kpis: corte") as medida:
+    corte = cubo.corte(f_inicio, f_fin, closer_sel)
+    medida['Filas'] = len(corte.celdas)
 
-if closer_sel != "Todos":
-    df_v_filtrado = df_v_filtrado[df_v_filtrado['Closer'] == closer_sel]
+with perf.etapa("gastos: período"):
+    if not df_gastos.empty:
+        df_g_filtrado = periodos.rango(df_gastos, f_inicio, f_fin)
+    else: 
+        df_g_filtrado = pd.DataFrame(columns=['Fecha', 'Gasto', 'Clics', 'Visitas'])
 
-# --- 6. GESTIÓN DE METAS ---
+# --- 5. GESTIÓN DE METAS ---
 st.sidebar.markdown("---")
 st.sidebar.subheader("🎯 Configuración Objetivos")
 
@@ -218,15 +140,16 @@ if st.sidebar.button("Aplicar Objetivos"):
     st.session_state["presupuesto_ads"] = m_ads
     st.rerun()
 
-# --- 7. CÁLCULOS PRINCIPALES ---
-facturacion = df_v_filtrado['Monto ($)'].sum()
+# --- 6. CÁLCULOS PRINCIPALES ---
+facturacion = corte.suma('Monto')
 inversion_ads = df_g_filtrado['Gasto'].sum() if closer_sel == "Todos" else 0
 profit = facturacion - inversion_ads 
 roas = (facturacion / inversion_ads) if inversion_ads > 0 else 0
 
-total_leads = df_v_filtrado['Email'].nunique()
-total_asistencias = df_v_filtrado[df_v_filtrado['Es_Asistencia']]['Email'].nunique()
-ventas_cerradas = df_v_filtrado[df_v_filtrado['Estado_Simple'] == "✅ Venta"]['Email'].nunique()
+with perf.etapa("kpis: emails únicos", len(corte.pares)):
+    total_leads = corte.emails_unicos()
+    total_asistencias = corte.emails_unicos(asistencia=True)
+    ventas_cerradas = corte.emails_unicos(estado="✅ Venta")
 
 tasa_asistencia = (total_asistencias / total_leads * 100) if total_leads > 0 else 0
 tasa_cierre = (ventas_cerradas / total_asistencias * 100) if total_asistencias > 0 else 0
@@ -255,16 +178,13 @@ else:
     facturacion_necesaria_diaria = faltante_facturacion 
 
 # Budget Pacing
-gasto_mes_total = df_gastos[
-    (df_gastos['Fecha'].dt.month == mes_actual) & 
-    (df_gastos['Fecha'].dt.year == anio_actual)
-]['Gasto'].sum()
+gasto_mes_total = periodos.rango(df_gastos, hoy.replace(day=1), hoy.replace(day=dias_en_mes))['Gasto'].sum()
 
 budget_restante = max(st.session_state["presupuesto_ads"] - gasto_mes_total, 0)
 gasto_ideal_diario = budget_restante / dias_restantes if dias_restantes > 0 else 0
 gasto_promedio_actual = gasto_mes_total / dia_hoy if dia_hoy > 0 else 0
 
-# --- 8. VISUALES DASHBOARD ---
+# --- 7. VISUALES DASHBOARD ---
 
 # PROYECCIONES
 if filtro_tiempo == "Este Mes":
@@ -312,11 +232,11 @@ e4.metric("Tasa Cierre", f"{tasa_cierre:.1f}%")
 st.markdown("---")
 st.subheader("🔍 Desglose de Leads (Widget)")
 
-c_venta = len(df_v_filtrado[df_v_filtrado['Estado_Simple'] == "✅ Venta"])
-c_noshow = len(df_v_filtrado[df_v_filtrado['Estado_Simple'] == "❌ No Show"])
-c_descalif = len(df_v_filtrado[df_v_filtrado['Estado_Simple'] == "🚫 Descalificado"])
-c_agendado = len(df_v_filtrado[df_v_filtrado['Estado_Simple'].isin(["📅 Re-Agendado", "Otro/Pendiente"])])
-c_seguimiento = len(df_v_filtrado[df_v_filtrado['Estado_Simple'] == "👀 Seguimiento"])
+c_venta = corte.filas_estado("✅ Venta")
+c_noshow = corte.filas_estado("❌ No Show")
+c_descalif = corte.filas_estado("🚫 Descalificado")
+c_agendado = corte.filas_estado("📅 Re-Agendado", "Otro/Pendiente")
+c_seguimiento = corte.filas_estado("👀 Seguimiento")
 
 w1, w2, w3, w4, w5 = st.columns(5)
 w1.metric("✅ Tx. Ventas", c_venta)
@@ -325,30 +245,27 @@ w3.metric("❌ No Show", c_noshow)
 w4.metric("🚫 Descalif.", c_descalif)
 w5.metric("📅 Agend/Otro", c_agendado)
 
-if not df_v_filtrado.empty:
-    daily_status = df_v_filtrado.groupby(['Fecha', 'Estado_Simple']).size().reset_index(name='Cantidad')
-    fig_status = px.bar(
-        daily_status, x="Fecha", y="Cantidad", color="Estado_Simple", 
-        title="Evolución Diaria de Leads",
-        color_discrete_map={
-            "✅ Venta": "#00CC96", "❌ No Show": "#EF553B",
-            "🚫 Descalificado": "#FFA15A", "👀 Seguimiento": "#636EFA",
-            "📅 Re-Agendado": "#AB63FA", "Otro/Pendiente": "#d3d3d3"
-        }
-    )
-    st.plotly_chart(fig_status, use_container_width=True)
+if not corte.vacio:
+    with perf.etapa("gráfico: evolución diaria"):
+        daily_status = corte.por_dia_estado()
+        fig_status = px.bar(
+            daily_status, x="Fecha", y="Cantidad", color="Estado_Simple", 
+            title="Evolución Diaria de Leads",
+            color_discrete_map={
+                "✅ Venta": "#00CC96", "❌ No Show": "#EF553B",
+                "🚫 Descalificado": "#FFA15A", "👀 Seguimiento": "#636EFA",
+                "📅 Re-Agendado": "#AB63FA", "Otro/Pendiente": "#d3d3d3"
+            }
+        )
+        st.plotly_chart(fig_status, use_container_width=True)
 
 tab1, tab2 = st.tabs(["🏆 Ranking Closers", "📊 Facturación vs Ads"])
 
-with tab1:
-    if not df_v_filtrado.empty:
-        ranking = df_v_filtrado.groupby('Closer').apply(
-            lambda x: pd.Series({
-                'Facturado': x['Monto ($)'].sum(),
-                'Asistencias': x.loc[x['Es_Asistencia'], 'Email'].nunique(),
-                'Ventas': x.loc[x['Estado_Simple'] == "✅ Venta", 'Email'].nunique()
-            })
-        ).reset_index()
+with tab1, perf.etapa("gráfico: ranking closers"):
+    if not corte.vacio:
+        # Asistencias y Ventas cuentan emails únicos
+        ranking = corte.por_closer(('Facturado', 'Asistencias_Unicas', 'Ventas_Unicas'))
+        ranking = ranking.rename(columns={'Asistencias_Unicas': 'Asistencias', 'Ventas_Unicas': 'Ventas'})
         
         ranking['% Cierre'] = (ranking['Ventas'] / ranking['Asistencias'] * 100).fillna(0)
         ranking = ranking.sort_values('Facturado', ascending=False)
@@ -363,8 +280,8 @@ with tab1:
             use_container_width=True
         )
 
-with tab2:
-    v_dia = df_v_filtrado.groupby('Fecha')['Monto ($)'].sum().reset_index()
+with tab2, perf.etapa("gráfico: facturación vs ads"):
+    v_dia = corte.por_dia().rename(columns={'Monto': 'Monto ($)'}).reset_index()
     fig_fin = px.line(
         v_dia, x='Fecha', y='Monto ($)', 
         title="Dinámica Diaria: Ingresos vs Gasto",
@@ -388,3 +305,5 @@ with tab2:
     fig_fin.update_traces(hovertemplate="$%{y:,.2f}") 
 
     st.plotly_chart(fig_fin, use_container_width=True)
+
+perf.panel()
@@ -0,0 +1 @@
+# Benchmarks del pipeline: python -m bench.correr (ver bench/correr.py)
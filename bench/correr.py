@@ -0,0 +1,189 @@
+import argparse
+import io
+import os
+import time
+import numpy as np
+import pandas as pd
+import kpis
+import periodos
+import vdp
+from leads import IndiceBusqueda, IndiceEmails, RankingLTV, tabla_journey, tabla_leads
+from limpieza import (compactar, limpiar_ventas, limpiar_ventas_dash, limpiar_leads_dash, limpiar_volumen,
+                      limpiar_calificados, limpiar_resultados, limpiar_budget_dic, limpiar_budget_2026,
+                      limpiar_budget_dic_dash, limpiar_budget_2026_dash, CATEGORIAS_LEADS, CATEGORIAS_VENTAS)
+from bench import generadores
+
+# --- BENCHMARK DEL PIPELINE ---
+# Mide cada etapa de limpieza y de KPIs sobre hojas sintéticas de 10k, 100k y 1M
+# filas. Una etapa que falla (p. ej. MemoryError) corta su hoja y queda marcada:
+# así se ve dónde se rompe el pipeline. Para detectar regresiones se guarda una
+# corrida y se compara contra ella:
+#
+#   python -m bench.correr --salida base.csv
+#   python -m bench.correr --base base.csv          # marca las etapas > 25% más lentas
+#
+# Las etapas llaman a las mismas limpiezas que las páginas (limpieza.py), con los
+# tipos compactos que les aplica datos.cargar_fuente, y al mismo motor de KPIs: lo
+# que se mide es lo que corre en el dashboard.
+
+TAMAÑOS = (10_000, 100_000, 1_000_000)
+
+def _csv(df):
+    """Texto CSV (como lo entrega Sheets); se genera fuera del cronómetro."""
+    return df.to_csv(index=False)
+
+def _leer(ctx, *hojas, **kwargs):
+    """Parsea el CSV de cada hoja a ctx['crudo'] (como datos.leer_fuente)."""
+    for hoja in hojas:
+        ctx.setdefault('crudo', {})[hoja] = pd.read_csv(io.StringIO(ctx['csv'][hoja]), **kwargs)
+
+def _limpiar(ctx, hoja, limpiar):
+    """Limpieza de una página sobre una copia de la hoja cruda (datos.leer_fuente entrega copias)."""
+    return limpiar(ctx['crudo'][hoja].copy())
+
+# --- ETAPAS ---
+# Cada hoja es una lista de (etapa, función(ctx)); ctx guarda los resultados intermedios.
+
+def _ventas_corte(ctx):
+    corte = ctx['cubo'].corte(ctx['inicio'], ctx['fin'])
+    ctx['corte'] = corte
+    return corte.suma('Monto'), corte.emails_unicos(), corte.emails_unicos(asistencia=True), corte.emails_unicos(estado=kpis.ESTADO_VENTA)
+
+ETAPAS_VENTAS = [
+    ("leer_csv", lambda ctx: _leer(ctx, 'ventas')),
+    ("limpiar", lambda ctx: ctx.update(ventas=_limpiar(ctx, 'ventas', limpiar_ventas))),  # app.py
+    ("compactar", lambda ctx: ctx.update(ventas=compactar(ctx['ventas'], CATEGORIAS_VENTAS))),
+    ("ordenar", lambda ctx: ctx.update(ventas=periodos.ordenar_por_fecha(ctx['ventas']))),
+    ("rango_periodo", lambda ctx: periodos.rango(ctx['ventas'], ctx['inicio'], ctx['fin'])),
+    ("cubo_diario", lambda ctx: ctx.update(cubo=kpis.CuboDiario(ctx['ventas']))),
+    ("corte_exacto", _ventas_corte),
+    ("corte_hll", lambda ctx: ctx['corte'].emails_unicos(modo="hll")),
+    ("ranking_closers", lambda ctx: ctx['corte'].por_closer(('Facturado', 'Asistencias_Unicas', 'Ventas_Unicas'))),
+    ("limpiar_dash", lambda ctx: ctx.update(ventas_dash=compactar(_limpiar(ctx, 'ventas', limpiar_ventas_dash), CATEGORIAS_VENTAS))),
+    ("cubo_dash", lambda ctx: kpis.CuboDiario(periodos.ordenar_por_fecha(ctx['ventas_dash']))),
+]
+
+def _leads_limpiar(ctx):
+    """journey.py: volumen y calificados, compactados como en datos.cargar_fuente."""
+    ctx['volumen'] = compactar(_limpiar(ctx, 'leads_all', limpiar_volumen), CATEGORIAS_LEADS)
+    ctx['calificados'] = compactar(_limpiar(ctx, 'leads_qual', limpiar_calificados), CATEGORIAS_LEADS)
+
+def _leads_dash(ctx):
+    for hoja in ('leads_all', 'leads_qual'):
+        periodos.ordenar_por_fecha(compactar(_limpiar(ctx, hoja, limpiar_leads_dash), CATEGORIAS_LEADS))
+
+ETAPAS_LEADS = [
+    ("leer_csv", lambda ctx: _leer(ctx, 'leads_all', 'leads_qual', 'ventas')),
+    ("limpiar", _leads_limpiar),
+    ("resultados", lambda ctx: ctx.update(resultados=compactar(_limpiar(ctx, 'ventas', limpiar_resultados), CATEGORIAS_VENTAS))),
+    ("indice_emails", lambda ctx: IndiceEmails({'resultados': ctx['resultados']})),
+    ("indice_busqueda", lambda ctx: ctx.update(buscador=IndiceBusqueda(tabla_leads(ctx['volumen'], ctx['resultados'])))),
+    ("buscar", lambda ctx: [ctx['buscador'].buscar(q) for q in ("maria", "gomez", "sofia.12", "andrs rodrigez")]),
+    ("journey", lambda ctx: ctx.update(journey=tabla_journey(ctx['volumen'], ctx['calificados'], ctx['resultados']))),
+    ("ranking_ltv", lambda ctx: RankingLTV(ctx['journey']).top(50)),
+    ("limpiar_dash", _leads_dash),
+]
+
+def _budget_2026(ctx):
+    ctx['g2'] = _limpiar(ctx, 'budget_2026', limpiar_budget_2026)
+    if ctx['g2'] is None:
+        raise ValueError("budget_2026 con menos de 4 columnas")
+
+def _budget_unir(ctx):
+    ctx['gastos'] = periodos.ordenar_por_fecha(pd.concat([ctx['g1'], ctx['g2']], ignore_index=True))
+
+def _budget_dash(ctx):
+    b1 = limpiar_budget_dic_dash(ctx['crudo']['budget_dic'].copy())
+    b2 = limpiar_budget_2026_dash(ctx['crudo']['budget_2026'].copy())
+    periodos.ordenar_por_fecha(pd.concat([b1, b2], ignore_index=True).dropna(subset=['Fecha']))
+
+ETAPAS_BUDGET = [
+    ("leer_csv", lambda ctx: _leer(ctx, 'budget_dic', 'budget_2026')),
+    ("formato_viejo", lambda ctx: ctx.update(g1=_limpiar(ctx, 'budget_dic', limpiar_budget_dic))),
+    ("formato_nuevo", _budget_2026),
+    ("unir_ordenar", _budget_unir),
+    ("gasto_periodo", lambda ctx: periodos.rango(ctx['gastos'], ctx['inicio'], ctx['fin'])['Gasto'].sum()),
+    ("formato_dash", _budget_dash),
+]
+
+ETAPAS_VDP = [
+    ("leer_csv", lambda ctx: _leer(ctx, 'vdp', dtype=str)),
+    ("limpiar", lambda ctx: ctx.update(vdp=vdp.limpiar(ctx['crudo']['vdp'])[0])),
+    ("diario_unitarias", lambda ctx: ctx.update(vdp_diario=vdp.diario(ctx['vdp']))),
+    ("kpis_periodo", lambda ctx: vdp.embudo(vdp.periodo(periodos.rango(ctx['vdp_diario'], ctx['inicio'], ctx['fin'])))),
+]
+
+HOJAS = {
+    "ventas": ETAPAS_VENTAS,
+    "leads": ETAPAS_LEADS,
+    "budget": ETAPAS_BUDGET,
+    "vdp": ETAPAS_VDP,
+}
+
+# --- EJECUCIÓN ---
+
+def correr_tamaño(filas, hojas, semilla=0):
+    """Tiempos de cada etapa para `filas` filas. Devuelve una fila por (hoja, etapa)."""
+    ctx = {
+        'csv': {nombre: _csv(generador(filas, semilla=semilla)) for nombre, generador in generadores.GENERADORES.items()},
+        'inicio': pd.Timestamp("2025-03-01"),
+        'fin': pd.Timestamp("2025-03-31"),
+    }
+    medidas = []
+    for hoja in hojas:
+        fallo = None
+        for etapa, funcion in HOJAS[hoja]:
+            if fallo:
+                medidas.append({'filas': filas, 'hoja': hoja, 'etapa': etapa, 'segundos': np.nan, 'estado': "omitida"})
+                continue
+            inicio = time.perf_counter()
+            try:
+                funcion(ctx)
+                estado = "ok"
+            except Exception as e:  # MemoryError incluido: es justo lo que se quiere ver
+                fallo = estado = f"❌ {type(e).__name__}: {e}"[:80]
+            medidas.append({'filas': filas, 'hoja': hoja, 'etapa': etapa,
+                            'segundos': time.perf_counter() - inicio, 'estado': estado})
+    return medidas
+
+def comparar(resultados, base, umbral):
+    """Agrega 'vs_base' (cociente de tiempos) y marca las etapas más lentas que `umbral`."""
+    base = base.set_index(['filas', 'hoja', 'etapa'])['segundos'].rename('base')
+    resultados = resultados.join(base, on=['filas', 'hoja', 'etapa'])
+    resultados['vs_base'] = resultados['segundos'] / resultados['base']
+    lentas = resultados['vs_base'] > umbral
+    resultados.loc[lentas & (resultados['estado'] == "ok"), 'estado'] = "⚠️ regresión"
+    return resultados.drop(columns='base')
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempos por etapa del pipeline con hojas sintéticas.")
+    parser.add_argument("--filas", type=int, nargs="+", default=list(TAMAÑOS))
+    parser.add_argument("--hojas", nargs="+", choices=list(HOJAS), default=list(HOJAS))
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--salida", help="CSV donde guardar los tiempos (base para comparar)")
+    parser.add_argument("--base", help="CSV de una corrida anterior contra la que comparar")
+    parser.add_argument("--umbral", type=float, default=1.25, help="Cociente vs base que cuenta como regresión")
+    args = parser.parse_args()
+
+    medidas = []
+    for filas in args.filas:
+        print(f"--- {filas:,} filas ---", flush=True)
+        medidas_tamaño = correr_tamaño(filas, args.hojas, args.semilla)
+        for m in medidas_tamaño:
+            print(f"{m['hoja']:>7} {m['etapa']:<18} {m['segundos']:>9.4f}s  {m['estado']}", flush=True)
+        medidas.extend(medidas_tamaño)
+
+    resultados = pd.DataFrame(medidas)
+    resultados['filas_por_s'] = (resultados['filas'] / resultados['segundos']).round()
+    if args.base and os.path.exists(args.base):
+        resultados = comparar(resultados, pd.read_csv(args.base), args.umbral)
+        regresiones = resultados[resultados['estado'] == "⚠️ regresión"]
+        print("\nRegresiones:" if len(regresiones) else "\nSin regresiones frente a la base.")
+        if len(regresiones):
+            print(regresiones[['filas', 'hoja', 'etapa', 'segundos', 'vs_base']].to_string(index=False))
+    if args.salida:
+        resultados.to_csv(args.salida, index=False)
+        print(f"\nTiempos guardados en {args.salida}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import argparse
+import os
+import numpy as np
+import pandas as pd
+from limpieza import DESPLAZAMIENTO_GHL
+
+# --- GENERADORES SINTÉTICOS DE HOJAS ---
+# Imitan los CSV publicados de Google Sheets / GHL con sus defectos reales: filas
+# corridas 8 columnas a la derecha, montos con "$" y miles, números europeos
+# ("1.234,56", "-"), emails con mayúsculas y espacios, fechas DD/MM/YYYY.
+# Todo vectorizado con numpy: 1M de filas se generan en segundos.
+#
+#   python -m bench.generadores carpeta_csv --filas 100000
+#
+# escribe {nombre}.csv para cada fuente de datos.FUENTES (servible con servidor_local.py).
+
+CLOSERS = ["Ana Torres", "carlos ruiz ", "Diana López", " Esteban Mora", "Felipe Díaz", "Gina Rojas", None]
+RESULTADOS = ["Venta", "No Show", "Seguimiento", "Descalificado", "Re-agendado", "Reagendado",
+              "Asistió - pendiente", "Pendiente", None]
+PESOS_RESULTADOS = [0.12, 0.2, 0.18, 0.1, 0.08, 0.04, 0.08, 0.15, 0.05]
+CAMPAÑAS = ["VDP Frío", "VDP Retargeting", "Orgánico IG", "Webinar", "Referidos", None]
+NOMBRES = ["María", "José", "Lucía", "Andrés", "Sofía", "Mateo", "Valentina", "Sebastián", "Camila", "Nicolás"]
+APELLIDOS = ["García", "Rodríguez", "Martínez", "Hernández", "López", "Gómez", "Pérez", "Sánchez", "Ramírez", "Cruz"]
+DOMINIOS = ["gmail.com", "hotmail.com", "outlook.com", "yahoo.com", "empresa.co"]
+
+# Columnas de relleno de la exportación de GHL (hacen falta > 8 para el corrimiento)
+RELLENO_GHL = ["Teléfono", "Etiquetas", "Pipeline", "Etapa", "Notas", "Fuente", "Creado por", "Zona", "Idioma", "ID GHL"]
+
+def _rng(semilla):
+    return np.random.default_rng(semilla)
+
+def _fechas(rng, n, inicio="2025-01-01", dias=420, formato="%d/%m/%Y"):
+    fechas = pd.Timestamp(inicio) + pd.to_timedelta(rng.integers(0, dias, n), unit="D")
+    return pd.Series(fechas).dt.strftime(formato).to_numpy(dtype=object)
+
+def _emails(rng, n, universo=None):
+    """Emails de un universo de ~n/3 personas, con ruido de mayúsculas y espacios."""
+    universo = universo or max(n // 3, 1)
+    ids = rng.integers(0, universo, n)
+    nombre = np.asarray(NOMBRES, dtype=object)[ids % len(NOMBRES)]
+    dominio = np.asarray(DOMINIOS, dtype=object)[ids % len(DOMINIOS)]
+    emails = pd.Series(nombre).str.lower() + "." + pd.Series(ids.astype(str)) + "@" + pd.Series(dominio)
+    ruido = rng.random(n)
+    emails = emails.where(ruido > 0.1, emails.str.upper())
+    emails = emails.where(ruido < 0.9, " " + emails + " ")
+    return emails.to_numpy(dtype=object), ids
+
+def _nombres(rng, ids):
+    nombre = np.asarray(NOMBRES, dtype=object)[ids % len(NOMBRES)]
+    apellido = np.asarray(APELLIDOS, dtype=object)[(ids // len(NOMBRES)) % len(APELLIDOS)]
+    return (pd.Series(nombre) + " " + pd.Series(apellido)).to_numpy(dtype=object)
+
+def _montos_usd(rng, n, vacios=0.3):
+    """'$1,250.00' o vacío (formato de la hoja de ventas)."""
+    montos = pd.Series(np.round(rng.gamma(2.0, 600.0, n), 2))
+    texto = "$" + montos.map("{:,.2f}".format)
+    return texto.where(rng.random(n) > vacios, "").to_numpy(dtype=object)
+
+def _numeros_euro(rng, n, escala, decimales=True, guiones=0.05):
+    """'1.234,56' (miles con punto, coma decimal), '-' o vacío (hoja VDP)."""
+    valores = pd.Series(rng.gamma(1.5, escala, n))
+    formato = "{:,.2f}" if decimales else "{:,.0f}"
+    texto = valores.map(formato.format).str.replace(",", "_").str.replace(".", ",").str.replace("_", ".")
+    azar = rng.random(n)
+    texto = texto.where(azar > guiones, "-")
+    return texto.where(azar < 1 - guiones / 2, "").to_numpy(dtype=object)
+
+def desplazar_ghl(df, fraccion, rng, desplazamiento=DESPLAZAMIENTO_GHL):
+    """Corre `fraccion` de las filas `desplazamiento` columnas a la derecha, como hace GHL."""
+    n = len(df)
+    malas = rng.random(n) < fraccion
+    valores = df.to_numpy(dtype=object)
+    corridas = np.full_like(valores[malas], None)
+    corridas[:, desplazamiento:] = valores[malas][:, :-desplazamiento]
+    valores[malas] = corridas
+    return pd.DataFrame(valores, columns=df.columns)
+
+def ventas(n, semilla=0, desplazadas=0.02):
+    """Hoja de resultados de closers (GHL)."""
+    rng = _rng(semilla)
+    emails, ids = _emails(rng, n)
+    df = pd.DataFrame({
+        "Fecha": _fechas(rng, n),
+        "Monto ($)": _montos_usd(rng, n),
+        "Closer": rng.choice(np.asarray(CLOSERS, dtype=object), n),
+        "Resultado": rng.choice(np.asarray(RESULTADOS, dtype=object), n, p=PESOS_RESULTADOS),
+        "Email": emails,
+        "Origen Campaña": rng.choice(np.asarray(CAMPAÑAS, dtype=object), n),
+        "Lead Name": _nombres(rng, ids),
+        "Nombre del Ad": "AD-" + pd.Series(rng.integers(1, 40, n).astype(str)).to_numpy(dtype=object),
+    })
+    for col in RELLENO_GHL:
+        df[col] = ""
+    return desplazar_ghl(df, desplazadas, rng) if desplazadas else df
+
+def leads(n, semilla=1):
+    """Hoja de leads (volumen o calificados): 'Fecha Creación' DD/MM/YYYY HH:MM."""
+    rng = _rng(semilla)
+    emails, ids = _emails(rng, n)
+    return pd.DataFrame({
+        "Fecha Creación": _fechas(rng, n, formato="%d/%m/%Y %H:%M"),
+        "Email": emails,
+        "Nombre": _nombres(rng, ids),
+        "Campaña (UTM)": rng.choice(np.asarray(CAMPAÑAS, dtype=object), n),
+        "Conjunto (ID)": pd.Series(rng.integers(10**9, 10**10, n).astype(str)).to_numpy(dtype=object),
+        "Ad Content": "AD-" + pd.Series(rng.integers(1, 40, n).astype(str)).to_numpy(dtype=object),
+    })
+
+def budget_dic(n, semilla=2):
+    """Budget formato viejo: Fecha DD/MM/YYYY y Gasto '$1,234.56'."""
+    rng = _rng(semilla)
+    return pd.DataFrame({"Fecha": _fechas(rng, n), "Gasto": _montos_usd(rng, n, vacios=0.02)})
+
+def budget_2026(n, semilla=3):
+    """Budget formato nuevo (exportación de Meta): Day ISO y métricas numéricas."""
+    rng = _rng(semilla)
+    return pd.DataFrame({
+        "Day": _fechas(rng, n, formato="%Y-%m-%d"),
+        "Amount spent": _montos_usd(rng, n, vacios=0.02),
+        "Link clicks": rng.integers(0, 3000, n),
+        "Landing page views": rng.integers(0, 2000, n),
+    })
+
+def vdp(n, semilla=4):
+    """Hoja del lanzamiento VDP: todo texto con números europeos."""
+    rng = _rng(semilla)
+    return pd.DataFrame({
+        "Fecha": _fechas(rng, n),
+        "Spent": _numeros_euro(rng, n, 300.0),
+        "Clicks": _numeros_euro(rng, n, 900.0, decimales=False),
+        "Visitas LP": _numeros_euro(rng, n, 600.0, decimales=False),
+        "Leads Hyros": _numeros_euro(rng, n, 120.0, decimales=False),
+        "API Hyros": _numeros_euro(rng, n, 90.0, decimales=False),
+        "Grupo": _numeros_euro(rng, n, 60.0, decimales=False),
+    })
+
+# Fuente (nombre en datos.FUENTES) -> generador
+GENERADORES = {
+    "ventas": ventas,
+    "budget_dic": budget_dic,
+    "budget_2026": budget_2026,
+    "leads_all": leads,
+    "leads_qual": lambda n, semilla=5: leads(max(n // 4, 1), semilla),
+    "vdp": vdp,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Escribe CSV sintéticos con el formato de cada hoja.")
+    parser.add_argument("carpeta", help="Carpeta de salida ({nombre}.csv por fuente)")
+    parser.add_argument("--filas", type=int, default=10_000)
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+
+    os.makedirs(args.carpeta, exist_ok=True)
+    for nombre, generador in GENERADORES.items():
+        ruta = os.path.join(args.carpeta, f"{nombre}.csv")
+        generador(args.filas, semilla=args.semilla).to_csv(ruta, index=False)
+        print(f"{ruta}: {args.filas:,} filas")
+
+if __name__ == "__main__":
+    main()
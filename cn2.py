@@ -6,6 +6,10 @@ from datetime import datetime, timedelta
 import json
 import os
 import extra_streamlit_components as stx 
+import datos
+import perf
+import periodos
+from limpieza import clasificar_resultados, parsear_numeros, CATEGORIAS_VENTAS
 
 # --- CONFIGURACIÓN DE PÁGINA (ESTÉTICA PRO) ---
 st.set_page_config(
@@ -14,6 +18,7 @@ st.set_page_config(
     layout="wide",
     initial_sidebar_state="expanded"
 )
+perf.corrida()
 
 # --- INYECCIÓN DE CSS (BRANDING) ---
 st.markdown("""
@@ -76,100 +81,85 @@ def guardar_metas_archivo(fact, ads):
         json.dump({"meta_facturacion": fact, "presupuesto_ads": ads}, f)
 
 # --- CARGA DE DATOS ---
-@st.cache_data(ttl=300) 
-def cargar_datos():
-    url_ventas = "https://docs.google.com/spreadsheets/d/e/2PACX-1vQuXaPCen61slzpr1TElxXoCROIxAgmgWT7pyWvel1dxq_Z_U1yZPrVrTbJfx9MwaL8_cluY3v2ywoB/pub?gid=0&single=true&output=csv"
-    url_gastos = "https://docs.google.com/spreadsheets/d/e/2PACX-1vQGOLgPTDLie5gEbkViCbpebWfN9S_eb2h2GGlpWLjmfVgzfnwR_ncVTs4IqmKgmAFfxZTQHJlMBrIi/pub?gid=0&single=true&output=csv"
+def limpiar_ventas(df_v):
+    """Limpieza fila a fila de Ventas (apta para sincronización incremental)."""
+    df_v['Fecha'] = pd.to_datetime(df_v['Fecha'], dayfirst=True, errors='coerce')
+    df_v['Monto ($)'] = parsear_numeros(df_v['Monto ($)'])[0]
+    
+    df_v['Closer'] = df_v['Closer'].fillna("Sin Asignar")
+    df_v['Resultado'] = df_v['Resultado'].fillna("Pendiente")
+    
+    # Normalización de Estados
+    df_v['Estado_Simple'] = clasificar_resultados(df_v['Resultado'])['Estado_Simple']
 
-    # VENTAS
-    try:
-        df_v = pd.read_csv(url_ventas)
-        df_v['Fecha'] = pd.to_datetime(df_v['Fecha'], dayfirst=True, errors='coerce')
-        if df_v['Monto ($)'].dtype == 'O': 
-            df_v['Monto ($)'] = df_v['Monto ($)'].astype(str).str.replace(r'[$,]', '', regex=True)
-        df_v['Monto ($)'] = pd.to_numeric(df_v['Monto ($)'], errors='coerce').fillna(0)
-        
-        df_v['Closer'] = df_v['Closer'].fillna("Sin Asignar")
-        df_v['Resultado'] = df_v['Resultado'].fillna("Pendiente")
-        
-        # Normalización de Estados
-        def clasificar_estado(texto):
-            texto = str(texto).lower()
-            if "venta" in texto: return "✅ Venta"
-            if "no show" in texto: return "❌ No Show"
-            if "descalificado" in texto: return "🚫 Descalificado"
-            if "seguimiento" in texto: return "👀 Seguimiento"
-            if "re-agendado" in texto or "reagendado" in texto: return "📅 Re-Agendado"
-            return "Otro/Pendiente"
-        df_v['Estado_Simple'] = df_v['Resultado'].apply(clasificar_estado)
-
-        # Lógica de Asistencia (Show)
-        # Asistió si NO es 'No Show' y NO es 'Descalificado' (depende de tu criterio, a veces descalificado asiste y se descalifica en llamada)
-        def es_asistencia_valida(row):
-            res = str(row['Resultado']).lower()
-            estado = row['Estado_Simple']
-            if estado == "❌ No Show": return False
-            if estado == "📅 Re-Agendado": return False # No asistió hoy
-            return True # Asumimos que Venta, Seguimiento y Descalificado (en llamada) sí asistieron
-            
-        df_v['Es_Asistencia'] = df_v.apply(es_asistencia_valida, axis=1)
-        
-        # Día de la semana para análisis
-        df_v['Dia_Semana'] = df_v['Fecha'].dt.day_name()
+    # Lógica de Asistencia (Show)
+    # Asistió si NO es 'No Show' y NO es 'Re-Agendado' (no asistió hoy).
+    # Asumimos que Venta, Seguimiento y Descalificado (en llamada) sí asistieron
+    df_v['Es_Asistencia'] = ~df_v['Estado_Simple'].isin(["❌ No Show", "📅 Re-Agendado"])
+    
+    # Día de la semana para análisis
+    df_v['Dia_Semana'] = df_v['Fecha'].dt.day_name()
+    return df_v
 
+@st.cache_data(ttl=datos.TTL_FUENTES)
+@datos.con_snapshot("cn2")
+def cargar_datos():
+    datos.precargar("ventas", "budget_dic")  # Descarga en paralelo
+    # VENTAS (solo se limpian las filas nuevas; la historia viene del almacén local)
+    try:
+        df_v = datos.cargar_fuente("cn2_ventas", "ventas", limpiar_ventas, CATEGORIAS_VENTAS)
     except Exception as e:
         df_v = pd.DataFrame()
 
     # GASTOS
     try:
-        df_g = pd.read_csv(url_gastos)
+        df_g = datos.leer_fuente("budget_dic")
         df_g['Fecha'] = pd.to_datetime(df_g['Fecha'], dayfirst=True, errors='coerce')
-        if df_g['Gasto'].dtype == 'O':
-            df_g['Gasto'] = df_g['Gasto'].astype(str).str.replace(r'[$,]', '', regex=True)
-        df_g['Gasto'] = pd.to_numeric(df_g['Gasto'], errors='coerce').fillna(0)
+        df_g['Gasto'] = parsear_numeros(df_g['Gasto'])[0]
     except Exception as e:
         df_g = pd.DataFrame()
 
-    return df_v, df_g
+    df_v = periodos.ordenar_por_fecha(df_v)
+    return df_v, periodos.ordenar_por_fecha(df_g), datos.huella_cubo(df_v)  # Huella: clave del cubo diario compartido
 
-df_ventas, df_gastos = cargar_datos()
+df_ventas, df_gastos, huella_ventas = datos.arranque_rapido("cn2", cargar_datos) # Snapshot local en frío
 
 if df_ventas.empty:
     st.error("⚠️ No se pudieron cargar los datos. Verifica la conexión con Google Sheets.")
     st.stop()
 
+cubo = datos.cubo_ventas(huella_ventas, df_ventas)
+
 # --- SIDEBAR ---
 st.sidebar.markdown("### 🎛️ Control Panel")
 if st.sidebar.button("🔄 Refresh Data", use_container_width=True):
+    datos.refrescar_fuentes()
     st.cache_data.clear()
     st.rerun()
+datos.panel_fuentes()
 
 # Filtros de Fecha
 st.sidebar.markdown("---")
 filtro_tiempo = st.sidebar.selectbox("📅 Período", ["Este Mes", "Esta Semana", "Hoy", "Últimos 30 días", "Personalizado"])
-hoy = pd.to_datetime("today").date()
+hoy = periodos.hoy()
 
-if filtro_tiempo == "Hoy": f_inicio, f_fin = hoy, hoy
-elif filtro_tiempo == "Esta Semana": f_inicio, f_fin = hoy - timedelta(days=hoy.weekday()), hoy
-elif filtro_tiempo == "Este Mes": f_inicio, f_fin = hoy.replace(day=1), hoy
-elif filtro_tiempo == "Últimos 30 días": f_inicio, f_fin = hoy - timedelta(days=30), hoy
+if filtro_tiempo != "Personalizado":
+    f_inicio, f_fin = periodos.resolver(filtro_tiempo, hoy)
 else:
     c1, c2 = st.sidebar.columns(2)
     f_inicio = c1.date_input("Desde", hoy)
     f_fin = c2.date_input("Hasta", hoy)
 
 # Filtro Closer
-lista_closers = ["Todos"] + sorted([c for c in df_ventas['Closer'].unique() if c])
+lista_closers = ["Todos"] + sorted([c for c in cubo.closers if c])
 closer_sel = st.sidebar.selectbox("👤 Closer", lista_closers)
 
-# Aplicar Filtros
-mask_v = (df_ventas['Fecha'].dt.date >= f_inicio) & (df_ventas['Fecha'].dt.date <= f_fin)
-df_v_filtrado = df_ventas.loc[mask_v].copy()
-if closer_sel != "Todos": df_v_filtrado = df_v_filtrado[df_v_filtrado['Closer'] == closer_sel]
+# Aplicar Filtros (ventas: corte del cubo diario, sin re-filtrar las filas crudas)
+with perf.etapa("kpis: corte"):
+    corte = cubo.corte(f_inicio, f_fin, closer_sel)
 
 if not df_gastos.empty:
-    mask_g = (df_gastos['Fecha'].dt.date >= f_inicio) & (df_gastos['Fecha'].dt.date <= f_fin)
-    df_g_filtrado = df_gastos.loc[mask_g].copy()
+    df_g_filtrado = periodos.rango(df_gastos, f_inicio, f_fin)
 else: df_g_filtrado = pd.DataFrame(columns=['Fecha', 'Gasto'])
 
 # --- METAS (Sidebar Bottom) ---
@@ -183,16 +173,16 @@ with st.sidebar.expander("⚙️ Configurar Objetivos"):
         st.rerun()
 
 # --- KPI ENGINE ---
-facturacion = df_v_filtrado['Monto ($)'].sum()
+facturacion = corte.suma('Monto')
 inversion = df_g_filtrado['Gasto'].sum() if closer_sel == "Todos" else 0
 profit = facturacion - inversion
 roas = (facturacion / inversion) if inversion > 0 else 0
 
-total_leads = len(df_v_filtrado) # Total filas
-ventas = len(df_v_filtrado[df_v_filtrado['Estado_Simple'] == "✅ Venta"])
+total_leads = int(corte.suma('Filas')) # Total filas
+ventas = corte.filas_estado("✅ Venta")
 # Asumimos que "Descalificado" también cuenta como Lead procesado
-leads_calificados = len(df_v_filtrado[~df_v_filtrado['Estado_Simple'].isin(["🚫 Descalificado"])]) 
-asistencias = df_v_filtrado['Es_Asistencia'].sum()
+leads_calificados = total_leads - corte.filas_estado("🚫 Descalificado")
+asistencias = int(corte.suma('Asistencias'))
 
 # Tasas
 show_rate = (asistencias / leads_calificados * 100) if leads_calificados > 0 else 0
@@ -215,7 +205,7 @@ col4.metric("🔥 ROAS", f"{roas:.2f}x", delta=f"{roas-2:.1f} vs KPI" if roas>0
 st.markdown("### 🌪️ Sales Funnel Efficiency")
 c_funnel, c_metrics = st.columns([2, 1])
 
-with c_funnel:
+with c_funnel, perf.etapa("gráfico: embudo"):
     # Datos para el Funnel
     # Etapa 1: Leads Totales (Formularios)
     # Etapa 2: Agendados/Calificados (Quitamos descalificados)
@@ -246,11 +236,12 @@ st.markdown("---")
 
 # 3.1 GRÁFICO: MEJORES DÍAS (FULL WIDTH)
 st.subheader("📅 Mejores Días para Cerrar")
-if not df_v_filtrado.empty:
+if not corte.vacio:
     # Agrupar ventas por día de la semana
-    ventas_dia = df_v_filtrado[df_v_filtrado['Estado_Simple'] == "✅ Venta"].groupby('Dia_Semana')['Monto ($)'].sum().reindex(
+    ventas_por_dia = corte.por_dia(estado="✅ Venta")['Monto']
+    ventas_dia = ventas_por_dia.groupby(ventas_por_dia.index.day_name()).sum().reindex(
         ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-    ).fillna(0).reset_index()
+    ).fillna(0).rename_axis('Dia_Semana').rename('Monto ($)').reset_index()
     
     fig_bar = px.bar(ventas_dia, x="Dia_Semana", y="Monto ($)", color="Monto ($)", 
                      color_continuous_scale="Greens", title="Facturación Acumulada por Día")
@@ -265,12 +256,9 @@ st.divider() # Separador visual
 
 # 3.2 GRÁFICO: TENDENCIA DIARIA (FULL WIDTH)
 st.subheader("📈 Tendencia Diaria de Leads y Facturación")
-if not df_v_filtrado.empty:
+if not corte.vacio:
     # Leads vs Ventas diario
-    diario = df_v_filtrado.groupby('Fecha').agg({
-        'Estado_Simple': 'count', # Total Leads
-        'Monto ($)': 'sum' # Facturación
-    }).rename(columns={'Estado_Simple': 'Leads'}).reset_index()
+    diario = corte.por_dia().rename(columns={'Filas': 'Leads', 'Monto': 'Monto ($)'}).reset_index()
     
     fig_trend = px.line(diario, x='Fecha', y='Leads', title="Volumen vs. Ingresos", markers=True)
     fig_trend.add_bar(x=diario['Fecha'], y=diario['Monto ($)'], name="Facturación", yaxis="y2", opacity=0.3)
@@ -284,15 +272,8 @@ if not df_v_filtrado.empty:
 
 # --- ROW 4: RANKING DETALLADO ---
 st.markdown("### 🏆 Performance de Equipo")
-if not df_v_filtrado.empty:
-    ranking = df_v_filtrado.groupby('Closer').apply(
-        lambda x: pd.Series({
-            'Leads': len(x),
-            'Facturado': x['Monto ($)'].sum(),
-            'Shows': x['Es_Asistencia'].sum(),
-            'Ventas': x['Estado_Simple'].eq("✅ Venta").sum()
-        })
-    ).reset_index()
+if not corte.vacio:
+    ranking = corte.por_closer(('Leads', 'Facturado', 'Shows', 'Ventas'))
     
     # Cálculos adicionales
     ranking['Show Rate'] = (ranking['Shows'] / ranking['Leads']).fillna(0) # Lo dejamos en decimal (0.5) para que Streamlit lo formatee a %
@@ -334,3 +315,5 @@ if not df_v_filtrado.empty:
             )
         }
     )
+
+perf.panel()
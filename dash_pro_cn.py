@@ -2,10 +2,14 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from datetime import datetime, timedelta
+import datos
+import perf
+import periodos
+from limpieza import limpiar_leads_dash, limpiar_ventas_dash, limpiar_budget_dic_dash, limpiar_budget_2026_dash, CATEGORIAS_LEADS, CATEGORIAS_VENTAS
 
 # --- 1. CONFIGURACIÓN DE PÁGINA ---
 st.set_page_config(page_title="Agency Command Center", page_icon="🦁", layout="wide")
+perf.corrida()
 
 # CSS "Dark Mode Pro"
 st.markdown("""
@@ -52,108 +56,46 @@ if "presupuesto_ads" not in st.session_state:
     st.session_state["presupuesto_ads"] = 5000.0
 
 # --- 4. CARGA DE DATOS ---
-@st.cache_data(ttl=300)
+# Las limpiezas de cada hoja viven en limpieza.py (las mismas que mide el benchmark)
+@st.cache_data(ttl=datos.TTL_FUENTES)
+@datos.con_snapshot("dash_pro")
 def cargar_datos():
-    # LINKS
-    url_budget_dic = "https://docs.google.com/spreadsheets/d/e/2PACX-1vQGOLgPTDLie5gEbkViCbpebWfN9S_eb2h2GGlpWLjmfVgzfnwR_ncVTs4IqmKgmAFfxZTQHJlMBrIi/pub?output=csv"
-    url_budget_2026 = "https://docs.google.com/spreadsheets/d/e/2PACX-1vTQKTt_taqoH2qNwWbs3t4doLsi0SuGavgdUNvpCKrqtlp5U9GaTqkTt9q-c1eWBnvPN88Qg5t0vXzK/pub?gid=692917105&single=true&output=csv"
-    
-    # URL Leads Totales (La que enviaste para corregir)
-    url_leads_todos = "https://docs.google.com/spreadsheets/d/e/2PACX-1vTjCMjoi7DXiCeBRQdzAQZlx_L6SfpmbLlqmeRgZDHmCEdmN5_grVD_Yqa-5tzNprDS02o98ms80j1x/pub?gid=0&single=true&output=csv"
-    
-    # URL Leads Calificados
-    url_leads_qual = "https://docs.google.com/spreadsheets/d/e/2PACX-1vTjCMjoi7DXiCeBRQdzAQZlx_L6SfpmbLlqmeRgZDHmCEdmN5_grVD_Yqa-5tzNprDS02o98ms80j1x/pub?gid=1272057128&single=true&output=csv"
-    
-    url_ventas = "https://docs.google.com/spreadsheets/d/e/2PACX-1vQuXaPCen61slzpr1TElxXoCROIxAgmgWT7pyWvel1dxq_Z_U1yZPrVrTbJfx9MwaL8_cluY3v2ywoB/pub?gid=0&single=true&output=csv"
-
+    # Las 5 hojas se descargan en paralelo; si una falla solo se degrada su sección
+    datos.precargar("budget_dic", "budget_2026", "leads_all", "leads_qual", "ventas")
     # --- BUDGET ---
     df_budget = pd.DataFrame()
     try:
         # Diciembre
-        b1 = pd.read_csv(url_budget_dic)
-        b1.rename(columns=lambda x: x.strip(), inplace=True)
-        if 'Fecha' in b1.columns: b1['Fecha'] = pd.to_datetime(b1['Fecha'], dayfirst=True, errors='coerce')
-        if 'Gasto' in b1.columns:
-            if b1['Gasto'].dtype == 'O': b1['Gasto'] = b1['Gasto'].astype(str).str.replace(r'[$,]', '', regex=True)
-            b1['Gasto'] = pd.to_numeric(b1['Gasto'], errors='coerce').fillna(0)
-        b1['Clics'] = 0; b1['Visitas'] = 0
-        b1 = b1[['Fecha', 'Gasto', 'Clics', 'Visitas']] if 'Fecha' in b1.columns else pd.DataFrame()
+        b1 = limpiar_budget_dic_dash(datos.leer_fuente("budget_dic"))
 
         # 2026
-        b2 = pd.read_csv(url_budget_2026)
-        b2.rename(columns={'Day': 'Fecha', 'Amount spent': 'Gasto', 'Link clicks': 'Clics', 'Landing page views': 'Visitas'}, inplace=True)
-        b2['Fecha'] = pd.to_datetime(b2['Fecha'], errors='coerce')
-        for col in ['Gasto', 'Clics', 'Visitas']:
-            if b2[col].dtype == 'O': b2[col] = b2[col].astype(str).str.replace(r'[$,]', '', regex=True)
-            b2[col] = pd.to_numeric(b2[col], errors='coerce').fillna(0)
+        b2 = limpiar_budget_2026_dash(datos.leer_fuente("budget_2026"))
         
-        df_budget = pd.concat([b1, b2], ignore_index=True).sort_values('Fecha').dropna(subset=['Fecha'])
-    except Exception as e: st.error(f"Error Budget: {e}")
+        df_budget = periodos.ordenar_por_fecha(pd.concat([b1, b2], ignore_index=True).dropna(subset=['Fecha']))
+    except Exception as e: datos.avisar(f"Error Budget: {e}")
 
     # --- LEADS (CORRECCIÓN TOTALES) ---
+    # Solo se limpian las filas nuevas; la historia viene del almacén local
     df_leads_all = pd.DataFrame()
     df_leads_qual = pd.DataFrame()
     try:
         # 1. TODOS LOS LEADS (Corrección Robusta)
-        l1 = pd.read_csv(url_leads_todos)
-        l1.rename(columns={'Fecha Creación': 'Fecha'}, inplace=True)
-        
-        if 'Fecha' in l1.columns:
-            # Limpieza agresiva de la columna Fecha antes de convertir
-            l1['Fecha'] = l1['Fecha'].astype(str).str.strip()
-            # dayfirst=True es critico si tu sheet es DD/MM/YYYY
-            l1['Fecha'] = pd.to_datetime(l1['Fecha'], dayfirst=True, errors='coerce')
-            
-            # Solo eliminamos filas donde la fecha sea realmente irrecuperable (NaT)
-            df_leads_all = l1.dropna(subset=['Fecha'])
-        
+        df_leads_all = datos.cargar_fuente("dash_leads_all", "leads_all", limpiar_leads_dash, CATEGORIAS_LEADS)
         # 2. LEADS CALIFICADOS
-        l2 = pd.read_csv(url_leads_qual)
-        l2.rename(columns={'Fecha Creación': 'Fecha'}, inplace=True)
-        if 'Fecha' in l2.columns:
-            l2['Fecha'] = l2['Fecha'].astype(str).str.strip()
-            l2['Fecha'] = pd.to_datetime(l2['Fecha'], dayfirst=True, errors='coerce')
-            df_leads_qual = l2.dropna(subset=['Fecha'])
-            
-    except Exception as e: st.error(f"Error Leads: {e}")
+        df_leads_qual = datos.cargar_fuente("dash_leads_qual", "leads_qual", limpiar_leads_dash, CATEGORIAS_LEADS)
+    except Exception as e: datos.avisar(f"Error Leads: {e}")
 
     # --- VENTAS ---
     df_ventas = pd.DataFrame()
     try:
-        v = pd.read_csv(url_ventas)
-        v['Fecha'] = pd.to_datetime(v['Fecha'], dayfirst=True, errors='coerce')
-        v.dropna(subset=['Fecha'], inplace=True)
-        
-        if v['Monto ($)'].dtype == 'O': v['Monto ($)'] = v['Monto ($)'].astype(str).str.replace(r'[$,]', '', regex=True)
-        v['Monto ($)'] = pd.to_numeric(v['Monto ($)'], errors='coerce').fillna(0)
-        
-        v['Closer'] = v['Closer'].astype(str).fillna("Sin Asignar")
-        v['Closer'] = v['Closer'].str.strip().str.title()
+        df_ventas = datos.cargar_fuente("dash_ventas", "ventas", limpiar_ventas_dash, CATEGORIAS_VENTAS)
+    except Exception as e: datos.avisar(f"Error Ventas: {e}")
 
-        v['Resultado'] = v['Resultado'].fillna("Pendiente")
-        
-        def clasificar(res):
-            res = str(res).lower()
-            if "venta" in res: return "✅ Venta"
-            if "no show" in res: return "❌ No Show"
-            if "descalificado" in res: return "🚫 Descalificado"
-            if "seguimiento" in res: return "👀 Seguimiento"
-            return "Otro"
-        v['Estado_Simple'] = v['Resultado'].apply(clasificar)
-        
-        def check_asistencia(res):
-            res = str(res).lower()
-            if "no show" in res: return 0
-            if "re-agendado" in res: return 0
-            return 1 
-        v['Asistio'] = v['Resultado'].apply(check_asistencia)
-        
-        df_ventas = v
-    except Exception as e: st.error(f"Error Ventas: {e}")
+    df_leads_all, df_leads_qual, df_ventas = (periodos.ordenar_por_fecha(d) for d in (df_leads_all, df_leads_qual, df_ventas))
+    return df_budget, df_leads_all, df_leads_qual, df_ventas, datos.huella_cubo(df_ventas)  # Huella: clave del cubo diario compartido
 
-    return df_budget, df_leads_all, df_leads_qual, df_ventas
-
-df_budget, df_leads_all, df_leads_qual, df_ventas = cargar_datos()
+df_budget, df_leads_all, df_leads_qual, df_ventas, huella_ventas = datos.arranque_rapido("dash_pro", cargar_datos) # Snapshot local en frío
+cubo = datos.cubo_ventas(huella_ventas, df_ventas)
 
 if df_ventas.empty and df_budget.empty:
     st.warning("⚠️ No hay datos.")
@@ -162,51 +104,44 @@ if df_ventas.empty and df_budget.empty:
 # --- 5. SIDEBAR ---
 st.sidebar.title("🎛️ Control Panel")
 if st.sidebar.button("🔄 ACTUALIZAR DATOS", type="primary"):
+    datos.refrescar_fuentes()
     st.cache_data.clear()
     st.rerun()
+datos.panel_fuentes()
 
 st.sidebar.markdown("---")
 
 filtro_tiempo = st.sidebar.selectbox("📅 Período", ["Este Mes", "Mes Anterior", "Hoy", "Ayer", "Esta Semana", "Últimos 7 días", "Últimos 30 días", "Personalizado"])
-hoy = pd.to_datetime("today").date()
-
-if filtro_tiempo == "Hoy": f_ini, f_fin = hoy, hoy
-elif filtro_tiempo == "Ayer": f_ini, f_fin = hoy - timedelta(days=1), hoy - timedelta(days=1)
-elif filtro_tiempo == "Esta Semana": f_ini, f_fin = hoy - timedelta(days=hoy.weekday()), hoy
-elif filtro_tiempo == "Últimos 7 días": f_ini, f_fin = hoy - timedelta(days=7), hoy
-elif filtro_tiempo == "Este Mes": f_ini, f_fin = hoy.replace(day=1), hoy
-elif filtro_tiempo == "Mes Anterior":
-    primer = hoy.replace(day=1)
-    f_fin = primer - timedelta(days=1)
-    f_ini = f_fin.replace(day=1)
-elif filtro_tiempo == "Últimos 30 días": f_ini, f_fin = hoy - timedelta(days=30), hoy
+hoy = periodos.hoy()
+
+if filtro_tiempo != "Personalizado":
+    f_ini, f_fin = periodos.resolver(filtro_tiempo, hoy)
 else:
     c1, c2 = st.sidebar.columns(2)
     f_ini = c1.date_input("Inicio", hoy)
     f_fin = c2.date_input("Fin", hoy)
 
-closers = ["Todos"] + sorted(list(df_ventas['Closer'].unique())) if not df_ventas.empty else ["Todos"]
+closers = ["Todos"] + sorted(cubo.closers)
 closer_sel = st.sidebar.selectbox("👤 Closer", closers)
 
 st.sidebar.info(f"{f_ini} al {f_fin}")
 
 def filtrar_fecha(df):
-    if df.empty: return df
-    ts_ini = pd.Timestamp(f_ini)
-    ts_fin = pd.Timestamp(f_fin)
-    mask = (df['Fecha'].dt.normalize() >= ts_ini) & (df['Fecha'].dt.normalize() <= ts_fin)
-    return df.loc[mask]
+    return periodos.rango(df, f_ini, f_fin)  # Tablas ordenadas por fecha: búsqueda binaria + slice
 
 df_b_f = filtrar_fecha(df_budget)
 df_la_f = filtrar_fecha(df_leads_all)
 df_lq_f = filtrar_fecha(df_leads_qual)
-df_v_f = filtrar_fecha(df_ventas)
+with perf.etapa("kpis: corte"):
+    corte = cubo.corte(f_ini, f_fin, closer_sel)  # Ventas: corte del cubo diario
 
+# Filas crudas solo para Campañas (el origen no es una dimensión del cubo)
+df_v_f = filtrar_fecha(df_ventas)
 if closer_sel != "Todos" and not df_v_f.empty:
     df_v_f = df_v_f[df_v_f['Closer'] == closer_sel]
 
 # --- 6. KPI ENGINE ---
-facturacion = df_v_f['Monto ($)'].sum()
+facturacion = corte.suma('Monto')
 gasto_ads = df_b_f['Gasto'].sum() if closer_sel == "Todos" else 0 
 profit = facturacion - gasto_ads
 roas = facturacion / gasto_ads if gasto_ads > 0 else 0
@@ -215,9 +150,9 @@ clics = df_b_f['Clics'].sum() if closer_sel == "Todos" else 0
 visitas = df_b_f['Visitas'].sum() if closer_sel == "Todos" else 0
 leads_total = len(df_la_f)
 leads_qual = len(df_lq_f) 
-agendas = len(df_v_f) 
-shows = df_v_f['Asistio'].sum()
-ventas = len(df_v_f[df_v_f['Estado_Simple'] == "✅ Venta"])
+agendas = int(corte.suma('Filas'))
+shows = int(corte.suma('Asistio'))
+ventas = corte.filas_estado("✅ Venta")
 
 st.sidebar.markdown("---")
 with st.sidebar.expander("🎯 Ajustar Metas"):
@@ -241,10 +176,10 @@ st.divider()
 tab1, tab2, tab3, tab4, tab5 = st.tabs(["👔 Visión CEO", "🌪️ Embudo y Tráfico", "📞 Performance Closer", "📢 Campañas", "🧮 Matemática Éxito"])
 
 # === TAB 1: VISIÓN CEO ===
-with tab1:
+with tab1, perf.etapa("tab: visión CEO"):
     st.subheader("📊 Resumen Ejecutivo")
     c_proj1, c_proj2, c_proj3 = st.columns(3)
-    dias_restantes_mes = 30 - datetime.now().day if datetime.now().day < 30 else 0
+    dias_restantes_mes = 30 - hoy.day if hoy.day < 30 else 0
     with c_proj1:
         st.write(f"**Progreso Meta (${m_fact:,.0f})**")
         st.progress(min(facturacion / m_fact, 1.0))
@@ -267,12 +202,12 @@ with tab1:
     k4.metric("Calidad Leads", f"{(leads_qual / leads_total * 100) if leads_total > 0 else 0:.1f}%")
 
     st.markdown("### 📈 Actividad Diaria")
-    if not df_v_f.empty or not df_la_f.empty:
+    if not corte.vacio or not df_la_f.empty:
         daily = pd.DataFrame(index=pd.date_range(f_ini, f_fin))
         daily.index.name = 'Fecha'
         
-        d_ventas = df_v_f.groupby('Fecha')['Monto ($)'].sum()
-        d_count_ventas = df_v_f[df_v_f['Estado_Simple']=="✅ Venta"].groupby('Fecha').size()
+        d_ventas = corte.por_dia()['Monto']
+        d_count_ventas = corte.por_dia(estado="✅ Venta")['Filas']
         d_leads = df_la_f.groupby('Fecha').size()
         d_qual = df_lq_f.groupby('Fecha').size() if not df_lq_f.empty else pd.Series()
         
@@ -289,7 +224,7 @@ with tab1:
         st.plotly_chart(fig_ecg, use_container_width=True)
 
 # === TAB 2: EMBUDO Y TRÁFICO ===
-with tab2:
+with tab2, perf.etapa("tab: embudo y tráfico"):
     st.subheader("🌪️ The Funnel Machine")
     col_fun, col_stats = st.columns([2, 1])
     
@@ -322,17 +257,11 @@ with tab2:
         st.plotly_chart(fig_trend, use_container_width=True)
 
 # === TAB 3: PERFORMANCE CLOSER ===
-with tab3:
+with tab3, perf.etapa("tab: performance closer"):
     st.subheader("🏆 Leaderboard de Ventas")
-    if not df_v_f.empty:
-        rank = df_v_f.groupby('Closer').apply(
-            lambda x: pd.Series({
-                'Facturado': x['Monto ($)'].sum(),
-                'Ventas': len(x[x['Estado_Simple'] == "✅ Venta"]),
-                'Agendas': len(x),
-                'Shows': x['Asistio'].sum()
-            })
-        ).reset_index()
+    if not corte.vacio:
+        rank = corte.por_closer(('Facturado', 'Ventas', 'Leads', 'Asistio'))
+        rank = rank.rename(columns={'Leads': 'Agendas', 'Asistio': 'Shows'})
         rank['Show Rate'] = (rank['Shows'] / rank['Agendas']).fillna(0)
         rank['Close Rate'] = (rank['Ventas'] / rank['Shows']).fillna(0)
         rank = rank.sort_values('Facturado', ascending=False)
@@ -347,7 +276,7 @@ with tab3:
         st.warning("No hay datos de ventas.")
 
 # === TAB 4: CAMPAÑAS ===
-with tab4:
+with tab4, perf.etapa("tab: campañas"):
     st.subheader("📢 Rendimiento por Origen")
     if not df_v_f.empty:
         c1, c2 = st.columns([2, 1])
@@ -363,7 +292,7 @@ with tab4:
         st.info("No hay datos de campañas.")
 
 # === TAB 5: MATEMÁTICA DEL ÉXITO ===
-with tab5:
+with tab5, perf.etapa("tab: matemática éxito"):
     st.subheader("🧮 La Calculadora de Metas")
     restante = max(m_fact - facturacion, 0)
     col_math1, col_math2 = st.columns([1, 2])
@@ -372,7 +301,7 @@ with tab5:
         st.metric("Actual", f"${facturacion:,.0f}")
         st.metric("Faltante", f"${restante:,.0f}")
     with col_math2:
-        run_rate = (facturacion / datetime.now().day) * 30
+        run_rate = (facturacion / hoy.day) * 30
         sc1, sc2, sc3 = st.columns(3)
         sc1.metric("🔴 Pesimista", f"${run_rate*0.85:,.0f}")
         sc2.metric("🟡 Realista", f"${run_rate:,.0f}")
@@ -381,3 +310,5 @@ with tab5:
         st.markdown("### 📉 Control de Presupuesto Ads")
         st.progress(min(gasto_ads/m_ads, 1.0))
         st.caption(f"Gastado: ${gasto_ads:,.0f} / ${m_ads:,.0f}")
+
+perf.panel()
@@ -0,0 +1,393 @@
+import functools
+import hashlib
+import os
+import threading
+from datetime import datetime
+import numpy as np
+import streamlit as st
+import pandas as pd
+import almacen
+import kpis
+import origenes
+import perf
+from limpieza import compactar, unir_bloques
+from refresco import Refrescador
+
+# --- CAPA COMPARTIDA DE INGESTA ---
+# Todas las páginas (app, cn2, dash_pro_cn, finanzas, journey, launch_vdp) leen las
+# hojas desde aquí. Un refrescador por proceso descarga y parsea cada hoja UNA sola
+# vez por ciclo (con su propia cadencia) y la sirve a todas las páginas y sesiones.
+
+TTL_FUENTES = 300  # segundos (caché de las limpiezas de cada página)
+
+FUENTES = {
+    # Resultados de Closers (GHL)
+    "ventas": "https://docs.google.com/spreadsheets/d/e/2PACX-1vQuXaPCen61slzpr1TElxXoCROIxAgmgWT7pyWvel1dxq_Z_U1yZPrVrTbJfx9MwaL8_cluY3v2ywoB/pub?gid=0&single=true&output=csv",
+    # Budget Diciembre (Formato Viejo)
+    "budget_dic": "https://docs.google.com/spreadsheets/d/e/2PACX-1vQGOLgPTDLie5gEbkViCbpebWfN9S_eb2h2GGlpWLjmfVgzfnwR_ncVTs4IqmKgmAFfxZTQHJlMBrIi/pub?gid=0&single=true&output=csv",
+    # Budget 2026 (Formato Nuevo)
+    "budget_2026": "https://docs.google.com/spreadsheets/d/e/2PACX-1vTQKTt_taqoH2qNwWbs3t4doLsi0SuGavgdUNvpCKrqtlp5U9GaTqkTt9q-c1eWBnvPN88Qg5t0vXzK/pub?gid=692917105&single=true&output=csv",
+    # Leads Totales (Volumen)
+    "leads_all": "https://docs.google.com/spreadsheets/d/e/2PACX-1vTjCMjoi7DXiCeBRQdzAQZlx_L6SfpmbLlqmeRgZDHmCEdmN5_grVD_Yqa-5tzNprDS02o98ms80j1x/pub?gid=0&single=true&output=csv",
+    # Leads Calificados
+    "leads_qual": "https://docs.google.com/spreadsheets/d/e/2PACX-1vTjCMjoi7DXiCeBRQdzAQZlx_L6SfpmbLlqmeRgZDHmCEdmN5_grVD_Yqa-5tzNprDS02o98ms80j1x/pub?gid=1272057128&single=true&output=csv",
+    # Lanzamiento VDP
+    "vdp": "https://docs.google.com/spreadsheets/d/e/2PACX-1vR726VKYI1xIW9q5U50lN2iqY58-SIyN9gusKo_t8h2-HkTa7zERkSrQ6F4OUnTB2AWEh4CSvfwdZRL/pub?gid=0&single=true&output=csv",
+}
+
+# Cadencia de refresco en segundo plano por fuente (segundos)
+CADENCIAS = {
+    "ventas": 120,
+    "budget_dic": 3600,   # Histórico: casi no cambia
+    "budget_2026": 600,
+    "leads_all": 300,
+    "leads_qual": 300,
+    "vdp": 300,
+}
+
+# Timeout por fuente: (conexión, lectura) en segundos
+TIMEOUT_DESCARGA = (5, 30)
+TIMEOUTS = {
+    "leads_all": (5, 60),  # La hoja más pesada
+}
+
+refrescador = Refrescador()
+
+# Origen de cada fuente: las URLs de arriba, o lo que indiquen CN_SERVIDOR_FUENTES,
+# CN_DIR_FUENTES o CN_FUENTES (CSV local, Parquet, SQLite; ver origenes.py)
+ORIGENES = origenes.desde_entorno(FUENTES, TIMEOUTS, TIMEOUT_DESCARGA)
+
+# --- DESCARGA CONDICIONAL ---
+# Por fuente guardamos los validadores del origen (ETag / Last-Modified en HTTP,
+# mtime y tamaño en archivos locales), la huella del contenido y el DataFrame
+# parseado. Si el origen no cambió, o trae la misma huella (Google no siempre manda
+# validadores), se reutiliza el DataFrame anterior sin parsear. La huella viaja en
+# df.attrs['huella'] y cargar_incremental la usa para saltarse también la limpieza.
+
+_descargas = {}
+
+def _descargar(nombre, como_texto=False):
+    clave = _clave(nombre, como_texto)
+    origen = ORIGENES[nombre]
+    previo = _descargas.get(clave) or almacen.cargar(f"fuente_{clave.replace(':', '_')}")
+    if previo and previo.get('origen') != origen.descripcion:
+        previo = None  # Cambió el origen configurado: sus validadores no sirven
+
+    with perf.etapa(f"{clave}: descarga ({origen.tipo})") as medida:
+        registro = origen.leer(previo, como_texto)
+        medida['Filas'] = len(registro['df'])
+    _descargas[clave] = registro
+    if not previo or any(previo[k] != registro[k] for k in ('etag', 'modificado', 'huella')):
+        try: almacen.guardar(f"fuente_{clave.replace(':', '_')}", registro)
+        except OSError: pass  # Sin disco escribible solo se pierde la caché entre reinicios
+    return registro['df']
+
+def _clave(nombre, como_texto=False):
+    return f"{nombre}:texto" if como_texto else nombre
+
+def _registrar(nombre, como_texto=False):
+    clave = _clave(nombre, como_texto)
+    refrescador.registrar(clave, functools.partial(_descargar, nombre, como_texto), CADENCIAS.get(nombre, TTL_FUENTES))
+    return clave
+
+def precargar(*nombres):
+    """Descarga en paralelo las fuentes que un cargador va a leer.
+
+    Un fallo no corta a las demás: queda guardado y se levanta cuando la página
+    lee esa fuente, así solo se degrada su sección.
+    """
+    refrescador.precargar([_registrar(nombre) for nombre in nombres if not por_bloques(nombre)])
+
+def leer_fuente(nombre, como_texto=False):
+    """Última versión parseada de la hoja `nombre` (copia propia para el llamador).
+
+    La descarga la hace el refrescador en segundo plano; solo la primera lectura
+    del proceso espera a la red.
+    """
+    return refrescador.obtener(_registrar(nombre, como_texto)).copy()
+
+def leer_una_vez(nombre, como_texto=False):
+    """Lectura puntual del origen de `nombre`, sin registrarlo en el refrescador.
+
+    Para hojas que se consultan de vez en cuando (p. ej. lanzamientos archivados):
+    no quedan en memoria ni se vuelven a descargar en segundo plano.
+    """
+    return ORIGENES[nombre].leer(None, como_texto)['df']
+
+def refrescar_fuentes():
+    """Botón "Actualizar": vuelve a descargar ya todas las fuentes registradas."""
+    refrescador.refrescar()
+
+def panel_fuentes():
+    """Panel del sidebar con la frescura y el origen de cada fuente."""
+    with st.sidebar.expander("🛰️ Estado de las fuentes"):
+        estado = pd.DataFrame(refrescador.estado())
+        if not estado.empty:
+            estado['Origen'] = estado['Fuente'].str.split(':').str[0].map(lambda n: ORIGENES[n].tipo)
+        st.dataframe(estado, hide_index=True, use_container_width=True)
+        if _errores_fondo:
+            st.caption("⚠️ Última revalidación en segundo plano con problemas")
+            st.dataframe(pd.DataFrame(list(_errores_fondo.values())), hide_index=True, use_container_width=True)
+
+# --- SINCRONIZACIÓN INCREMENTAL ---
+# Las hojas solo crecen agregando filas al final. Guardamos la historia ya limpia
+# junto con una huella (hash) por fila cruda: en cada refresco solo se limpia la
+# cola nueva (o desde la primera fila que haya cambiado).
+# Google Sheets publicado no permite pedir solo la cola, así que la descarga sigue
+# siendo completa; lo que se ahorra es toda la limpieza de la historia.
+
+VERSION_ALMACEN = 1  # Subir si cambia la limpieza compartida (limpieza.py) para invalidar la historia
+
+def huellas_filas(df):
+    """Hash estable (uint64) por fila cruda, independiente del índice."""
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+def _version_limpieza(limpiar):
+    """Huella del código de `limpiar` (y sus funciones internas): si cambia, se limpia todo de nuevo."""
+    h = hashlib.md5(str(VERSION_ALMACEN).encode())
+    pendientes = [limpiar.__code__]
+    while pendientes:
+        codigo = pendientes.pop()
+        h.update(codigo.co_code)
+        for const in codigo.co_consts:
+            if hasattr(const, 'co_code'): pendientes.append(const)
+            elif isinstance(const, frozenset): h.update(repr(sorted(map(repr, const))).encode())
+            else: h.update(repr(const).encode())
+    return h.hexdigest()
+
+def cargar_incremental(clave, crudo, limpiar, categorias=()):
+    """Limpia solo las filas nuevas de `crudo` y las une a la historia guardada en `clave`.
+
+    `limpiar` debe procesar fila a fila (puede descartar filas) y conservar el índice
+    original, que es la posición de la fila en la hoja. Si `crudo` trae la misma
+    huella de descarga que la última vez (df.attrs['huella']), no se toca nada.
+    Lo limpio se compacta (limpieza.compactar) con `categorias` como category.
+    """
+    version = (_version_limpieza(limpiar), tuple(categorias))
+    previo = almacen.cargar(clave)
+    huella_descarga = crudo.attrs.get('huella')
+    if huella_descarga and previo and previo['version'] == version and previo.get('huella_descarga') == huella_descarga:
+        return previo['limpio']  # Misma descarga: ni huellas por fila ni limpieza
+
+    huellas = huellas_filas(crudo)
+
+    desde = 0
+    if previo and previo['version'] == version and previo['columnas'] == list(crudo.columns):
+        vistas = previo['huellas']
+        comunes = min(len(vistas), len(huellas))
+        distintas = np.flatnonzero(vistas[:comunes] != huellas[:comunes])
+        desde = int(distintas[0]) if len(distintas) else comunes
+        if desde == len(huellas) == len(vistas) and previo.get('huella_descarga') == huella_descarga:
+            return previo['limpio']  # Nada nuevo
+
+    with perf.etapa(f"{clave}: limpiar", len(crudo) - desde):
+        if desde:
+            historia = previo['limpio']
+            limpio = historia[historia.index < desde]
+            if desde < len(crudo):
+                limpio = unir_bloques([limpio, compactar(limpiar(crudo.iloc[desde:].copy()), categorias)])
+        else:
+            limpio = compactar(limpiar(crudo), categorias)
+
+    almacen.guardar(clave, {
+        'version': version,
+        'columnas': list(crudo.columns),
+        'huellas': huellas,
+        'huella_descarga': huella_descarga,
+        'limpio': limpio,
+    })
+    return limpio
+
+# --- INGESTA POR BLOQUES ---
+# Para las hojas que crecen sin límite (años de leads y ventas) la descarga entera
+# más sus copias intermedias ocupa varias veces el CSV. Con CN_BLOQUE_FILAS=50000
+# esas hojas se leen del origen de a bloques: cada bloque se hashea, se compara con
+# la historia, y solo si es nuevo se limpia y se compacta. Nunca hay más de un
+# bloque crudo en memoria; lo que queda es la historia limpia con tipos compactos.
+# No pasan por el refrescador: si el origen no cambió (ETag, mtime) no se lee nada.
+
+BLOQUE_FILAS = int(os.environ.get("CN_BLOQUE_FILAS", "0"))
+FUENTES_GRANDES = ("ventas", "leads_all", "leads_qual")
+
+def por_bloques(nombre):
+    return BLOQUE_FILAS > 0 and nombre in FUENTES_GRANDES
+
+def cargar_por_bloques(clave, nombre, limpiar, categorias=(), contar=None):
+    """Como cargar_incremental, pero leyendo el origen de `nombre` de a BLOQUE_FILAS filas.
+
+    Devuelve (limpio, conteo): `conteo` es cuántas filas crudas de toda la hoja marca
+    la máscara `contar` (p. ej. filas_desplazadas), o None si no se pidió.
+    """
+    origen = ORIGENES[nombre]
+    version = (_version_limpieza(limpiar), tuple(categorias))
+    previo = almacen.cargar(clave)
+    if not previo or previo['version'] != version or previo.get('origen') != origen.descripcion:
+        previo = None
+    validador, bloques = origen.abrir_bloques(BLOQUE_FILAS, previo and previo.get('validador'))
+    if bloques is None:
+        return previo['limpio'], previo['conteo']  # El origen no cambió: ni lectura ni limpieza
+
+    vistas = previo['huellas'] if previo else np.empty(0, dtype=np.uint64)
+    huellas, nuevos, columnas, conteo, desde = [], [], [], 0 if contar else None, None
+    with perf.etapa(f"{clave}: bloques") as medida:
+        for bloque in bloques:
+            if not huellas:
+                columnas = list(bloque.columns)
+                if previo and previo['columnas'] != columnas:
+                    vistas = vistas[:0]  # Cambiaron las columnas: se limpia todo de nuevo
+            huellas.append(huellas_filas(bloque))
+            if contar:
+                conteo += int(contar(bloque).sum())
+            if desde is None:
+                inicio = int(bloque.index[0])
+                comunes = vistas[inicio:inicio + len(bloque)]
+                distintas = np.flatnonzero(comunes != huellas[-1][:len(comunes)])
+                if not len(distintas) and len(comunes) == len(bloque):
+                    continue  # Bloque ya limpio en la historia
+                desde = inicio + (int(distintas[0]) if len(distintas) else len(comunes))
+                bloque = bloque.loc[desde:]
+            nuevos.append(compactar(limpiar(bloque), categorias))
+        medida['Filas'] = sum(map(len, huellas))
+
+    huellas = np.concatenate(huellas) if huellas else vistas[:0]
+    if desde is None:
+        desde = len(huellas)  # Nada nuevo (o la hoja perdió filas del final)
+    historia = previo['limpio'] if previo else pd.DataFrame()
+    limpio = unir_bloques([historia[historia.index < desde], *nuevos])
+
+    almacen.guardar(clave, {
+        'version': version,
+        'columnas': columnas,
+        'huellas': huellas,
+        'huella_descarga': None,
+        'limpio': limpio,
+        'origen': origen.descripcion,
+        'validador': validador,
+        'conteo': conteo,
+    })
+    return limpio, conteo
+
+def cargar_fuente(clave, nombre, limpiar, categorias=(), contar=None):
+    """Hoja `nombre` limpia (historia incremental en `clave`), entera o por bloques según la fuente.
+
+    Con `contar` (máscara por fila cruda) devuelve (limpio, filas marcadas); sin él, solo limpio.
+    """
+    if por_bloques(nombre):
+        limpio, conteo = cargar_por_bloques(clave, nombre, limpiar, categorias, contar)
+    else:
+        crudo = leer_fuente(nombre)
+        conteo = int(contar(crudo).sum()) if contar else None
+        limpio = cargar_incremental(clave, crudo, limpiar, categorias)
+    return (limpio, conteo) if contar else limpio
+
+# --- ARRANQUE RÁPIDO DESDE SNAPSHOT ---
+# Tras cada carga exitosa el resultado se guarda como snapshot columnar local.
+# En frío (primera visita del proceso) se sirve ese snapshot al instante y la carga
+# real corre en segundo plano; cuando termina, las siguientes visitas ya usan la caché.
+
+_calentamientos = {}
+_lock_calentamientos = threading.Lock()
+_versiones_snapshot = {}  # clave -> huella del código del cargador (si cambia, el snapshot no sirve)
+
+def _carga_exitosa(resultado):
+    piezas = resultado if isinstance(resultado, tuple) else (resultado,)
+    return all(not valor.empty for valor in piezas if isinstance(valor, pd.DataFrame))
+
+def _clave_snapshot(clave, args):
+    """Un snapshot por combinación de argumentos del cargador (p. ej. uno por lanzamiento)."""
+    return "_".join([clave, *map(str, args)])
+
+def con_snapshot(clave):
+    """Decorador para cargadores: guarda el resultado como snapshot si ninguna tabla vino vacía."""
+    def decorador(cargar):
+        version = _versiones_snapshot[clave] = _version_limpieza(cargar)
+
+        @functools.wraps(cargar)
+        def envoltura(*args):
+            with perf.etapa(f"{_clave_snapshot(clave, args)}: cargar_datos"):
+                resultado = cargar(*args)
+            if _carga_exitosa(resultado):
+                try: almacen.guardar_snapshot(_clave_snapshot(clave, args), resultado, version)
+                except OSError: pass  # Sin disco escribible seguimos sin snapshot
+            return resultado
+        return envoltura
+    return decorador
+
+# Los cargadores avisan con avisar() y no con st.error: en el calentamiento corren en
+# un hilo sin ScriptRunContext, donde st.* no muestra nada. Ahí los avisos (y las
+# excepciones o tablas vacías) quedan como último problema de esa carga, que
+# panel_fuentes muestra; una revalidación sin problemas lo borra.
+_fondo = threading.local()
+_errores_fondo = {}  # clave de snapshot -> {'Carga', 'Hora', 'Problema'}
+
+def avisar(mensaje, mostrar=st.error):
+    """Muestra `mensaje` con `mostrar` en la sesión; en segundo plano lo registra para panel_fuentes."""
+    avisos = getattr(_fondo, 'avisos', None)
+    if avisos is None:
+        mostrar(mensaje)
+    else:
+        avisos.append(mensaje)
+
+def _calentar(clave, cargar):
+    _fondo.avisos = avisos = []
+    try:
+        if not _carga_exitosa(cargar()):
+            avisos.append("Carga incompleta: alguna tabla vino vacía")
+    except Exception as e:  # La visita siguiente reintenta en primer plano
+        avisos.append(f"{type(e).__name__}: {e}")
+    finally:
+        del _fondo.avisos
+    if avisos:
+        _errores_fondo[clave] = {'Carga': clave, 'Hora': datetime.now().strftime("%H:%M:%S"), 'Problema': " · ".join(avisos)}
+    else:
+        _errores_fondo.pop(clave, None)
+
+def arranque_rapido(clave, cargar, *args):
+    """Ejecuta `cargar(*args)` sin bloquear el arranque en frío si existe un snapshot local."""
+    version = _versiones_snapshot.get(clave)
+    clave = _clave_snapshot(clave, args)
+    cargar = functools.partial(cargar, *args)
+    with _lock_calentamientos:
+        hilo = _calentamientos.get(clave)
+        if clave not in _calentamientos:
+            snapshot = almacen.leer_snapshot(clave, version)
+            if snapshot is None:
+                _calentamientos[clave] = None  # Sin snapshot: la primera carga va en primer plano
+            else:
+                hilo = threading.Thread(target=_calentar, args=(clave, cargar), name=f"calentar_{clave}", daemon=True)
+                _calentamientos[clave] = hilo
+                hilo.start()
+                return snapshot
+
+    if hilo is not None and hilo.is_alive():
+        snapshot = almacen.leer_snapshot(clave, version)
+        if snapshot is not None:
+            return snapshot
+    return cargar()
+
+# --- ESTRUCTURAS DERIVADAS POR CONTENIDO ---
+# Cubos e índices se construyen por contenido, no por refresco: los cargadores
+# devuelven la huella de lo que cargaron y si la hoja no cambió entre refrescos se
+# reutiliza lo ya construido. El cubo de ventas es uno solo para todas las páginas
+# y sesiones que tengan las mismas ventas.
+
+def huella(*tablas, columnas=None):
+    """Huella (md5) del contenido de `tablas`; con `columnas`, solo de las que existan."""
+    h = hashlib.md5()
+    for df in tablas:
+        if columnas is not None:
+            df = df[[c for c in columnas if c in df.columns]]
+        with perf.etapa("huella de contenido", len(df)):
+            h.update(repr(list(df.columns)).encode())
+            h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+def huella_cubo(ventas):
+    """Huella de las columnas de ventas que usa el cubo diario (clave de cubo_ventas)."""
+    return huella(ventas, columnas=kpis.COLUMNAS_CUBO)
+
+@st.cache_resource(max_entries=4)
+def cubo_ventas(huella_ventas, _ventas):
+    """Cubo diario (día, closer, estado) compartido entre páginas y sesiones, uno por contenido de ventas."""
+    with perf.etapa("kpis: cubo diario", len(_ventas)):
+        return kpis.CuboDiario(_ventas)
@@ -4,9 +4,14 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import extra_streamlit_components as stx # <--- LIBRERÍA NECESARIA
+import datos
+import perf
+import periodos
+from limpieza import clasificar_resultados, parsear_numeros, REGLAS_ESTADO, CATEGORIAS_VENTAS
 
 # --- 1. CONFIGURACIÓN DE PÁGINA ---
 st.set_page_config(page_title="CFO Dashboard | Creamos Negocios", page_icon="💼", layout="wide")
+perf.corrida()
 
 # --- 2. ESTILOS CSS PERSONALIZADOS ---
 st.markdown("""
@@ -74,62 +79,48 @@ if not pantalla_bienvenida():
 # --- 4. CARGA DE DATOS ---
 st.title("💼 Dashboard Financiero & Rentabilidad")
 
-@st.cache_data(ttl=300) 
-def cargar_datos():
-    # URLS
-    url_ventas = "https://docs.google.com/spreadsheets/d/e/2PACX-1vQuXaPCen61slzpr1TElxXoCROIxAgmgWT7pyWvel1dxq_Z_U1yZPrVrTbJfx9MwaL8_cluY3v2ywoB/pub?gid=0&single=true&output=csv"
-    url_gastos_dic = "https://docs.google.com/spreadsheets/d/e/2PACX-1vQGOLgPTDLie5gEbkViCbpebWfN9S_eb2h2GGlpWLjmfVgzfnwR_ncVTs4IqmKgmAFfxZTQHJlMBrIi/pub?gid=0&single=true&output=csv"
-    url_gastos_anual = "https://docs.google.com/spreadsheets/d/e/2PACX-1vTQKTt_taqoH2qNwWbs3t4doLsi0SuGavgdUNvpCKrqtlp5U9GaTqkTt9q-c1eWBnvPN88Qg5t0vXzK/pub?gid=692917105&single=true&output=csv"
+def limpiar_ventas(df_v):
+    """Limpieza fila a fila de Ventas (apta para sincronización incremental)."""
+    df_v['Fecha'] = pd.to_datetime(df_v['Fecha'], dayfirst=True, errors='coerce')
+    df_v['Monto ($)'] = parsear_numeros(df_v['Monto ($)'])[0]
+    df_v['Resultado'] = df_v['Resultado'].fillna("Pendiente")
     
-    # Procesar Ventas
+    # Sin regla de Re-Agendado: cae en "Otro/Pendiente"
+    clasificacion = clasificar_resultados(df_v['Resultado'], reglas=REGLAS_ESTADO[:4])
+    df_v['Estado_Simple'] = clasificacion['Estado_Simple']
+    df_v['Es_Asistencia'] = clasificacion['Es_Asistencia']
+    return df_v
+
+@st.cache_data(ttl=datos.TTL_FUENTES)
+@datos.con_snapshot("finanzas")
+def cargar_datos():
+    datos.precargar("ventas", "budget_dic", "budget_2026")  # Descarga en paralelo
+    # Procesar Ventas (solo filas nuevas; la historia viene del almacén local)
     try:
-        df_v = pd.read_csv(url_ventas)
-        df_v['Fecha'] = pd.to_datetime(df_v['Fecha'], dayfirst=True, errors='coerce')
-        if df_v['Monto ($)'].dtype == 'O': 
-            df_v['Monto ($)'] = df_v['Monto ($)'].astype(str).str.replace(r'[$,]', '', regex=True)
-        df_v['Monto ($)'] = pd.to_numeric(df_v['Monto ($)'], errors='coerce').fillna(0)
-        df_v['Resultado'] = df_v['Resultado'].fillna("Pendiente")
-        
-        def clasificar_estado(texto):
-            texto = str(texto).lower()
-            if "venta" in texto: return "✅ Venta"
-            if "no show" in texto: return "❌ No Show"
-            if "descalificado" in texto: return "🚫 Descalificado"
-            if "seguimiento" in texto: return "👀 Seguimiento"
-            return "Otro/Pendiente"
-        df_v['Estado_Simple'] = df_v['Resultado'].apply(clasificar_estado)
-
-        def es_asistencia_valida(row):
-            res = str(row['Resultado']).lower()
-            if "venta" in res or "seguimiento" in res or "descalificado" in res: return True
-            if "asistió" in res and "no show" not in res: return True
-            return False
-        df_v['Es_Asistencia'] = df_v.apply(es_asistencia_valida, axis=1)
+        df_v = datos.cargar_fuente("finanzas_ventas", "ventas", limpiar_ventas, CATEGORIAS_VENTAS)
     except:
         df_v = pd.DataFrame()
 
     # Procesar Gastos
     try:
-        df_g1 = pd.read_csv(url_gastos_dic)
+        df_g1 = datos.leer_fuente("budget_dic")
         df_g1['Fecha'] = pd.to_datetime(df_g1['Fecha'], dayfirst=True, errors='coerce')
-        if df_g1['Gasto'].dtype == 'O': df_g1['Gasto'] = df_g1['Gasto'].astype(str).str.replace(r'[$,]', '', regex=True)
-        df_g1['Gasto'] = pd.to_numeric(df_g1['Gasto'], errors='coerce').fillna(0)
+        df_g1['Gasto'] = parsear_numeros(df_g1['Gasto'])[0]
         if {'Fecha', 'Gasto'}.issubset(df_g1.columns): df_g1 = df_g1[['Fecha', 'Gasto']]
         
-        df_g2 = pd.read_csv(url_gastos_anual)
+        df_g2 = datos.leer_fuente("budget_2026")
         df_g2 = df_g2.iloc[:, 0:2]
         df_g2.columns = ['Fecha', 'Gasto'] 
         df_g2['Fecha'] = pd.to_datetime(df_g2['Fecha'], errors='coerce')
-        if df_g2['Gasto'].dtype == 'O': df_g2['Gasto'] = df_g2['Gasto'].astype(str).str.replace(r'[$,]', '', regex=True)
-        df_g2['Gasto'] = pd.to_numeric(df_g2['Gasto'], errors='coerce').fillna(0)
+        df_g2['Gasto'] = parsear_numeros(df_g2['Gasto'])[0]
 
-        df_g = pd.concat([df_g1, df_g2], ignore_index=True).sort_values('Fecha')
+        df_g = periodos.ordenar_por_fecha(pd.concat([df_g1, df_g2], ignore_index=True))
     except:
         df_g = pd.DataFrame(columns=['Fecha', 'Gasto'])
 
-    return df_v, df_g
+    return periodos.ordenar_por_fecha(df_v), df_g
 
-df_ventas, df_gastos = cargar_datos()
+df_ventas, df_gastos = datos.arranque_rapido("finanzas", cargar_datos) # Snapshot local en frío
 
 if df_ventas.empty:
     st.error("❌ Error de conexión con los datos.")
@@ -137,6 +128,7 @@ if df_ventas.empty:
 
 # --- 5. SIDEBAR FINANCIERA ---
 st.sidebar.header("⚙️ Configuración")
+datos.panel_fuentes()
 
 # Filtros de Tiempo
 filtro_tiempo = st.sidebar.selectbox(
@@ -151,33 +143,15 @@ presupuesto_ads = st.sidebar.number_input("Presupuesto Ads ($)", value=5000.0, s
 pct_operativo = st.sidebar.slider("% Gastos Operativos (Agencia)", 0, 100, 40, help="Porcentaje de la facturación destinado a equipo, herramientas y gastos fijos.")
 
 # Lógica de Fechas
-hoy = pd.to_datetime("today").date()
-
-if filtro_tiempo == "Este Mes":
-    f_inicio, f_fin = hoy.replace(day=1), hoy
-elif filtro_tiempo == "Mes Anterior":
-    primer = hoy.replace(day=1)
-    f_fin = primer - timedelta(days=1)
-    f_inicio = f_fin.replace(day=1)
-elif filtro_tiempo == "Últimos 30 días":
-    f_inicio, f_fin = hoy - timedelta(days=30), hoy
-elif filtro_tiempo == "Este Trimestre":
-    mes_inicio_trimestre = ((hoy.month - 1) // 3) * 3 + 1
-    f_inicio = hoy.replace(month=mes_inicio_trimestre, day=1)
-    f_fin = hoy
-else: # Año Actual
-    f_inicio = hoy.replace(month=1, day=1)
-    f_fin = hoy
+hoy = periodos.hoy()
+f_inicio, f_fin = periodos.resolver(filtro_tiempo, hoy)
 
 st.sidebar.success(f"Analizando: {f_inicio} ➡ {f_fin}")
 st.sidebar.markdown("---")
 
-# Filtrado de DataFrames
-mask_v = (df_ventas['Fecha'].dt.date >= f_inicio) & (df_ventas['Fecha'].dt.date <= f_fin)
-df_v_filtrado = df_ventas.loc[mask_v].copy()
-
-mask_g = (df_gastos['Fecha'].dt.date >= f_inicio) & (df_gastos['Fecha'].dt.date <= f_fin)
-df_g_filtrado = df_gastos.loc[mask_g].copy()
+# Filtrado de DataFrames (tablas ordenadas por fecha: búsqueda binaria + slice, sin copias)
+df_v_filtrado = periodos.rango(df_ventas, f_inicio, f_fin)
+df_g_filtrado = periodos.rango(df_gastos, f_inicio, f_fin)
 
 # --- 6. CÁLCULOS FINANCIEROS AVANZADOS ---
 
@@ -259,7 +233,7 @@ st.markdown("---")
 # SECCIÓN 4: GRÁFICOS (WATERFALL & GAUGE)
 c1, c2 = st.columns([2, 1])
 
-with c1:
+with c1, perf.etapa("gráfico: waterfall"):
     st.subheader("💧 Flujo de Rentabilidad (Waterfall)")
     fig_waterfall = go.Figure(go.Waterfall(
         name = "20", orientation = "v",
@@ -276,7 +250,7 @@ with c1:
     fig_waterfall.update_layout(title="Desglose: Dónde se va el dinero", showlegend=False, height=400)
     st.plotly_chart(fig_waterfall, use_container_width=True)
 
-with c2:
+with c2, perf.etapa("gráfico: velocímetro ROI"):
     st.subheader("🚀 Velocímetro ROI")
     fig_gauge = go.Figure(go.Indicator(
         mode = "gauge+number",
@@ -382,3 +356,5 @@ if leads > 0:
     st.plotly_chart(fig_funnel, use_container_width=True)
 else:
     st.warning("No hay datos de leads para este período.")
+
+perf.panel()
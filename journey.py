@@ -1,10 +1,14 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import numpy as np
+import datos
+import perf
+from limpieza import filas_desplazadas, limpiar_volumen, limpiar_calificados, limpiar_resultados, CATEGORIAS_LEADS, CATEGORIAS_VENTAS
+from leads import IndiceEmails, IndiceBusqueda, RankingLTV, tabla_leads, tabla_journey
 
 # --- 1. CONFIGURACIÓN E IMPORTACIÓN ---
 st.set_page_config(page_title="search lead - CN", page_icon="🕵️", layout="wide")
+perf.corrida()
 
 # Estilos Neón Cyberpunk
 st.markdown("""
@@ -23,133 +27,98 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-# --- 2. FUNCIÓN DE REPARACIÓN (Para la hoja de Closers) ---
-def reparar_desplazamiento(df):
-    """Arregla las columnas desplazadas si GHL manda datos vacíos al inicio."""
-    if df.empty: return df
-    df_fixed = df.copy()
-    col_0 = df_fixed.columns[0]
-    # Detectar si la primera columna está vacía
-    filas_malas_mask = df_fixed[col_0].isna() | (df_fixed[col_0].astype(str).str.strip() == '')
-    
-    if filas_malas_mask.sum() > 0 and len(df_fixed.columns) >= 9:
-        valores = df_fixed.values
-        indices_malos = df_fixed.index[filas_malas_mask]
-        for idx in indices_malos:
-            fila = valores[idx]
-            fila_corregida = np.roll(fila, -8) # Ajuste de 8 columnas a la izquierda
-            fila_corregida[-8:] = np.nan 
-            valores[idx] = fila_corregida
-        df_fixed = pd.DataFrame(valores, columns=df.columns, index=df.index)
-    return df_fixed
-
-# --- 3. CARGA DE DATOS MULTI-FUENTE ---
-@st.cache_data(ttl=600)
+# --- 2. CARGA DE DATOS MULTI-FUENTE ---
+# Las limpiezas de cada hoja viven en limpieza.py (las mismas que mide el benchmark)
+@st.cache_data(ttl=datos.TTL_FUENTES)
+@datos.con_snapshot("journey")
 def cargar_todo():
-    # LINKS PROPORCIONADOS
-    link_volumen = "https://docs.google.com/spreadsheets/d/e/2PACX-1vTjCMjoi7DXiCeBRQdzAQZlx_L6SfpmbLlqmeRgZDHmCEdmN5_grVD_Yqa-5tzNprDS02o98ms80j1x/pub?gid=0&single=true&output=csv"
-    link_calificados = "https://docs.google.com/spreadsheets/d/e/2PACX-1vTjCMjoi7DXiCeBRQdzAQZlx_L6SfpmbLlqmeRgZDHmCEdmN5_grVD_Yqa-5tzNprDS02o98ms80j1x/pub?gid=1272057128&single=true&output=csv"
-    link_resultados = "https://docs.google.com/spreadsheets/d/e/2PACX-1vQuXaPCen61slzpr1TElxXoCROIxAgmgWT7pyWvel1dxq_Z_U1yZPrVrTbJfx9MwaL8_cluY3v2ywoB/pub?gid=0&single=true&output=csv"
-
+    datos.precargar("leads_all", "leads_qual", "ventas")  # Descarga en paralelo
+    # Solo se limpian las filas nuevas de cada hoja; la historia viene del almacén local
     # A) LEADS VOLUMEN
-    try:
-        df_vol = pd.read_csv(link_volumen)
-        # Normalizar Email
-        cols_email_v = [c for c in df_vol.columns if 'email' in c.lower()]
-        if cols_email_v:
-            df_vol.rename(columns={cols_email_v[0]: 'Email'}, inplace=True)
-            df_vol['Email'] = df_vol['Email'].astype(str).str.lower().str.strip()
-        
-        # Buscar fecha de creación
-        cols_date_v = [c for c in df_vol.columns if 'Fecha Creación' in c.lower() or 'fecha' in c.lower()]
-        if cols_date_v:
-            df_vol['Fecha_Ingreso'] = pd.to_datetime(df_vol[cols_date_v[0]], errors='coerce')
+    try: df_vol = datos.cargar_fuente("journey_volumen", "leads_all", limpiar_volumen, CATEGORIAS_LEADS)
     except: df_vol = pd.DataFrame()
 
     # B) LEADS CALIFICADOS
-    try:
-        df_qual = pd.read_csv(link_calificados)
-        cols_email_q = [c for c in df_qual.columns if 'email' in c.lower()]
-        if cols_email_q:
-            df_qual.rename(columns={cols_email_q[0]: 'Email'}, inplace=True)
-            df_qual['Email'] = df_qual['Email'].astype(str).str.lower().str.strip()
-            
-        # Buscar fecha calificación (a veces es Created)
-        cols_date_q = [c for c in df_qual.columns if 'Fecha Creación' in c.lower() or 'fecha' in c.lower()]
-        if cols_date_q:
-            df_qual['Fecha_Calificado'] = pd.to_datetime(df_qual[cols_date_q[0]], errors='coerce')
+    try: df_qual = datos.cargar_fuente("journey_calificados", "leads_qual", limpiar_calificados, CATEGORIAS_LEADS)
     except: df_qual = pd.DataFrame()
 
     # C) RESULTADOS CLOSERS (Con Reparación)
+    filas_reparadas = 0
     try:
-        df_res = pd.read_csv(link_resultados)
-        df_res = reparar_desplazamiento(df_res) # <--- FIX DE COLUMNAS
-        
-        # Normalizar Email
-        cols_email_r = [c for c in df_res.columns if 'email' in c.lower()]
-        if cols_email_r:
-            df_res.rename(columns={cols_email_r[0]: 'Email'}, inplace=True)
-            df_res['Email'] = df_res['Email'].astype(str).str.lower().str.strip()
-        
-        # Fecha Llamada
-        cols_date_r = [c for c in df_res.columns if 'fecha' in c.lower()]
-        if cols_date_r:
-            df_res['Fecha_Llamada'] = pd.to_datetime(df_res[cols_date_r[0]], dayfirst=True, errors='coerce')
-
-        # Monto y Estado
-        if 'Monto ($)' in df_res.columns:
-             if df_res['Monto ($)'].dtype == 'O':
-                df_res['Monto ($)'] = df_res['Monto ($)'].astype(str).str.replace(r'[$,]', '', regex=True)
-             df_res['Monto ($)'] = pd.to_numeric(df_res['Monto ($)'], errors='coerce').fillna(0)
-        
-        if 'Resultado' in df_res.columns:
-            df_res['Resultado'] = df_res['Resultado'].fillna('Pendiente')
-
+        df_res, filas_reparadas = datos.cargar_fuente("journey_resultados", "ventas", limpiar_resultados, CATEGORIAS_VENTAS, contar=filas_desplazadas)
     except: df_res = pd.DataFrame()
 
-    return df_vol, df_qual, df_res
-
-df_vol, df_qual, df_res = cargar_todo()
-
-# --- 4. INTERFAZ PRINCIPAL ---
+    # Huella del contenido: clave de los índices (si las hojas no cambiaron, se reutilizan)
+    return df_vol, df_qual, df_res, filas_reparadas, datos.huella(df_vol, df_qual, df_res)
+
+@st.cache_resource(max_entries=2)
+def indice_emails(huella, _df_res):
+    """Índice email -> llamadas, construido una sola vez por contenido de las hojas y compartido entre sesiones."""
+    with perf.etapa("índice de emails", len(_df_res)):
+        return IndiceEmails({'resultados': _df_res})
+
+@st.cache_resource(max_entries=2)
+def journey_leads(huella, _df_vol, _df_qual, _df_res):
+    """Tabla materializada: una fila por email con ingreso, calificación, llamadas, LTV y atribución."""
+    with perf.etapa("tabla de journey", len(_df_vol) + len(_df_qual) + len(_df_res)):
+        return tabla_journey(_df_vol, _df_qual, _df_res)
+
+@st.cache_resource(max_entries=2)
+def indice_busqueda(huella, _df_vol, _df_res):
+    """Índice de prefijos + trigramas sobre Email, Lead Name y Nombre (uno por contenido de las hojas)."""
+    with perf.etapa("índice de búsqueda", len(_df_vol) + len(_df_res)):
+        return IndiceBusqueda(tabla_leads(_df_vol, _df_res))
+
+df_vol, df_qual, df_res, filas_reparadas, huella = datos.arranque_rapido("journey", cargar_todo) # Snapshot local en frío
+indice = indice_emails(huella, df_res)
+buscador = indice_busqueda(huella, df_vol, df_res)
+journey = journey_leads(huella, df_vol, df_qual, df_res)
+ranking_ltv = RankingLTV(journey)
+
+# --- 3. INTERFAZ PRINCIPAL ---
 st.title("🕵️ DETECTIVE DE LEADS & RANKING")
+datos.panel_fuentes()
+if filas_reparadas:
+    st.caption(f"🛠️ {filas_reparadas} filas desplazadas por GHL reparadas en Resultados")
 
 tab1, tab2 = st.tabs(["🔍 Buscador de Lead", "🏆 Ranking Clientes"])
 
 # === TAB 1: BUSCADOR (TIMELINE) ===
-with tab1:
+with tab1, perf.etapa("tab: buscador de lead"):
     st.markdown("### Historial completo del Lead")
     
     col_search, col_btn = st.columns([4,1])
-    email_input = col_search.text_input("Ingresa el correo del Lead:", placeholder="ejemplo@gmail.com").strip().lower()
-    
+    consulta = col_search.text_input("Ingresa el correo o el nombre del Lead (admite parciales y errores de tipeo):", placeholder="ejemplo@gmail.com").strip()
+
+    # Candidatos rankeados: exacto > prefijo > parecido
+    email_input = consulta.lower()
+    if consulta:
+        candidatos = buscador.buscar(consulta)
+        exacto = not candidatos.empty and candidatos['Email'].iloc[0] == email_input
+        if not candidatos.empty and not exacto:
+            etiquetas = dict(zip(candidatos['Email'], candidatos['Nombre'].fillna('Sin nombre').astype(str).str.title()))
+            email_input = st.selectbox(
+                f"🔎 {len(candidatos)} coincidencias (ordenadas por parecido):",
+                candidatos['Email'].tolist(),
+                format_func=lambda e: f"{etiquetas[e]} · {e}",
+            )
+
     if email_input:
-        # 1. BUSCAR EN VOLUMEN (Origen)
-        lead_vol = df_vol[df_vol['Email'] == email_input]
+        # Búsqueda O(1): resumen en la tabla de journey y llamadas en el índice de Resultados
+        lead_res = indice.buscar(email_input)['resultados']
         
-        # 2. BUSCAR EN CALIFICADOS
-        lead_qual = df_qual[df_qual['Email'] == email_input]
-        
-        # 3. BUSCAR EN RESULTADOS (Agenda/Venta)
-        lead_res = df_res[df_res['Email'] == email_input]
-        
-        if lead_vol.empty and lead_qual.empty and lead_res.empty:
+        if email_input not in journey.index:
             st.warning("❌ No se encontró información para este correo en ninguna hoja.")
         else:
             st.success(f"Resultados encontrados para: **{email_input}**")
 
-            # --- NUEVO: OBTENER NOMBRE DEL LEAD (HEADLINE) ---
+            # Resumen del lead desde la tabla de journey (ya unida por refresco)
+            resumen = journey.loc[email_input]
+
+            # --- NOMBRE DEL LEAD (HEADLINE): Resultados manda, si no Volumen ---
             nombre_lead = "Cliente Desconocido"
-            
-            # Prioridad 1: Sacarlo de la hoja de Resultados (Más fiable)
-            if not lead_res.empty and 'Lead Name' in lead_res.columns:
-                 val = lead_res.iloc[0]['Lead Name']
-                 if val and str(val).lower() != 'nan': nombre_lead = str(val).title()
-            
-            # Prioridad 2: Sacarlo de la hoja de Volumen (Si no llegó a llamada)
-            elif not lead_vol.empty and 'Nombre' in lead_vol.columns:
-                 val = lead_vol.iloc[0]['Nombre']
-                 if val and str(val).lower() != 'nan': nombre_lead = str(val).title()
+            val = resumen.get('Nombre')
+            if pd.notna(val) and str(val).strip() and str(val).lower() != 'nan': nombre_lead = str(val).title()
             
             # MOSTRAR EL HEADLINE NOMBRE
             st.markdown(f"""
@@ -158,12 +127,17 @@ with tab1:
             </h1>
             <hr style="border-color: #0aff00; margin-top: 0px; margin-bottom: 30px; opacity: 0.5;">
             """, unsafe_allow_html=True)
+
+            m1, m2, m3 = st.columns(3)
+            m1.metric("Llamadas", int(resumen.get('Llamadas', 0)))
+            m2.metric("LTV", f"${resumen.get('LTV', 0.0):,.2f}")
+            m3.metric("Último Resultado", str(resumen.get('Ultimo_Resultado')) if pd.notna(resumen.get('Ultimo_Resultado')) else "—")
             
             # --- ETAPA 1: INGRESO (Formulario) ---
             st.markdown("#### 1️⃣ Ingreso (Formulario)")
-            if not lead_vol.empty:
-                data = lead_vol.iloc[0]
-                fecha_in = data.get('Fecha_Ingreso', 'Desconocida')
+            if resumen.get('Registros', 0):
+                data = resumen
+                fecha_in = data.get('Primer_Ingreso', 'Desconocida')
                 
                 # --- AQUÍ ESTÁ EL CAMBIO DE COLUMNAS CORRECTO ---
                 campana = data.get('Campaña (UTM)', 'N/A')
@@ -183,9 +157,8 @@ with tab1:
 
             # --- ETAPA 2: CALIFICACIÓN ---
             st.markdown("#### 2️⃣ Calificación")
-            if not lead_qual.empty:
-                data_q = lead_qual.iloc[0]
-                fecha_q = data_q.get('Fecha_Calificado', 'Sin fecha')
+            if resumen.get('Calificado', False):
+                fecha_q = resumen.get('Fecha_Calificado', 'Sin fecha')
                 st.markdown(f"""
                 <div class="timeline-card success-card">
                     ✅ <b>Lead Calificado:</b> SÍ<br>
@@ -230,38 +203,38 @@ with tab1:
                  st.info("⚠️ El lead aún no ha tenido llamada o no ha sido registrado por un closer.")
 
 # === TAB 2: RANKING ===
-with tab2:
+with tab2, perf.etapa("tab: ranking clientes"):
     st.markdown("### 🏆 Top Clientes (Ranking)")
     
     if not df_res.empty:
-        # Filtrar solo ventas
-        ventas = df_res[df_res['Resultado'].astype(str).str.lower().str.contains("venta")].copy()
-        
-        if not ventas.empty:
-            # Agrupar por Email para sumar montos (LTV - Lifetime Value)
-            ranking = ventas.groupby(['Email', 'Lead Name']).agg({
-                'Monto ($)': 'sum',
-                'Origen Campaña': 'first', # Toma la primera campaña registrada
-                'Nombre del Ad': 'first',
-                'Fecha_Llamada': 'max' # Última fecha de compra
-            }).reset_index()
-            
-            # Ordenar
-            ranking = ranking.sort_values('Monto ($)', ascending=False).reset_index(drop=True)
-            ranking.index = ranking.index + 1 # Empezar ranking en 1
+        # Clientes = leads con al menos una venta; el LTV ya viene sumado en la tabla de journey
+        if len(ranking_ltv):
+            c_tam, c_pag, c_total = st.columns([1, 1, 2])
+            tamano = c_tam.selectbox("Filas por página", [25, 50, 100], index=1)
+            paginas = -(-len(ranking_ltv) // tamano)
+            pagina = c_pag.number_input("Página", min_value=1, max_value=paginas, value=1, step=1)
+            c_total.caption(f"{len(ranking_ltv):,} clientes · página {pagina} de {paginas}")
+
+            # Solo se ordena y se dibuja la página pedida (top-K parcial)
+            ranking = ranking_ltv.pagina(int(pagina), tamano)
+            ranking = ranking[['Email', 'Nombre', 'LTV', 'Origen Campaña', 'Nombre del Ad', 'Ultima_Compra']]
             
-            # Mostrar Tabla Estilizada
+            # Barra nativa en el navegador en vez de Styler (no estiliza celda a celda en Python)
             st.dataframe(
-                ranking.style.format({'Monto ($)': '${:,.2f}'}).background_gradient(subset=['Monto ($)'], cmap='Greens'),
+                ranking,
                 use_container_width=True,
                 column_config={
                     "Email": "Correo",
-                    "Lead Name": "Cliente",
-                    "Monto ($)": "Total Facturado",
-                    "Fecha_Llamada": "Última Compra"
+                    "Nombre": "Cliente",
+                    "LTV": st.column_config.ProgressColumn(
+                        "Total Facturado", format="$%.2f", min_value=0, max_value=ranking_ltv.maximo()
+                    ),
+                    "Ultima_Compra": "Última Compra"
                 }
             )
         else:
             st.warning("Aún no hay ventas registradas en la hoja de resultados.")
     else:
         st.error("No se pudo cargar la hoja de Resultados.")
+
+perf.panel()
@@ -0,0 +1,238 @@
+import os
+import numpy as np
+import pandas as pd
+from limpieza import REGLAS_ESTADO
+
+# --- KPIs COMPARTIDOS ---
+
+ESTADO_VENTA = REGLAS_ESTADO[0][0]  # "✅ Venta"
+
+# --- CUBO DIARIO DE VENTAS ---
+# Se arma una vez por contenido de ventas (datos.cubo_ventas): celdas (día, closer,
+# Estado_Simple) con sus sumas, y una tabla de pares (celda, asistencia, email) sin
+# repetidos para contar emails únicos de forma exacta. Ambas quedan ordenadas por día: cada combinación de
+# período y closer del sidebar es un corte por searchsorted + sumas sobre pocas filas.
+
+MEDIDAS = ('Filas', 'Monto', 'Asistencias', 'Asistio')
+
+# --- RANKING DE CLOSERS ---
+# Una sola pasada de agregación con nombre sobre los closers codificados como enteros
+# (pd.factorize), en vez de un groupby().apply con filtros y nunique por closer.
+# Métrica -> (medida de las celdas, función). Las *_Unicas salen de los pares del cubo.
+METRICAS_CLOSER = {
+    'Facturado': ('Monto', 'sum'),
+    'Leads': ('Filas', 'sum'),          # Filas (agendas)
+    'Shows': ('Asistencias', 'sum'),    # Es_Asistencia
+    'Asistio': ('Asistio', 'sum'),      # Todo lo que no es no show / re-agendado
+    'Ventas': ('Ventas', 'sum'),
+}
+
+def ranking_closers(tabla, closers, metricas=('Facturado', 'Leads', 'Shows', 'Ventas'), unicos=None):
+    """Leaderboard por closer: una fila por closer con la columna 'Closer' y las `metricas` pedidas.
+
+    `tabla` trae 'Closer' como código entero (-1 = vacío, se descarta como en groupby)
+    y las medidas de METRICAS_CLOSER; `closers` traduce código -> nombre. Los emails
+    únicos (Asistencias_Unicas, Ventas_Unicas) llegan ya contados en `unicos`
+    ({métrica: Serie código -> cantidad}).
+    """
+    unicos = unicos or {}
+    tabla = tabla[tabla['Closer'] >= 0]
+    nombradas = {m: METRICAS_CLOSER[m] for m in metricas if m in METRICAS_CLOSER}
+    if nombradas:
+        agregado = tabla.groupby('Closer', sort=False).agg(**nombradas)
+    else:
+        agregado = pd.DataFrame(index=pd.Index(tabla['Closer'].unique()))
+    for metrica, conteo in unicos.items():
+        agregado[metrica] = conteo
+    agregado = agregado[list(metricas)].fillna(0)
+    for metrica in unicos:
+        agregado[metrica] = agregado[metrica].astype(int)
+    agregado.insert(0, 'Closer', np.asarray(closers, dtype=object)[agregado.index])
+    return agregado.reset_index(drop=True)
+
+# --- CONTEO DE EMAILS ÚNICOS ---
+# Dos modos sobre las mismas celdas del cubo, ambos fusionables entre días y closers:
+#   "exacto": conjuntos de emails (códigos enteros) por celda; se fusionan marcando
+#             un bitmap del tamaño del universo de emails (uno por closer en el ranking).
+#   "hll":    HyperLogLog (2^PRECISION_HLL registros, ~3% de error) precalculado por
+#             celda en forma dispersa (registro, rango); fusionar = máximo por registro.
+# Los emails se hashean una sola vez al armar el cubo, nunca en los reruns.
+
+PRECISION_HLL = 10
+MODO_UNICOS = os.environ.get("CN_MODO_UNICOS", "exacto")  # "exacto" | "hll"
+
+def _largo_bits(x):
+    """bit_length vectorizado para uint64."""
+    largo = np.zeros(len(x), dtype=np.uint8)
+    for salto in (32, 16, 8, 4, 2, 1):
+        alto = x >> np.uint64(salto)
+        hay = alto > 0
+        largo[hay] += salto
+        x = np.where(hay, alto, x)
+    return largo + (x > 0)
+
+def registros_hll(hashes, p=PRECISION_HLL):
+    """(registro, rango) de cada hash de 64 bits: p bits altos y posición del primer 1 del resto."""
+    hashes = np.asarray(hashes, dtype=np.uint64)
+    resto = hashes & np.uint64((1 << (64 - p)) - 1)
+    return (hashes >> np.uint64(64 - p)).astype(np.int64), (64 - p) - _largo_bits(resto).astype(np.uint8) + 1
+
+def estimar_hll(registros):
+    """Cardinalidad estimada de uno (1D) o varios (2D, uno por fila) bocetos densos."""
+    registros = np.atleast_2d(registros)
+    m = registros.shape[1]
+    alfa = 0.7213 / (1 + 1.079 / m)
+    estimado = alfa * m * m / np.exp2(-registros.astype(float)).sum(axis=1)
+    ceros = (registros == 0).sum(axis=1)
+    lineal = m * np.log(m / np.maximum(ceros, 1))  # Corrección de rango bajo (linear counting)
+    estimado = np.where((estimado <= 2.5 * m) & (ceros > 0), lineal, estimado)
+    return np.rint(estimado).astype(int)
+
+# Columnas de ventas que lee el cubo (su huella es la clave del cubo compartido)
+COLUMNAS_CUBO = ('Fecha', 'Closer', 'Estado_Simple', 'Email', 'Monto ($)', 'Es_Asistencia', 'Asistio')
+
+def _columna_o(df, columna, defecto):
+    return df[columna].to_numpy() if columna in df.columns else np.full(len(df), defecto)
+
+class CuboDiario:
+    def __init__(self, ventas):
+        if ventas.empty:  # Hoja caída: cubo vacío pero utilizable
+            ventas = pd.DataFrame({'Fecha': pd.Series(dtype='datetime64[ns]'), 'Closer': pd.Series(dtype=object),
+                                   'Estado_Simple': pd.Series(dtype=object)})
+        cod_closer, self.closers = pd.factorize(ventas['Closer'])
+        cod_estado, self.estados = pd.factorize(ventas['Estado_Simple'].astype(object))
+        cod_email, emails = pd.factorize(ventas['Email']) if 'Email' in ventas.columns else (np.full(len(ventas), -1), [])
+        self.n_emails = len(emails)
+        self.closers = np.asarray(self.closers, dtype=object)
+        self.estados = [str(e) for e in self.estados]
+        self._venta = self.estados.index(ESTADO_VENTA) if ESTADO_VENTA in self.estados else -1
+
+        base = pd.DataFrame({
+            'Dia': ventas['Fecha'].dt.normalize().to_numpy(),
+            'Closer': cod_closer,
+            'Estado': cod_estado,
+            'Filas': 1,
+            'Monto': _columna_o(ventas, 'Monto ($)', 0.0).astype(float),
+            'Asistencias': _columna_o(ventas, 'Es_Asistencia', False).astype(bool),
+            'Asistio': _columna_o(ventas, 'Asistio', False).astype(bool),
+            'Email': cod_email,
+        })
+        base = base[base['Dia'].notna()]
+
+        self.celdas = base.groupby(['Dia', 'Closer', 'Estado'], sort=True)[list(MEDIDAS)].sum().reset_index()
+        self.pares = (base.loc[base['Email'] >= 0, ['Dia', 'Closer', 'Estado', 'Asistencias', 'Email']]
+                      .drop_duplicates().sort_values('Dia', kind='stable').reset_index(drop=True))
+        self._dias_celdas = self.celdas['Dia'].to_numpy()
+        self._dias_pares = self.pares['Dia'].to_numpy()
+
+        # Bocetos HLL dispersos por celda: el rango máximo de cada registro
+        hashes = pd.util.hash_array(np.asarray(emails, dtype=object))[self.pares['Email'].to_numpy()]
+        registro, rango = registros_hll(hashes)
+        self.bocetos = (self.pares[['Dia', 'Closer', 'Estado', 'Asistencias']]
+                        .assign(Registro=registro, Rango=rango)
+                        .groupby(['Dia', 'Closer', 'Estado', 'Asistencias', 'Registro'], sort=True)['Rango']
+                        .max().reset_index())
+        self._dias_bocetos = self.bocetos['Dia'].to_numpy()
+
+    def codigo_closer(self, closer):
+        posiciones = np.flatnonzero(self.closers == closer)
+        return int(posiciones[0]) if len(posiciones) else -2
+
+    def corte(self, inicio, fin, closer="Todos"):
+        """Celdas y pares del período [inicio, fin] (fechas, ambos incluidos) y, si se elige, de un closer."""
+        desde = np.datetime64(pd.Timestamp(inicio).normalize())
+        hasta = np.datetime64(pd.Timestamp(fin).normalize() + pd.Timedelta(days=1))
+        celdas = self.celdas.iloc[np.searchsorted(self._dias_celdas, desde):np.searchsorted(self._dias_celdas, hasta)]
+        pares = self.pares.iloc[np.searchsorted(self._dias_pares, desde):np.searchsorted(self._dias_pares, hasta)]
+        bocetos = self.bocetos.iloc[np.searchsorted(self._dias_bocetos, desde):np.searchsorted(self._dias_bocetos, hasta)]
+        if closer != "Todos":
+            codigo = self.codigo_closer(closer)
+            celdas = celdas[celdas['Closer'] == codigo]
+            pares = pares[pares['Closer'] == codigo]
+            bocetos = bocetos[bocetos['Closer'] == codigo]
+        return CorteCubo(self, celdas, pares, bocetos)
+
+class CorteCubo:
+    def __init__(self, cubo, celdas, pares, bocetos):
+        self.cubo = cubo
+        self.celdas = celdas
+        self.pares = pares
+        self.bocetos = bocetos
+
+    @property
+    def vacio(self):
+        return self.celdas.empty
+
+    def suma(self, medida):
+        return self.celdas[medida].sum()
+
+    def filas_estado(self, *estados):
+        """Filas (registros) cuyo Estado_Simple está en `estados`."""
+        codigos = [self.cubo.estados.index(e) for e in estados if e in self.cubo.estados]
+        return int(self.celdas.loc[self.celdas['Estado'].isin(codigos), 'Filas'].sum())
+
+    def _filtrar(self, tabla, asistencia=False, estado=None):
+        if asistencia:
+            tabla = tabla[tabla['Asistencias']]
+        if estado is not None:
+            tabla = tabla[tabla['Estado'] == (self.cubo.estados.index(estado) if estado in self.cubo.estados else -1)]
+        return tabla
+
+    def emails_unicos(self, asistencia=False, estado=None, modo=None):
+        """Emails distintos del corte; opcionalmente solo asistencias y/o un estado.
+
+        modo "exacto" fusiona los conjuntos de las celdas en un bitmap; "hll" fusiona sus bocetos.
+        """
+        if (modo or MODO_UNICOS) == "hll":
+            bocetos = self._filtrar(self.bocetos, asistencia, estado)
+            registros = np.zeros(1 << PRECISION_HLL, dtype=np.uint8)
+            np.maximum.at(registros, bocetos['Registro'].to_numpy(), bocetos['Rango'].to_numpy())
+            return int(estimar_hll(registros)[0])
+        marcas = np.zeros(self.cubo.n_emails, dtype=bool)
+        marcas[self._filtrar(self.pares, asistencia, estado)['Email'].to_numpy()] = True
+        return int(np.count_nonzero(marcas))
+
+    def _unicos_por_closer(self, asistencia=False, estado=None, modo=None):
+        """Emails distintos por código de closer (Series), con el mismo `modo` que emails_unicos."""
+        if (modo or MODO_UNICOS) == "hll":
+            bocetos = self._filtrar(self.bocetos, asistencia, estado)
+            maximos = bocetos.groupby(['Closer', 'Registro'], sort=True)['Rango'].max()
+            closers = maximos.index.get_level_values('Closer')
+            codigos, fila = np.unique(closers, return_inverse=True)
+            registros = np.zeros((len(codigos), 1 << PRECISION_HLL), dtype=np.uint8)
+            registros[fila, maximos.index.get_level_values('Registro')] = maximos.to_numpy()
+            return pd.Series(estimar_hll(registros) if len(codigos) else [], index=codigos, dtype=int)
+        # Exacto: un bitmap del universo de emails por closer del corte (una fila cada uno)
+        pares = self._filtrar(self.pares, asistencia, estado)
+        codigos, fila = np.unique(pares['Closer'].to_numpy(), return_inverse=True)
+        marcas = np.zeros((len(codigos), self.cubo.n_emails), dtype=bool)
+        marcas[fila, pares['Email'].to_numpy()] = True
+        return pd.Series(np.count_nonzero(marcas, axis=1), index=codigos, dtype=int)
+
+    def por_dia(self, estado=None):
+        """Filas y Monto por día (índice 'Fecha'), opcionalmente de un solo estado."""
+        celdas = self.celdas
+        if estado is not None:
+            celdas = celdas[celdas['Estado'] == (self.cubo.estados.index(estado) if estado in self.cubo.estados else -1)]
+        diario = celdas.groupby('Dia')[['Filas', 'Monto']].sum()
+        diario.index.name = 'Fecha'
+        return diario
+
+    def por_dia_estado(self):
+        """Formato largo (Fecha, Estado_Simple, Cantidad) para gráficos apilados."""
+        diario = self.celdas.groupby(['Dia', 'Estado'], sort=True)['Filas'].sum().reset_index()
+        return pd.DataFrame({
+            'Fecha': diario['Dia'],
+            'Estado_Simple': pd.Categorical.from_codes(diario['Estado'], categories=self.cubo.estados),
+            'Cantidad': diario['Filas'],
+        })
+
+    def por_closer(self, metricas=('Facturado', 'Leads', 'Shows', 'Ventas'), modo=None):
+        """Leaderboard (ranking_closers) sobre las celdas del corte y los pares para los *_Unicas."""
+        celdas = self.celdas.assign(Ventas=np.where(self.celdas['Estado'] == self.cubo._venta, self.celdas['Filas'], 0))
+        unicos = {}
+        if 'Asistencias_Unicas' in metricas:
+            unicos['Asistencias_Unicas'] = self._unicos_por_closer(asistencia=True, modo=modo)
+        if 'Ventas_Unicas' in metricas:
+            unicos['Ventas_Unicas'] = self._unicos_por_closer(estado=ESTADO_VENTA, modo=modo)
+        return ranking_closers(celdas, self.cubo.closers, metricas, unicos)
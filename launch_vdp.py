@@ -2,11 +2,15 @@ import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
-from datetime import datetime, timedelta
-import pytz # Librería para manejar zonas horarias
+from datetime import timedelta
+import datos
+import perf
+import periodos
+import vdp
 
 # --- 1. CONFIGURACIÓN DE PÁGINA ---
 st.set_page_config(page_title="Launch VDP", page_icon="🚀", layout="wide")
+perf.corrida()
 
 # Estilos CSS
 st.markdown("""
@@ -30,67 +34,78 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # --- FUNCIÓN DE VISUALIZACIÓN (Salida en Pantalla) ---
+# Formato europeo (1.234,56) de columnas enteras de una vez: un format() nativo por
+# valor (sin lambdas del Styler) y el cambio de separadores en bloque sobre la columna.
+def formato_euro_columna(valores, decimales=0, prefijo=""):
+    serie = valores if isinstance(valores, pd.Series) else pd.Series(valores)
+    numeros = pd.to_numeric(serie, errors='coerce').fillna(0).to_numpy(dtype=float)
+    patron = f",.{decimales}f"
+    texto = pd.Series([format(x, patron) for x in numeros.tolist()], index=serie.index, dtype=str)
+    texto = texto.str.replace(",", "_", regex=False).str.replace(".", ",", regex=False).str.replace("_", ".", regex=False)
+    return prefijo + texto
+
 def formato_euro(valor, decimales=0):
-    if valor is None: return "0"
-    if decimales == 0:
-        return "{:,.0f}".format(valor).replace(",", ".")
-    else:
-        return "{:,.2f}".format(valor).replace(",", "X").replace(".", ",").replace("X", ".")
+    return formato_euro_columna([valor], decimales).iloc[0]
+
+# Columnas de la tabla diaria: (decimales, prefijo). Su texto se arma una vez por refresco.
+FORMATO_DIARIO = {
+    'Spent': (2, "$"),
+    'Leads Hyros': (0, ""),
+    'API Hyros': (0, ""),
+    'Grupo': (0, ""),
+    'CPL': (2, "$"),
+    'CPA': (2, "$"),
+    'CPG': (2, "$"),
+}
+
+def formatear_diario(diario):
+    """El diario de vdp con cada columna de FORMATO_DIARIO ya formateada en '<col> (txt)'."""
+    for col, (decimales, prefijo) in FORMATO_DIARIO.items():
+        diario[f"{col} (txt)"] = formato_euro_columna(diario[col], decimales, prefijo)
+    return diario
 
 # --- 2. CARGA Y LIMPIEZA DE DATOS ---
-@st.cache_data(ttl=300) 
-def cargar_datos_vdp():
-    url = 'https://docs.google.com/spreadsheets/d/e/2PACX-1vR726VKYI1xIW9q5U50lN2iqY58-SIyN9gusKo_t8h2-HkTa7zERkSrQ6F4OUnTB2AWEh4CSvfwdZRL/pub?gid=0&single=true&output=csv'
+# Solo se carga el lanzamiento activo: su hoja se limpia, se ingiere al almacén
+# particionado (vdp.py) y queda en memoria solo su diario (las filas se leen del
+# almacén por mes cuando hacen falta). Solo el lanzamiento principal se registra en el
+# refresco en segundo plano; los demás se leen una vez por TTL y su hoja cruda no queda
+# residente. max_entries acota los diarios en caché al cambiar de lanzamiento.
+@st.cache_data(ttl=datos.TTL_FUENTES, max_entries=2)
+@datos.con_snapshot("vdp")
+def cargar_datos_vdp(fuente):
     try:
-        # Cargamos todo como STRING para evitar problemas de interpretación
-        df = pd.read_csv(url, dtype=str) 
-        df.columns = df.columns.str.strip()
-        
-        # --- LIMPIEZA DE NÚMEROS (EUROPEA) ---
-        def force_european_format(x):
-            if pd.isna(x) or str(x).strip() in ["", "-"]:
-                return 0.0
-            
-            x = str(x).replace('$', '').replace(' ', '').replace('%', '')
-            x = x.replace('.', '') # Quitar miles
-            x = x.replace(',', '.') # Coma decimal a punto
-            
-            try: return float(x)
-            except ValueError: return 0.0
-
-        cols = ['Spent', 'Clicks', 'Visitas LP', 'Leads Hyros', 'API Hyros', 'Grupo']
-        for col in cols:
-            if col in df.columns:
-                df[col] = df[col].apply(force_european_format)
-        
-        # --- LIMPIEZA DE FECHAS ROBUSTA ---
-        if 'Fecha' in df.columns:
-            # Convertir a datetime, errores se convierten en NaT (Not a Time)
-            df['Fecha'] = pd.to_datetime(df['Fecha'], dayfirst=True, errors='coerce')
-            # ELIMINAR FILAS SIN FECHA VÁLIDA (Esto evita el error de fecha)
-            df = df.dropna(subset=['Fecha'])
-            df = df.sort_values('Fecha')
-            
-        return df
+        leer = datos.leer_fuente if fuente == vdp.PRINCIPAL else datos.leer_una_vez
+        # Cargamos todo como STRING para evitar problemas de interpretación (números europeos: 1.234,56)
+        df, invalidos = vdp.limpiar(leer(fuente, como_texto=True))
+        for col, cantidad in invalidos.items():
+            datos.avisar(f"⚠️ {cantidad} celdas no numéricas en {col} (tomadas como 0)", st.sidebar.caption)
+        return formatear_diario(vdp.ingerir(fuente, df))  # Tabla diaria (y su texto) una vez por refresco
     except Exception as e:
-        st.error(f"Error crítico cargando datos: {e}")
-        return pd.DataFrame()
+        datos.avisar(f"Error crítico cargando datos: {e}")
+        return formatear_diario(vdp.diario(pd.DataFrame()))
 
-df = cargar_datos_vdp()
+def ingerir_lanzamiento(fuente):
+    """Lanzamiento sin diario guardado (p. ej. archivado): lectura puntual, sin refresco en segundo plano."""
+    with perf.etapa(f"vdp: ingerir {fuente}"):
+        df, _ = vdp.limpiar(datos.leer_una_vez(fuente, como_texto=True))
+        vdp.ingerir(fuente, df)
 
 # --- 3. SIDEBAR Y ZONA HORARIA ---
 st.sidebar.title("🎛️ Control de Mando")
 
+lanzamiento = st.sidebar.selectbox("🚀 Lanzamiento:", list(vdp.LANZAMIENTOS)) if len(vdp.LANZAMIENTOS) > 1 else next(iter(vdp.LANZAMIENTOS))
+fuente = vdp.LANZAMIENTOS[lanzamiento]
+diario = datos.arranque_rapido("vdp", cargar_datos_vdp, fuente) # Snapshot local en frío (uno por lanzamiento)
+
+datos.panel_fuentes()
+
 # Debugger
 mostrar_raw = st.sidebar.checkbox("🔍 Modo Debug", value=False)
-if mostrar_raw:
-    st.write("Data Procesada:", df.head())
 
 st.sidebar.caption("Zona Horaria: GTM-5")
 
 # --- CONFIGURACIÓN DE ZONA HORARIA ---
-zona_horaria = pytz.timezone('America/Bogota')
-hoy = datetime.now(zona_horaria).date() # FECHA CORRECTA SEGÚN TU ZONA
+hoy = periodos.hoy() # FECHA CORRECTA SEGÚN TU ZONA (America/Bogota, compartida con las demás páginas)
 
 filtro_tiempo = st.sidebar.selectbox(
     "📅 Período de Análisis:",
@@ -98,15 +113,8 @@ filtro_tiempo = st.sidebar.selectbox(
 )
 
 # Lógica de fechas ajustada a la variable 'hoy' corregida
-if filtro_tiempo == "Hoy": f_inicio, f_fin = hoy, hoy
-elif filtro_tiempo == "Ayer": f_inicio, f_fin = hoy - timedelta(days=1), hoy - timedelta(days=1)
-elif filtro_tiempo == "Últimos 7 días": f_inicio, f_fin = hoy - timedelta(days=7), hoy
-elif filtro_tiempo == "Este Mes": f_inicio, f_fin = hoy.replace(day=1), hoy
-elif filtro_tiempo == "Mes Anterior":
-    primer = hoy.replace(day=1)
-    f_fin = primer - timedelta(days=1)
-    f_inicio = f_fin.replace(day=1)
-elif filtro_tiempo == "Últimos 30 días": f_inicio, f_fin = hoy - timedelta(days=30), hoy
+if filtro_tiempo != "Personalizado":
+    f_inicio, f_fin = periodos.resolver(filtro_tiempo, hoy)
 else:
     f_inicio = st.sidebar.date_input("Inicio", hoy - timedelta(days=7))
     f_fin = st.sidebar.date_input("Fin", hoy)
@@ -114,125 +122,147 @@ else:
 f_inicio = pd.to_datetime(f_inicio)
 f_fin = pd.to_datetime(f_fin)
 
-# Filtro de Dataframe
-mask = (df['Fecha'] >= f_inicio) & (df['Fecha'] <= f_fin)
-df_filtrado = df.loc[mask].copy()
+# Filtro del diario (ordenado por fecha: búsqueda binaria + slice)
+daily = periodos.rango(diario, f_inicio, f_fin)  # Ya agregado (y formateado) por día
 
-if df_filtrado.empty:
-    st.warning(f"⚠️ No hay datos para el período seleccionado ({f_inicio.date()} al {f_fin.date()}).")
-    st.stop()
+if mostrar_raw:
+    st.write("Data Procesada:", vdp.filas(fuente, f_inicio, f_fin).head())  # Solo los meses del período
 
 # --- 4. TABS Y DASHBOARD ---
-tab1, tab2, tab3 = st.tabs(["🚀 FASE 1: CAPTACIÓN", "🔥 FASE 2: NUTRICIÓN", "💰 FASE 3: VENTA"])
-
-with tab1:
-    # A. KPI CALCULATIONS
-    spend = df_filtrado['Spent'].sum()
-    leads = df_filtrado['Leads Hyros'].sum()
-    api = df_filtrado['API Hyros'].sum()
-    grupo = df_filtrado['Grupo'].sum()
-    visitas = df_filtrado['Visitas LP'].sum()
-    clicks = df_filtrado['Clicks'].sum()
-    
-    dias_activos = (df_filtrado['Fecha'].max() - df_filtrado['Fecha'].min()).days + 1
-    if dias_activos < 1: dias_activos = 1
+# Las pestañas se crean siempre: un período vacío solo deja sin contenido la captación,
+# la comparación entre lanzamientos no depende del período del sidebar.
+tab1, tab2, tab3, tab4 = st.tabs(["🚀 FASE 1: CAPTACIÓN", "🔥 FASE 2: NUTRICIÓN", "💰 FASE 3: VENTA", "📊 COMPARAR LANZAMIENTOS"])
 
-    cpl = spend / leads if leads > 0 else 0
-    cpa = spend / api if api > 0 else 0
-    cpg = spend / grupo if grupo > 0 else 0
-    daily_spend = spend / dias_activos
+with tab1, perf.etapa("tab: captación"):
+    if daily.empty:
+        st.info(f"⚠️ No hay datos para el período seleccionado ({f_inicio.date()} al {f_fin.date()}).")
+    else:
+        # A. KPI CALCULATIONS (sobre el diario ya calculado: suma de días + ratios de los totales)
+        totales = vdp.periodo(daily)
 
-    # B. METRICS
-    st.markdown("### 🎯 Métricas Principales")
-    k1, k2, k3, k4 = st.columns(4)
+        # B. METRICS
+        st.markdown("### 🎯 Métricas Principales")
+        k1, k2, k3, k4 = st.columns(4)
 
-    k1.metric("💸 Inversión Total", f"${formato_euro(spend, 2)}", f"Actual ${formato_euro(daily_spend, 0)} / día", delta_color="off")
-    k2.metric("👥 Leads (Hyros)", f"{formato_euro(leads, 0)}", f"CPL: ${formato_euro(cpl, 2)}", delta_color="inverse")
-    k3.metric("🤖 Leads API", f"{formato_euro(api, 0)}", f"CPA: ${formato_euro(cpa, 2)}", delta_color="inverse")
-    k4.metric("📲 Grupo WhatsApp", f"{formato_euro(grupo, 0)}", f"CPG: ${formato_euro(cpg, 2)}", delta_color="inverse")
+        k1.metric("💸 Inversión Total", f"${formato_euro(totales['Spent'], 2)}", f"Actual ${formato_euro(totales['Gasto_Diario'], 0)} / día", delta_color="off")
+        k2.metric("👥 Leads (Hyros)", f"{formato_euro(totales['Leads Hyros'], 0)}", f"CPL: ${formato_euro(totales['CPL'], 2)}", delta_color="inverse")
+        k3.metric("🤖 Leads API", f"{formato_euro(totales['API Hyros'], 0)}", f"CPA: ${formato_euro(totales['CPA'], 2)}", delta_color="inverse")
+        k4.metric("📲 Grupo WhatsApp", f"{formato_euro(totales['Grupo'], 0)}", f"CPG: ${formato_euro(totales['CPG'], 2)}", delta_color="inverse")
 
-    st.markdown("---")
+        st.markdown("---")
 
-    # C. CHARTS
-    st.subheader("📈 Tendencia de Tráfico & Costos")
-    
-    daily = df_filtrado.groupby('Fecha').agg({
-        'Spent': 'sum', 'Leads Hyros': 'sum', 'API Hyros': 'sum', 'Grupo': 'sum'
-    }).reset_index()
-    
-    daily['CPL_Dia'] = daily.apply(lambda x: x['Spent']/x['Leads Hyros'] if x['Leads Hyros'] > 0 else 0, axis=1)
+        # C. CHARTS
+        st.subheader("📈 Tendencia de Tráfico & Costos")
     
-    fig_electro = go.Figure()
-
-    # Volumen
-    fig_electro.add_trace(go.Scatter(x=daily['Fecha'], y=daily['Leads Hyros'], name='Leads', 
-                         mode='lines+markers', line=dict(color='#00CC96', width=3), marker=dict(size=6)))
-    fig_electro.add_trace(go.Scatter(x=daily['Fecha'], y=daily['API Hyros'], name='API', 
-                         mode='lines+markers', line=dict(color='#636EFA', width=3), marker=dict(size=6)))
-    fig_electro.add_trace(go.Scatter(x=daily['Fecha'], y=daily['Grupo'], name='Grupo', 
-                         mode='lines+markers', line=dict(color='#AB63FA', width=3), marker=dict(size=6)))
-
-    # Costos
-    fig_electro.add_trace(go.Scatter(x=daily['Fecha'], y=daily['CPL_Dia'], name='CPL ($)', 
-                         mode='lines', line=dict(color='#EF553B', width=1, dash='dot'), yaxis='y2', hovertemplate="$%{y:,.2f}"))
-
-    fig_electro.update_layout(
-        height=450,
-        hovermode="x unified",
-        separators=",.", 
-        xaxis=dict(showgrid=False),
-        yaxis=dict(title="Volumen (Cantidad)", showgrid=True, gridcolor='#2c2f38'),
-        yaxis2=dict(title="Costo Unitario ($)", overlaying='y', side='right', showgrid=False),
-        legend=dict(orientation="h", y=1.1, x=0.5, xanchor="center"),
-        margin=dict(l=0, r=0, t=40, b=0),
-        plot_bgcolor="rgba(0,0,0,0)",
-        paper_bgcolor="rgba(0,0,0,0)"
-    )
-    st.plotly_chart(fig_electro, use_container_width=True)
-
-    # D. FUNNEL
-    st.subheader("🔻 Eficiencia del Embudo")
-
-    stages = ['Clicks Anuncios', 'Visitas LP', 'Leads Captados', 'Leads en API', 'Unidos a Grupo']
-    values = [clicks, visitas, leads, api, grupo]
-    
-    pcts = []
-    for i, val in enumerate(values):
-        if i == 0: pcts.append(100)
-        else:
-            prev = values[i-1]
-            pct = (val / prev * 100) if prev > 0 else 0
-            pcts.append(pct)
-
-    fig_bar = go.Figure()
-    text_labels = [f"{formato_euro(v, 0)} ({formato_euro(p, 1)}%)" for v, p in zip(values, pcts)]
-    colors = ['#545454', '#ced4da', '#00CC96', '#636EFA', '#AB63FA']
-
-    fig_bar.add_trace(go.Bar(
-        y=stages, x=values, orientation='h', text=text_labels, textposition='auto',
-        marker=dict(color=colors, line=dict(color='rgba(255, 255, 255, 0.2)', width=1)),
-        width=0.3, opacity=0.9
-    ))
-
-    fig_bar.update_layout(
-        height=350,
-        separators=",.", 
-        yaxis=dict(autorange="reversed"),
-        xaxis=dict(showgrid=True, gridcolor='#2c2f38', title="Cantidad"),
-        margin=dict(l=0, r=0, t=20, b=0),
-        plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)"
-    )
-    st.plotly_chart(fig_bar, use_container_width=True)
-
-    # E. DATA TABLE
-    with st.expander("📂 Ver Tabla de Datos Diarios"):
-        st.dataframe(
-            daily.style.format({
-                'Spent': lambda x: f"${formato_euro(x, 2)}",
-                'Leads Hyros': lambda x: f"{formato_euro(x, 0)}",
-                'API Hyros': lambda x: f"{formato_euro(x, 0)}",
-                'Grupo': lambda x: f"{formato_euro(x, 0)}",
-                'CPL_Dia': lambda x: f"${formato_euro(x, 2)}"
-            }).background_gradient(subset=['Leads Hyros'], cmap='Greens'),
-            use_container_width=True
+        fig_electro = go.Figure()
+
+        # Volumen
+        fig_electro.add_trace(go.Scatter(x=daily['Fecha'], y=daily['Leads Hyros'], name='Leads', 
+                             mode='lines+markers', line=dict(color='#00CC96', width=3), marker=dict(size=6)))
+        fig_electro.add_trace(go.Scatter(x=daily['Fecha'], y=daily['API Hyros'], name='API', 
+                             mode='lines+markers', line=dict(color='#636EFA', width=3), marker=dict(size=6)))
+        fig_electro.add_trace(go.Scatter(x=daily['Fecha'], y=daily['Grupo'], name='Grupo', 
+                             mode='lines+markers', line=dict(color='#AB63FA', width=3), marker=dict(size=6)))
+
+        # Costos
+        fig_electro.add_trace(go.Scatter(x=daily['Fecha'], y=daily['CPL'], name='CPL ($)', 
+                             mode='lines', line=dict(color='#EF553B', width=1, dash='dot'), yaxis='y2', hovertemplate="$%{y:,.2f}"))
+
+        fig_electro.update_layout(
+            height=450,
+            hovermode="x unified",
+            separators=",.", 
+            xaxis=dict(showgrid=False),
+            yaxis=dict(title="Volumen (Cantidad)", showgrid=True, gridcolor='#2c2f38'),
+            yaxis2=dict(title="Costo Unitario ($)", overlaying='y', side='right', showgrid=False),
+            legend=dict(orientation="h", y=1.1, x=0.5, xanchor="center"),
+            margin=dict(l=0, r=0, t=40, b=0),
+            plot_bgcolor="rgba(0,0,0,0)",
+            paper_bgcolor="rgba(0,0,0,0)"
         )
+        st.plotly_chart(fig_electro, use_container_width=True)
+
+        # D. FUNNEL
+        st.subheader("🔻 Eficiencia del Embudo")
+
+        st.caption(f"Click → Visita: {formato_euro(totales['Click_a_Visita'], 1)}% · Lead → Grupo: {formato_euro(totales['Lead_a_Grupo'], 1)}%")
+
+        embudo = vdp.embudo(totales)
+        stages, values = embudo['Etapa'].tolist(), embudo['Valor'].tolist()
+
+        fig_bar = go.Figure()
+        text_labels = (formato_euro_columna(embudo['Valor'], 0) + " (" + formato_euro_columna(embudo['Pct'], 1) + "%)").tolist()
+        colors = ['#545454', '#ced4da', '#00CC96', '#636EFA', '#AB63FA']
+
+        fig_bar.add_trace(go.Bar(
+            y=stages, x=values, orientation='h', text=text_labels, textposition='auto',
+            marker=dict(color=colors, line=dict(color='rgba(255, 255, 255, 0.2)', width=1)),
+            width=0.3, opacity=0.9
+        ))
+
+        fig_bar.update_layout(
+            height=350,
+            separators=",.", 
+            yaxis=dict(autorange="reversed"),
+            xaxis=dict(showgrid=True, gridcolor='#2c2f38', title="Cantidad"),
+            margin=dict(l=0, r=0, t=20, b=0),
+            plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)"
+        )
+        st.plotly_chart(fig_bar, use_container_width=True)
+
+        # E. DATA TABLE
+        with st.expander("📂 Ver Tabla de Datos Diarios"):
+            # Texto preformateado al cargar; el degradé usa los valores numéricos (gmap)
+            tabla = daily[['Fecha'] + [f"{col} (txt)" for col in FORMATO_DIARIO]]
+            tabla.columns = ['Fecha', *FORMATO_DIARIO]
+            st.dataframe(
+                tabla.style.background_gradient(subset=['Leads Hyros'], cmap='Greens', gmap=daily['Leads Hyros'].to_numpy()),
+                use_container_width=True
+            )
+
+# Comparación: cada lanzamiento completo (no el período del sidebar), alineado por día del lanzamiento
+FORMATO_COMPARACION = {**FORMATO_DIARIO, 'Click_a_Visita': (1, ""), 'Lead_a_Grupo': (1, "")}
+CURVAS_COMPARACION = {
+    "Leads acumulados": 'Leads Hyros Acum',
+    "Grupo acumulado": 'Grupo Acum',
+    "Inversión acumulada ($)": 'Spent Acum',
+    "CPL acumulado ($)": 'CPL Acum',
+    "CPL diario ($)": 'CPL',
+}
+
+with tab4, perf.etapa("tab: comparar lanzamientos"):
+    st.markdown("### 📊 Lanzamientos Lado a Lado")
+    st.caption("Cada lanzamiento completo, desde su diario ya agregado en el almacén local. Día 1 = primera fecha del lanzamiento.")
+
+    ingeridos = [n for n, f in vdp.LANZAMIENTOS.items() if n == lanzamiento or vdp.ingerido(f)]
+    elegidos = st.multiselect("Lanzamientos a comparar:", list(vdp.LANZAMIENTOS), default=ingeridos)
+
+    for nombre in elegidos:
+        if not vdp.ingerido(vdp.LANZAMIENTOS[nombre]):
+            with st.spinner(f"Ingiriendo {nombre}..."):
+                try:
+                    ingerir_lanzamiento(vdp.LANZAMIENTOS[nombre])
+                except Exception as e:
+                    st.warning(f"⚠️ No se pudo cargar {nombre}: {e}")
+
+    resumen, curvas = vdp.comparar({n: vdp.LANZAMIENTOS[n] for n in elegidos})
+    if resumen.empty:
+        st.info("Elige al menos un lanzamiento con datos.")
+    else:
+        tabla = pd.DataFrame({'Lanzamiento': resumen['Lanzamiento'], 'Inicio': resumen['Inicio'].dt.date,
+                              'Días': resumen['Dias_Activos']})
+        for col, (decimales, prefijo) in FORMATO_COMPARACION.items():
+            tabla[col] = formato_euro_columna(resumen[col], decimales, prefijo)
+        tabla = tabla.rename(columns={'Click_a_Visita': 'Click → Visita (%)', 'Lead_a_Grupo': 'Lead → Grupo (%)'})
+        st.dataframe(tabla, hide_index=True, use_container_width=True)
+
+        curva = st.selectbox("Curva:", list(CURVAS_COMPARACION))
+        fig_comp = px.line(curvas, x='Dia_Lanzamiento', y=CURVAS_COMPARACION[curva], color='Lanzamiento', markers=True,
+                           labels={'Dia_Lanzamiento': "Día del lanzamiento", CURVAS_COMPARACION[curva]: curva})
+        fig_comp.update_layout(height=420, hovermode="x unified", separators=",.",
+                               legend=dict(orientation="h", y=1.1, x=0.5, xanchor="center"),
+                               margin=dict(l=0, r=0, t=40, b=0),
+                               plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)")
+        st.plotly_chart(fig_comp, use_container_width=True)
+
+perf.panel()
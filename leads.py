@@ -0,0 +1,245 @@
+import numpy as np
+import pandas as pd
+
+# --- ÍNDICE DE LEADS POR EMAIL ---
+# Se construye una vez por refresco de datos: para cada fuente (volumen, calificados,
+# resultados) un mapa email normalizado -> posiciones de fila. Buscar un lead es un
+# acceso al diccionario + iloc, sin recorrer las hojas completas en cada rerun.
+
+_SIN_FILAS = np.array([], dtype=np.intp)
+
+def normalizar_email(email):
+    """Misma normalización que la limpieza de las hojas (minúsculas, sin espacios)."""
+    return str(email).strip().lower()
+
+class IndiceEmails:
+    def __init__(self, fuentes):
+        """`fuentes`: dict nombre -> DataFrame con columna 'Email' ya normalizada."""
+        self._fuentes = fuentes
+        self._posiciones = {
+            nombre: df.groupby('Email', sort=False).indices if 'Email' in df.columns else {}
+            for nombre, df in fuentes.items()
+        }
+
+    def posiciones(self, nombre, email):
+        return self._posiciones[nombre].get(normalizar_email(email), _SIN_FILAS)
+
+    def buscar(self, email):
+        """dict nombre -> filas del lead en esa fuente (en el orden de la hoja)."""
+        return {nombre: df.iloc[self.posiciones(nombre, email)] for nombre, df in self._fuentes.items()}
+
+# --- BÚSQUEDA APROXIMADA (prefijo + trigramas) ---
+# Un "término" es un email, su parte local, un nombre completo o cada palabra del
+# nombre. Se guardan una sola vez (ordenados) con:
+# - búsqueda por prefijo: np.searchsorted sobre los términos ordenados;
+# - tolerancia a errores: postings trigrama -> términos (formato CSR), puntaje Dice.
+#   Los emails completos solo entran por prefijo: el dominio (@gmail.com) lo comparten
+#   casi todos y sus trigramas inflarían cada consulta; la parte local sí tiene trigramas.
+# Por consulta solo se tocan los postings de sus trigramas, nunca las hojas.
+
+def normalizar_texto(serie):
+    """Minúsculas, sin espacios extremos ni tildes (vectorizado)."""
+    return (serie.astype(str).str.strip().str.lower()
+            .str.normalize('NFKD').str.encode('ascii', 'ignore').str.decode('ascii'))
+
+def _trigramas(texto):
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+def _trigramas_columna(textos):
+    """Pares (trigrama, posición) de una Serie de textos, sin repetir dentro de cada texto."""
+    bordeados = " " + textos + " "
+    largo = bordeados.str.len()
+    partes = [bordeados[largo > k + 2].str.slice(k, k + 3) for k in range(int(largo.max()) - 2 if len(largo) else 0)]
+    if not partes:
+        return pd.Series(dtype=object)
+    pares = pd.concat(partes)
+    unicos = pd.DataFrame({'pos': pares.index, 'tri': pares.to_numpy()}).drop_duplicates()
+    return pd.Series(unicos['tri'].to_numpy(), index=unicos['pos'].to_numpy())
+
+def _csr(claves, valores, n_claves):
+    """Agrupa `valores` por `claves` (enteros): devuelve (inicios, valores_ordenados)."""
+    orden = np.argsort(claves, kind='stable')
+    inicios = np.zeros(n_claves + 1, dtype=np.intp)
+    np.cumsum(np.bincount(claves, minlength=n_claves), out=inicios[1:])
+    return inicios, valores[orden]
+
+class IndiceBusqueda:
+    def __init__(self, leads):
+        """`leads`: DataFrame con 'Email' y 'Nombre' (un lead por fila)."""
+        self.leads = leads.reset_index(drop=True)
+        email = normalizar_texto(self.leads['Email'])
+        nombre = normalizar_texto(self.leads['Nombre'].fillna('')).str.replace(r'\s+', ' ', regex=True)
+
+        # Pares (texto, lead): email, parte local, nombre completo y palabras del nombre
+        palabras = nombre.str.split(' ').explode()
+        textos = pd.concat([email, email.str.split('@').str[0], nombre, palabras])
+        textos = textos[textos.str.len() >= 2]
+        codigos, self.terminos = pd.factorize(textos, sort=True)
+        self.terminos = np.asarray(self.terminos, dtype=object)
+        n_terminos = len(self.terminos)
+        self._lead_inicio, self._lead_ids = _csr(codigos, textos.index.to_numpy(), n_terminos)
+
+        # Postings trigrama -> término (con bordes: " texto "), sin los emails completos
+        terminos = pd.Series(self.terminos, dtype=object)
+        trigramas = _trigramas_columna(terminos[~terminos.str.contains('@', regex=False)])
+        ids = trigramas.index.to_numpy(dtype=np.intp)
+        tri_codigos, tri_unicos = pd.factorize(trigramas)
+        self._tri_pos = dict(zip(tri_unicos, range(len(tri_unicos))))
+        self._tri_inicio, self._tri_terminos = _csr(tri_codigos, ids, len(tri_unicos))
+        self._n_tri = np.bincount(ids, minlength=n_terminos)
+
+    def buscar(self, consulta, limite=10, minimo=0.4):
+        """Candidatos ordenados por puntaje: exacto (3) > prefijo (2) > parecido (Dice 0-1)."""
+        q = normalizar_texto(pd.Series([consulta])).iloc[0]
+        if len(q) < 2:
+            return self.leads.iloc[:0].assign(Puntaje=pd.Series(dtype=float))
+
+        puntaje = np.zeros(len(self.terminos))
+
+        # 1. Prefijo: rango contiguo en los términos ordenados
+        lo = np.searchsorted(self.terminos, q, side='left')
+        hi = np.searchsorted(self.terminos, q + '\uffff', side='left')
+        puntaje[lo:hi] = 2.0
+        if lo < hi and self.terminos[lo] == q:
+            puntaje[lo] = 3.0
+
+        # 2. Trigramas de la parte local (sin borde final: el usuario puede estar escribiendo)
+        q_tri = _trigramas(f" {q.split('@')[0]}")
+        tri_q = [self._tri_pos[t] for t in q_tri if t in self._tri_pos]
+        if tri_q:
+            postings = np.concatenate([self._tri_terminos[self._tri_inicio[t]:self._tri_inicio[t + 1]] for t in tri_q])
+            comunes = np.bincount(postings, minlength=len(self.terminos))
+            candidatos = np.flatnonzero(comunes)
+            dice = 2 * comunes[candidatos] / (len(q_tri) + self._n_tri[candidatos])
+            puntaje[candidatos] = np.maximum(puntaje[candidatos], np.where(dice >= minimo, dice, 0))
+
+        # Puntaje de cada lead = el de su mejor término: se recorren los términos de
+        # mayor a menor puntaje hasta juntar `limite` leads distintos
+        terminos = np.flatnonzero(puntaje)
+        terminos = terminos[np.argsort(-puntaje[terminos], kind='stable')]
+        elegidos = {}
+        for t in terminos:
+            for lead in self._lead_ids[self._lead_inicio[t]:self._lead_inicio[t + 1]]:
+                elegidos.setdefault(lead, puntaje[t])
+                if len(elegidos) >= limite: break
+            if len(elegidos) >= limite: break
+
+        resultado = self.leads.iloc[list(elegidos)]
+        return resultado.assign(Puntaje=np.round(list(elegidos.values()), 2) if elegidos else pd.Series(dtype=float))
+
+def tabla_leads(volumen, resultados):
+    """Un lead por email con su nombre (Resultados manda; si no, Volumen), para IndiceBusqueda."""
+    partes = []
+    if 'Email' in resultados.columns:
+        partes.append(pd.DataFrame({'Email': resultados['Email'], 'Nombre': resultados.get('Lead Name')}))
+    if 'Email' in volumen.columns:
+        partes.append(pd.DataFrame({'Email': volumen['Email'], 'Nombre': volumen.get('Nombre')}))
+    if not partes:
+        return pd.DataFrame({'Email': pd.Series(dtype=str), 'Nombre': pd.Series(dtype=str)})
+    leads = pd.concat(partes, ignore_index=True)
+    leads = leads[leads['Email'].notna() & ~leads['Email'].isin(['', 'nan'])]
+    # Primer nombre no vacío por email, respetando la prioridad de las fuentes
+    con_nombre = leads[leads['Nombre'].notna() & ~leads['Nombre'].astype(str).str.lower().isin(['', 'nan'])]
+    nombres = con_nombre.drop_duplicates('Email').set_index('Email')['Nombre']
+    emails = leads['Email'].drop_duplicates()
+    return pd.DataFrame({'Email': emails.to_numpy(), 'Nombre': emails.map(nombres).to_numpy()})
+
+# --- TABLA DE JOURNEY POR LEAD ---
+# Una fila por email normalizado (índice) con todo el recorrido ya unido: ingreso,
+# calificación, llamadas, último resultado, LTV y atribución. Se materializa una vez
+# por refresco; el buscador y el ranking la leen sin volver a agrupar las hojas.
+
+def _por_email(df, columnas):
+    """groupby('Email') con las agregaciones (salida -> (columna, función)) cuyas columnas existan."""
+    if 'Email' not in df.columns or df.empty:
+        return pd.DataFrame(index=pd.Index([], name='Email'), columns=list(columnas))
+    presentes = {salida: spec for salida, spec in columnas.items() if spec[0] in df.columns}
+    return df.groupby('Email', sort=False).agg(**presentes)
+
+def tabla_journey(volumen, calificados, resultados):
+    ingreso = _por_email(volumen, {
+        'Registros': ('Email', 'size'),
+        'Primer_Ingreso': ('Fecha_Ingreso', 'min'),
+        'Nombre_Volumen': ('Nombre', 'first'),
+        'Campaña (UTM)': ('Campaña (UTM)', 'first'),
+        'Conjunto (ID)': ('Conjunto (ID)', 'first'),
+        'Ad Content': ('Ad Content', 'first'),
+    })
+    calificacion = _por_email(calificados, {
+        'Veces_Calificado': ('Email', 'size'),
+        'Fecha_Calificado': ('Fecha_Calificado', 'first'),
+    })
+    llamadas = _por_email(resultados, {
+        'Llamadas': ('Email', 'size'),
+        'Nombre_Resultados': ('Lead Name', 'first'),
+        'Ultimo_Resultado': ('Resultado', 'last'),
+        'Ultima_Llamada': ('Fecha_Llamada', 'max'),
+        'Ultimo_Closer': ('Closer', 'last'),
+        'Origen Campaña': ('Origen Campaña', 'first'),
+        'Nombre del Ad': ('Nombre del Ad', 'first'),
+    })
+    # LTV y atribución final: solo filas de venta
+    if 'Resultado' in resultados.columns:
+        ventas = resultados[resultados['Resultado'].astype(str).str.lower().str.contains("venta", regex=False)]
+    else:
+        ventas = resultados.iloc[:0]
+    compras = _por_email(ventas, {
+        'Compras': ('Email', 'size'),
+        'LTV': ('Monto ($)', 'sum'),
+        'Ultima_Compra': ('Fecha_Llamada', 'max'),
+        'Campaña_Venta': ('Origen Campaña', 'first'),
+        'Ad_Venta': ('Nombre del Ad', 'first'),
+    })
+
+    journey = pd.concat([ingreso, calificacion, llamadas, compras], axis=1)
+    journey.index.name = 'Email'
+    for col in ('Registros', 'Veces_Calificado', 'Llamadas', 'Compras'):
+        journey[col] = journey[col].fillna(0).astype(int)
+    journey['LTV'] = pd.to_numeric(journey.get('LTV'), errors='coerce').fillna(0.0)
+    journey['Calificado'] = journey['Veces_Calificado'] > 0
+
+    # Nombre: Resultados manda (más fiable); si no, Volumen
+    nombre = pd.Series(None, index=journey.index, dtype=object)
+    for col in ('Nombre_Resultados', 'Nombre_Volumen'):
+        if col in journey:
+            nombre = nombre.combine_first(journey[col])
+    journey['Nombre'] = nombre
+    for final, de_venta in (('Origen Campaña', 'Campaña_Venta'), ('Nombre del Ad', 'Ad_Venta')):
+        if de_venta in journey:
+            journey[final] = journey[de_venta].combine_first(journey[final])
+    return journey.drop(columns=['Nombre_Resultados', 'Nombre_Volumen', 'Campaña_Venta', 'Ad_Venta'], errors='ignore')
+
+# --- RANKING DE CLIENTES POR LTV ---
+# Sobre la tabla de journey (LTV ya agregado por email en cada refresco). Cada página
+# usa una selección parcial (np.partition): solo se ordenan las numero*tamaño
+# primeras filas, no toda la base.
+
+class RankingLTV:
+    def __init__(self, journey):
+        self.clientes = journey[journey['Compras'] > 0]
+        self._ltv = self.clientes['LTV'].to_numpy(dtype=float)
+
+    def __len__(self):
+        return len(self._ltv)
+
+    def maximo(self):
+        return float(self._ltv.max()) if len(self._ltv) else 0.0
+
+    def top(self, k):
+        """Posiciones de los k mayores LTV, ordenadas (empates: orden de la tabla)."""
+        k = min(k, len(self._ltv))
+        if k == 0:
+            return np.array([], dtype=np.intp)
+        # Umbral = k-ésimo mayor (np.partition, O(n)); los empates en el umbral entran en orden de tabla
+        umbral = -np.partition(-self._ltv, k - 1)[k - 1]
+        mayores = np.flatnonzero(self._ltv > umbral)
+        candidatos = np.concatenate([mayores, np.flatnonzero(self._ltv == umbral)[:k - len(mayores)]])
+        return candidatos[np.lexsort((candidatos, -self._ltv[candidatos]))]
+
+    def pagina(self, numero, tamano=50):
+        """Filas de la página `numero` (desde 1) con su posición en el ranking como índice."""
+        desde = (numero - 1) * tamano
+        posiciones = self.top(numero * tamano)[desde:]
+        filas = self.clientes.iloc[posiciones].reset_index()
+        filas.index = np.arange(desde + 1, desde + 1 + len(filas))  # Ranking desde 1
+        return filas
@@ -0,0 +1,310 @@
+import numpy as np
+import pandas as pd
+import perf
+
+# --- LIMPIEZA COMPARTIDA DE HOJAS ---
+
+# --- REPARACIÓN (Anti-Error GHL) ---
+DESPLAZAMIENTO_GHL = 8  # GHL empuja las filas malas 8 columnas a la derecha
+
+def filas_desplazadas(df):
+    """Máscara de filas con la primera columna vacía (síntoma del corrimiento de GHL)."""
+    col_0 = df.iloc[:, 0]
+    return col_0.isna() | (col_0.astype(str).str.strip() == '')
+
+@perf.medir("limpieza: reparar_desplazamiento")
+def reparar_desplazamiento(df, desplazamiento=DESPLAZAMIENTO_GHL):
+    """Arregla en bloque las filas desplazadas a la derecha (problema de GHL).
+
+    Devuelve (df_reparado, filas_reparadas). Trabaja columna a columna sobre todas
+    las filas malas a la vez, así cada columna conserva su dtype.
+    """
+    if df.empty or len(df.columns) <= desplazamiento:
+        return df, 0
+
+    filas_malas_mask = filas_desplazadas(df)
+    filas_reparadas = int(filas_malas_mask.sum())
+    if filas_reparadas == 0:
+        return df, 0
+
+    columnas = {}
+    n_cols = len(df.columns)
+    for i in range(n_cols):
+        actual = df.iloc[:, i]
+        if i + desplazamiento < n_cols:
+            columnas[i] = actual.where(~filas_malas_mask, df.iloc[:, i + desplazamiento])
+        else:
+            columnas[i] = actual.mask(filas_malas_mask)  # Cola vacía tras el corrimiento
+
+    df_fixed = pd.concat(columnas, axis=1)
+    df_fixed.columns = df.columns
+    return df_fixed, filas_reparadas
+
+# --- CLASIFICACIÓN DE RESULTADOS ---
+# Tabla de reglas: el primer estado cuyas palabras clave aparezcan en "Resultado" gana.
+REGLAS_ESTADO = (
+    ("✅ Venta", ("venta",)),
+    ("❌ No Show", ("no show",)),
+    ("🚫 Descalificado", ("descalificado",)),
+    ("👀 Seguimiento", ("seguimiento",)),
+    ("📅 Re-Agendado", ("re-agendado", "reagendado")),
+)
+ESTADO_OTRO = "Otro/Pendiente"
+
+ASISTENCIA_CONFIRMADA = ("venta", "seguimiento", "descalificado")  # Estuvo en la llamada
+NO_ASISTENCIA = ("no show", "re-agendado")
+
+@perf.medir("limpieza: clasificar_resultados")
+def clasificar_resultados(resultado, reglas=REGLAS_ESTADO, otro=ESTADO_OTRO):
+    """Clasifica la columna Resultado con unas pocas pasadas vectorizadas.
+
+    Devuelve un DataFrame (mismo índice) con:
+    - Estado_Simple: Categorical según `reglas` (o `otro`).
+    - Es_Asistencia: venta/seguimiento/descalificado, o "asistió" sin "no show".
+    - Asistio: todo lo que no sea no show ni re-agendado.
+    """
+    texto = resultado.astype(str).str.lower()  # Una sola vez
+    coincidencias = {}
+
+    def contiene(claves):
+        mascara = np.zeros(len(texto), dtype=bool)
+        for clave in claves:
+            if clave not in coincidencias:
+                coincidencias[clave] = texto.str.contains(clave, regex=False).to_numpy(dtype=bool)
+            mascara |= coincidencias[clave]
+        return mascara
+
+    estados = [estado for estado, _ in reglas]
+    codigos = np.select([contiene(claves) for _, claves in reglas], list(range(len(estados))), default=len(estados))
+
+    return pd.DataFrame({
+        'Estado_Simple': pd.Categorical.from_codes(codigos, categories=estados + [otro]),
+        'Es_Asistencia': contiene(ASISTENCIA_CONFIRMADA) | (contiene(("asistió",)) & ~contiene(("no show",))),
+        'Asistio': ~contiene(NO_ASISTENCIA),
+    }, index=resultado.index)
+
+# --- NÚMEROS DE LAS HOJAS ---
+# Montos y métricas llegan como texto con formato: "$1,250.00" (US, hoja de ventas y
+# budgets), "1.234,56" (europeo, hoja VDP), "12,5%", "-" o vacío. Se limpian en
+# bloque, columna a columna: un regex para símbolos y espacios, reemplazo de
+# separadores y un solo cast de las celdas válidas (nada de apply fila a fila).
+
+FORMATOS_NUMERO = {
+    "us": (",", "."),       # (miles, decimal)
+    "europeo": (".", ","),
+}
+SIMBOLOS_NUMERO = r"[\s$€£%()]|USD|EUR|COP"  # \s incluye el espacio duro (\xa0) de Sheets
+PATRON_NUMERO = r"[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?"
+VACIOS_NUMERO = ("", "-", "—", "nan", "None", "<NA>")
+
+@perf.medir("limpieza: parsear_numeros")
+def parsear_numeros(serie, formato="us", defecto=0.0):
+    """Convierte una columna de texto con formato a float, en bloque.
+
+    Devuelve (valores, invalidos): las celdas vacías o "-" valen `defecto`; las que
+    no se pueden leer también, y quedan marcadas en `invalidos` (máscara booleana).
+    "(1.234)" se lee como negativo; "%" se quita sin dividir por 100. Las columnas ya
+    numéricas solo se pasan a float (el chequeo dtype == 'O' fallaba con el tipo str de pandas 3).
+    """
+    if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+        return serie.astype(float).fillna(defecto), pd.Series(False, index=serie.index)
+
+    miles, decimal = FORMATOS_NUMERO[formato]
+    texto = serie.astype(str)
+    negativo = texto.str.contains("(", regex=False).fillna(False).to_numpy(dtype=bool)  # Contable: (1.234)
+    texto = texto.str.replace(SIMBOLOS_NUMERO, "", regex=True).str.replace(miles, "", regex=False)
+    if decimal != ".":
+        texto = texto.str.replace(decimal, ".", regex=False)
+
+    # Solo se castean las celdas con forma de número (más rápido que to_numeric(errors="coerce"))
+    validos = texto.str.fullmatch(PATRON_NUMERO).fillna(False).to_numpy(dtype=bool)
+    valores = np.asarray(texto.where(validos, "nan"), dtype=object).astype(float)
+    valores[negativo] = -valores[negativo]
+    vacias = (serie.isna() | texto.isin(VACIOS_NUMERO)).to_numpy(dtype=bool)
+    valores[~validos] = defecto
+    return pd.Series(valores, index=serie.index), pd.Series(~validos & ~vacias, index=serie.index)
+
+# --- TIPOS COMPACTOS ---
+# Las hojas limpias se guardan con tipos chicos: el texto repetitivo (closers,
+# resultados, campañas, anuncios) como category y el resto del texto como str
+# (Arrow) en vez de objetos Python. Al unir bloques limpiados por separado, las
+# category se unen sin caer a object.
+
+CATEGORIAS_VENTAS = ("Closer", "Resultado", "Origen Campaña", "Nombre del Ad")
+CATEGORIAS_LEADS = ("Campaña (UTM)", "Ad Content")
+
+@perf.medir("limpieza: compactar")
+def compactar(df, categorias=()):
+    """Columnas de `categorias` (las que existan) a category; el resto del texto suelto a str."""
+    for col in df.columns:
+        serie = df[col]
+        if col in categorias:
+            if not isinstance(serie.dtype, pd.CategoricalDtype):
+                df[col] = serie.astype('category')
+        elif serie.dtype == object and pd.api.types.infer_dtype(serie, skipna=True) in ('string', 'empty'):
+            df[col] = serie.astype('str')
+    return df
+
+def unir_bloques(partes):
+    """pd.concat de tablas limpias que conserva sus columnas category (con la unión de categorías)."""
+    partes = [p for p in partes if len(p.columns)]  # Una limpieza puede devolver DataFrame() sin columnas
+    if not partes:
+        return pd.DataFrame()
+    for col in partes[0].columns:
+        if all(col in p.columns and isinstance(p[col].dtype, pd.CategoricalDtype) for p in partes):
+            categorias = pd.unique(np.concatenate([p[col].cat.categories.to_numpy(dtype=object) for p in partes]))
+            partes = [p.assign(**{col: p[col].cat.set_categories(categorias)}) for p in partes]
+    return pd.concat(partes)
+
+# --- LIMPIEZAS DE CADA HOJA ---
+# Una sola copia de lo que hace cada página con sus hojas: las páginas las pasan a
+# datos.cargar_fuente y el benchmark (bench/correr.py) las mide tal cual. Las de
+# ventas, leads y resultados son fila a fila (aptas para sincronización incremental:
+# conservan el índice). Sin Streamlit: los avisos quedan en las páginas.
+
+def limpiar_ventas(df_v):
+    """Limpieza fila a fila de Ventas (apta para sincronización incremental)."""
+    df_v, _ = reparar_desplazamiento(df_v) # Anti-Error GHL
+    
+    df_v['Fecha'] = pd.to_datetime(df_v['Fecha'], dayfirst=True, errors='coerce')
+    df_v['Monto ($)'] = parsear_numeros(df_v['Monto ($)'])[0]
+    
+    df_v['Closer'] = df_v['Closer'].fillna("Sin Asignar").astype(str).str.strip()
+    df_v['Resultado'] = df_v['Resultado'].fillna("Pendiente")
+    
+    if 'Email' in df_v.columns:
+        df_v['Email'] = df_v['Email'].astype(str).str.strip().str.lower()
+    else:
+        df_v['Email'] = df_v.index.astype(str)
+
+    # Estado y Asistencia (clasificador vectorizado compartido)
+    clasificacion = clasificar_resultados(df_v['Resultado'])
+    df_v['Estado_Simple'] = clasificacion['Estado_Simple']
+    df_v['Es_Asistencia'] = clasificacion['Es_Asistencia']
+    return df_v
+
+def limpiar_ventas_dash(v):
+    """Ventas del Command Center: sin filas sin fecha, closers en Título y estados sin Re-Agendado."""
+    v['Fecha'] = pd.to_datetime(v['Fecha'], dayfirst=True, errors='coerce')
+    v.dropna(subset=['Fecha'], inplace=True)
+    
+    v['Monto ($)'] = parsear_numeros(v['Monto ($)'])[0]
+    
+    v['Closer'] = v['Closer'].astype(str).fillna("Sin Asignar")
+    v['Closer'] = v['Closer'].str.strip().str.title()
+
+    v['Resultado'] = v['Resultado'].fillna("Pendiente")
+    
+    clasificacion = clasificar_resultados(v['Resultado'], reglas=REGLAS_ESTADO[:4], otro="Otro")
+    v['Estado_Simple'] = clasificacion['Estado_Simple']
+    v['Asistio'] = clasificacion['Asistio'] # No Show / Re-agendado = no asistió
+    return v
+
+def limpiar_leads_dash(l):
+    """Leads del Command Center: 'Fecha Creación' -> Fecha (día primero); sin fecha se descartan."""
+    l = l.rename(columns={'Fecha Creación': 'Fecha'})
+    if 'Fecha' not in l.columns: return pd.DataFrame()
+    # Limpieza agresiva de la columna Fecha antes de convertir
+    l['Fecha'] = l['Fecha'].astype(str).str.strip()
+    # dayfirst=True es critico si tu sheet es DD/MM/YYYY
+    l['Fecha'] = pd.to_datetime(l['Fecha'], dayfirst=True, errors='coerce')
+    # Solo eliminamos filas donde la fecha sea realmente irrecuperable (NaT)
+    return l.dropna(subset=['Fecha'])
+
+def limpiar_volumen(df_vol):
+    """Leads (volumen) del journey: Email normalizado y Fecha_Ingreso."""
+    # Normalizar Email
+    cols_email_v = [c for c in df_vol.columns if 'email' in c.lower()]
+    if cols_email_v:
+        df_vol.rename(columns={cols_email_v[0]: 'Email'}, inplace=True)
+        df_vol['Email'] = df_vol['Email'].astype(str).str.lower().str.strip()
+    
+    # Buscar fecha de creación
+    cols_date_v = [c for c in df_vol.columns if 'Fecha Creación' in c.lower() or 'fecha' in c.lower()]
+    if cols_date_v:
+        df_vol['Fecha_Ingreso'] = pd.to_datetime(df_vol[cols_date_v[0]], errors='coerce')
+    return df_vol
+
+def limpiar_calificados(df_qual):
+    """Leads calificados del journey: Email normalizado y Fecha_Calificado."""
+    cols_email_q = [c for c in df_qual.columns if 'email' in c.lower()]
+    if cols_email_q:
+        df_qual.rename(columns={cols_email_q[0]: 'Email'}, inplace=True)
+        df_qual['Email'] = df_qual['Email'].astype(str).str.lower().str.strip()
+        
+    # Buscar fecha calificación (a veces es Created)
+    cols_date_q = [c for c in df_qual.columns if 'Fecha Creación' in c.lower() or 'fecha' in c.lower()]
+    if cols_date_q:
+        df_qual['Fecha_Calificado'] = pd.to_datetime(df_qual[cols_date_q[0]], errors='coerce')
+    return df_qual
+
+def limpiar_resultados(df_res):
+    """Resultados de closers del journey (hoja de ventas reparada): Email, Fecha_Llamada, Monto y Resultado."""
+    df_res, _ = reparar_desplazamiento(df_res) # <--- FIX DE COLUMNAS
+    
+    # Normalizar Email
+    cols_email_r = [c for c in df_res.columns if 'email' in c.lower()]
+    if cols_email_r:
+        df_res.rename(columns={cols_email_r[0]: 'Email'}, inplace=True)
+        df_res['Email'] = df_res['Email'].astype(str).str.lower().str.strip()
+    
+    # Fecha Llamada
+    cols_date_r = [c for c in df_res.columns if 'fecha' in c.lower()]
+    if cols_date_r:
+        df_res['Fecha_Llamada'] = pd.to_datetime(df_res[cols_date_r[0]], dayfirst=True, errors='coerce')
+
+    # Monto y Estado
+    if 'Monto ($)' in df_res.columns:
+         df_res['Monto ($)'] = parsear_numeros(df_res['Monto ($)'])[0]
+    
+    if 'Resultado' in df_res.columns:
+        df_res['Resultado'] = df_res['Resultado'].fillna('Pendiente')
+    return df_res
+
+# Budget: Diciembre (formato viejo, solo Fecha y Gasto) y 2026 (export de Meta Ads)
+COLUMNAS_BUDGET = ['Fecha', 'Gasto', 'Clics', 'Visitas']
+
+def limpiar_budget_dic(df_g1):
+    """Budget de Diciembre -> Fecha, Gasto, Clics y Visitas (estas dos en 0, el formato viejo no las trae)."""
+    df_g1['Fecha'] = pd.to_datetime(df_g1['Fecha'], dayfirst=True, errors='coerce')
+    df_g1['Gasto'] = parsear_numeros(df_g1['Gasto'])[0]
+    
+    # Rellenamos columnas faltantes en el viejo para que coincida
+    df_g1['Clics'] = 0
+    df_g1['Visitas'] = 0
+    
+    # Seleccionamos columnas estándar
+    if {'Fecha', 'Gasto'}.issubset(df_g1.columns): 
+        df_g1 = df_g1[COLUMNAS_BUDGET]
+    return df_g1
+
+def limpiar_budget_2026(df_g2):
+    """Budget 2026 por posición (A: Fecha, B: Gasto, C: Clics, D: Visitas); None si trae menos de 4 columnas."""
+    if len(df_g2.columns) < 4:
+        return None
+    df_g2 = df_g2.iloc[:, 0:4].copy()
+    df_g2.columns = COLUMNAS_BUDGET # Renombrar estándar
+    
+    # Limpieza
+    df_g2['Fecha'] = pd.to_datetime(df_g2['Fecha'], errors='coerce')
+    
+    for col in ['Gasto', 'Clics', 'Visitas']:
+        df_g2[col] = parsear_numeros(df_g2[col])[0]
+    return df_g2
+
+def limpiar_budget_dic_dash(b1):
+    """Budget de Diciembre del Command Center (nombres de columna recortados); sin Fecha -> DataFrame vacío."""
+    b1.rename(columns=lambda x: x.strip(), inplace=True)
+    if 'Fecha' in b1.columns: b1['Fecha'] = pd.to_datetime(b1['Fecha'], dayfirst=True, errors='coerce')
+    if 'Gasto' in b1.columns:
+        b1['Gasto'] = parsear_numeros(b1['Gasto'])[0]
+    b1['Clics'] = 0; b1['Visitas'] = 0
+    return b1[COLUMNAS_BUDGET] if 'Fecha' in b1.columns else pd.DataFrame()
+
+def limpiar_budget_2026_dash(b2):
+    """Budget 2026 del Command Center por nombre de columna del export de Meta Ads."""
+    b2.rename(columns={'Day': 'Fecha', 'Amount spent': 'Gasto', 'Link clicks': 'Clics', 'Landing page views': 'Visitas'}, inplace=True)
+    b2['Fecha'] = pd.to_datetime(b2['Fecha'], errors='coerce')
+    for col in ['Gasto', 'Clics', 'Visitas']:
+        b2[col] = parsear_numeros(b2[col])[0]
+    return b2
@@ -0,0 +1,285 @@
+import argparse
+import contextlib
+import glob
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import pandas as pd
+import requests
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # Sin pyarrow un Parquet se lee en un solo bloque
+    pq = None
+
+# --- ORÍGENES DE DATOS ---
+# Cada fuente lógica (ventas, leads_all, ...) se lee de un origen intercambiable:
+# CSV publicado (URL), CSV local, snapshot Parquet o tabla SQLite. Todos devuelven
+# el mismo registro que la descarga condicional de datos.py
+# ({'origen', 'etag', 'modificado', 'huella', 'df'}), así la limpieza de las páginas
+# no cambia. Si el origen no cambió desde `previo`, se devuelve `previo` tal cual.
+#
+# Configuración (de menor a mayor prioridad):
+#   - URLs de datos.FUENTES (Google Sheets publicado)
+#   - CN_SERVIDOR_FUENTES=http://localhost:8765   -> {servidor}/{nombre}.csv (servidor_local.py)
+#   - CN_DIR_FUENTES=carpeta                       -> carpeta/{nombre}.parquet o .csv
+#   - CN_FUENTES='{"ventas": "fixtures/ventas.csv", "vdp": {"tipo": "sqlite", "ruta": "cn.db"}}'
+#     (JSON en línea o ruta a un .json; un texto se interpreta por su esquema / extensión)
+
+# Sesión HTTP compartida: reutiliza conexiones TLS hacia docs.google.com
+sesion = requests.Session()
+sesion.mount("https://", requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=8))
+
+def _como_texto(df):
+    """Todas las columnas como texto (NaN se conserva), igual que read_csv(dtype=str).
+
+    Los orígenes tipados (Parquet, SQLite) deben guardar como texto las hojas que se
+    leen así (p. ej. vdp, con números europeos): un float ya no recuerda su formato.
+    """
+    return df.apply(lambda col: col.astype(str).where(col.notna()))
+
+class Origen:
+    tipo = None
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+
+    @property
+    def descripcion(self):
+        return f"{self.tipo}:{self.ruta}"
+
+    def leer(self, previo=None, como_texto=False):
+        raise NotImplementedError
+
+    def abrir_bloques(self, filas, previo=None, como_texto=False):
+        """(validador, bloques) para leer el origen de a `filas` filas (ver LECTURA POR BLOQUES)."""
+        raise NotImplementedError
+
+    def _registro(self, previo, huella, parsear, etag=None, modificado=None):
+        """Registro nuevo; si la huella coincide con `previo` se reutiliza su DataFrame sin parsear."""
+        if previo and previo['huella'] == huella:
+            df = previo['df']
+        else:
+            df = parsear()
+            df.attrs['huella'] = huella
+        return {'origen': self.descripcion, 'etag': etag, 'modificado': modificado, 'huella': huella, 'df': df}
+
+class OrigenURL(Origen):
+    """CSV publicado por HTTP, con descarga condicional (ETag / Last-Modified)."""
+    tipo = "url"
+
+    def __init__(self, ruta, timeout=(5, 30)):
+        super().__init__(ruta)
+        self.timeout = timeout
+
+    def _cabeceras(self, previo):
+        cabeceras = {}
+        if previo:
+            if previo['etag']: cabeceras['If-None-Match'] = previo['etag']
+            if previo['modificado']: cabeceras['If-Modified-Since'] = previo['modificado']
+        return cabeceras
+
+    def leer(self, previo=None, como_texto=False):
+        respuesta = sesion.get(self.ruta, headers=self._cabeceras(previo), timeout=self.timeout)
+        if respuesta.status_code == 304 and previo:
+            return previo  # Sin transferencia
+        respuesta.raise_for_status()
+
+        return self._registro(previo, hashlib.md5(respuesta.content).hexdigest(),
+                              lambda: pd.read_csv(io.BytesIO(respuesta.content), dtype=str if como_texto else None),
+                              etag=respuesta.headers.get('ETag'), modificado=respuesta.headers.get('Last-Modified'))
+
+    def abrir_bloques(self, filas, previo=None, como_texto=False):
+        respuesta = sesion.get(self.ruta, headers=self._cabeceras(previo), timeout=self.timeout, stream=True)
+        if respuesta.status_code == 304 and previo:
+            respuesta.close()
+            return previo, None
+        respuesta.raise_for_status()
+        respuesta.raw.decode_content = True  # Google manda el CSV comprimido
+        validador = {'origen': self.descripcion, 'etag': respuesta.headers.get('ETag'),
+                     'modificado': respuesta.headers.get('Last-Modified')}
+        return validador, _numerar(_bloques_csv(respuesta.raw, filas, como_texto, cerrar=respuesta))
+
+class OrigenArchivo(Origen):
+    """Archivo local: solo se relee si cambia su (mtime, tamaño); solo se parsea si cambia su contenido."""
+
+    def _sello(self):
+        info = os.stat(self.ruta)
+        return f"{info.st_mtime_ns}:{info.st_size}"
+
+    def leer(self, previo=None, como_texto=False):
+        sello = self._sello()
+        if previo and previo['modificado'] == sello:
+            return previo
+        with open(self.ruta, 'rb') as f:
+            contenido = f.read()
+        return self._registro(previo, hashlib.md5(contenido).hexdigest(),
+                              lambda: self._parsear(contenido, como_texto), modificado=sello)
+
+    def abrir_bloques(self, filas, previo=None, como_texto=False):
+        validador = {'origen': self.descripcion, 'etag': None, 'modificado': self._sello()}
+        if previo == validador:
+            return previo, None
+        return validador, _numerar(self._bloques(filas, como_texto))
+
+class OrigenCSV(OrigenArchivo):
+    tipo = "csv"
+
+    def _parsear(self, contenido, como_texto):
+        return pd.read_csv(io.BytesIO(contenido), dtype=str if como_texto else None)
+
+    def _bloques(self, filas, como_texto):
+        return _bloques_csv(self.ruta, filas, como_texto)
+
+class OrigenParquet(OrigenArchivo):
+    tipo = "parquet"
+
+    def _parsear(self, contenido, como_texto):
+        df = pd.read_parquet(io.BytesIO(contenido))
+        return _como_texto(df) if como_texto else df
+
+    def _bloques(self, filas, como_texto):
+        lotes = (lote.to_pandas() for lote in pq.ParquetFile(self.ruta).iter_batches(batch_size=filas)) if pq else [pd.read_parquet(self.ruta)]
+        for df in lotes:
+            yield _como_texto(df) if como_texto else df
+
+class OrigenSQLite(OrigenArchivo):
+    """Tabla (o consulta) de una base SQLite; la huella es la del resultado de la consulta."""
+    tipo = "sqlite"
+
+    def __init__(self, ruta, tabla=None, consulta=None):
+        super().__init__(ruta)
+        self.consulta = consulta or f'SELECT * FROM "{tabla}"'
+
+    @property
+    def descripcion(self):
+        return f"sqlite:{self.ruta}:{self.consulta}"
+
+    def _sello(self):
+        # En modo WAL los cambios recientes viven en el -wal, no en la base. Solo la base y
+        # sus -wal/-shm: copias como ventas.db.bak no cuentan.
+        rutas = [self.ruta, f"{self.ruta}-wal", f"{self.ruta}-shm"]
+        return ":".join(f"{i.st_mtime_ns}:{i.st_size}" for i in map(os.stat, filter(os.path.exists, rutas)))
+
+    def leer(self, previo=None, como_texto=False):
+        sello = self._sello()
+        if previo and previo['modificado'] == sello:
+            return previo
+        with contextlib.closing(sqlite3.connect(f"file:{self.ruta}?mode=ro", uri=True)) as conexion:
+            df = pd.read_sql_query(self.consulta, conexion)
+        if como_texto:
+            df = _como_texto(df)
+        huella = hashlib.md5(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes()).hexdigest()
+        return self._registro(previo, huella, lambda: df, modificado=sello)
+
+    def _bloques(self, filas, como_texto):
+        with contextlib.closing(sqlite3.connect(f"file:{self.ruta}?mode=ro", uri=True)) as conexion:
+            for df in pd.read_sql_query(self.consulta, conexion, chunksize=filas):
+                yield _como_texto(df) if como_texto else df
+
+# --- LECTURA POR BLOQUES ---
+# abrir_bloques(filas, previo) -> (validador, bloques). El validador resume el estado
+# del origen (ETag / Last-Modified, o mtime y tamaño); si es igual a `previo`, bloques
+# es None y no se lee nada. Si no, bloques es un generador de DataFrames de hasta
+# `filas` filas cuyo índice es la posición de la fila en la hoja (igual que leer()):
+# quien lo consume nunca tiene más de un bloque crudo en memoria.
+
+def _bloques_csv(archivo, filas, como_texto, cerrar=None):
+    try:
+        with pd.read_csv(archivo, chunksize=filas, dtype=str if como_texto else None) as lector:
+            yield from lector
+    finally:
+        if cerrar is not None:
+            cerrar.close()
+
+def _numerar(bloques):
+    inicio = 0
+    for df in bloques:
+        df.index = pd.RangeIndex(inicio, inicio + len(df))
+        inicio += len(df)
+        yield df
+
+TIPOS = {"url": OrigenURL, "csv": OrigenCSV, "parquet": OrigenParquet, "sqlite": OrigenSQLite}
+EXTENSIONES = {".parquet": "parquet", ".pq": "parquet", ".db": "sqlite", ".sqlite": "sqlite", ".sqlite3": "sqlite"}
+
+def crear(nombre, spec, timeout=(5, 30)):
+    """Origen a partir de un texto (URL o ruta) o de un dict {'tipo', 'ruta', ...}."""
+    if isinstance(spec, str):
+        if spec.startswith(("http://", "https://")):
+            spec = {"tipo": "url", "ruta": spec}
+        else:
+            spec = {"tipo": EXTENSIONES.get(os.path.splitext(spec)[1].lower(), "csv"), "ruta": spec}
+    spec = dict(spec)
+    tipo = spec.pop("tipo")
+    if tipo not in TIPOS:
+        raise ValueError(f"Origen '{tipo}' desconocido para {nombre} (válidos: {', '.join(TIPOS)})")
+    if tipo == "url":
+        spec.setdefault("timeout", timeout)
+    if tipo == "sqlite" and "consulta" not in spec:
+        spec.setdefault("tabla", nombre)
+    return TIPOS[tipo](**spec)
+
+def _en_carpeta(carpeta, nombre):
+    for extension in (".parquet", ".csv"):
+        ruta = os.path.join(carpeta, f"{nombre}{extension}")
+        if os.path.exists(ruta):
+            return ruta
+    return os.path.join(carpeta, f"{nombre}.csv")
+
+def _config_json(texto):
+    if texto.lstrip().startswith("{"):
+        return json.loads(texto)
+    with open(texto, encoding="utf-8") as f:
+        return json.load(f)
+
+def desde_entorno(urls, timeouts=None, timeout=(5, 30)):
+    """Registro nombre -> Origen según las variables de entorno (ver arriba)."""
+    timeouts = timeouts or {}
+    specs = dict(urls)
+    servidor = os.environ.get("CN_SERVIDOR_FUENTES")
+    if servidor:
+        specs = {nombre: f"{servidor.rstrip('/')}/{nombre}.csv" for nombre in specs}
+    carpeta = os.environ.get("CN_DIR_FUENTES")
+    if carpeta:
+        specs = {nombre: _en_carpeta(carpeta, nombre) for nombre in specs}
+    if os.environ.get("CN_FUENTES"):
+        specs.update(_config_json(os.environ["CN_FUENTES"]))
+    return {nombre: crear(nombre, spec, timeouts.get(nombre, timeout)) for nombre, spec in specs.items()}
+
+# --- CONVERSIÓN DE FIXTURES ---
+# Pasa una carpeta de {nombre}.csv (p. ej. la de bench.generadores) a Parquet o a
+# una base SQLite (una tabla por fuente). Se guarda todo como texto, igual que lo
+# publica Sheets, para que la limpieza de las páginas vea exactamente lo mismo.
+#
+#   python origenes.py fixtures --a parquet
+#   python origenes.py fixtures --a sqlite     # fixtures/fuentes.db
+
+def convertir(carpeta, formato):
+    rutas = sorted(glob.glob(os.path.join(carpeta, "*.csv")))
+    if formato == "sqlite":
+        destino = os.path.join(carpeta, "fuentes.db")
+        # closing() cierra la conexión; el `with conexion` interno confirma la transacción
+        with contextlib.closing(sqlite3.connect(destino)) as conexion, conexion:
+            for ruta in rutas:
+                nombre = os.path.splitext(os.path.basename(ruta))[0]
+                pd.read_csv(ruta, dtype=str).to_sql(nombre, conexion, if_exists="replace", index=False)
+        return [destino]
+    destinos = []
+    for ruta in rutas:
+        destino = os.path.splitext(ruta)[0] + ".parquet"
+        pd.read_csv(ruta, dtype=str).to_parquet(destino, index=False)
+        destinos.append(destino)
+    return destinos
+
+def main():
+    parser = argparse.ArgumentParser(description="Convierte una carpeta de CSV a Parquet o SQLite.")
+    parser.add_argument("carpeta")
+    parser.add_argument("--a", dest="formato", choices=["parquet", "sqlite"], default="parquet")
+    args = parser.parse_args()
+    for destino in convertir(args.carpeta, args.formato):
+        print(destino)
+
+if __name__ == "__main__":
+    main()
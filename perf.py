@@ -0,0 +1,107 @@
+import collections
+import contextlib
+import functools
+import os
+import threading
+import time
+from datetime import datetime
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# --- INSTRUMENTACIÓN POR ETAPA ---
+# Cronómetros livianos (perf_counter + filas) alrededor de cada etapa: descarga,
+# limpieza, cargar_datos, motor de KPIs y cada sección de gráficos. Lo que corre en
+# una sesión va a su log (st.session_state); lo que corre fuera de una sesión (el
+# refrescador, el calentamiento en segundo plano) va al log del proceso.
+#
+#   with perf.etapa("ventas: limpiar", len(df)):
+#       ...
+#   with perf.etapa("gráfico: tendencia") as m:
+#       ...; m['Filas'] = len(serie)
+#   @perf.medir("limpieza: compactar")   # cada llamada, con Filas = len(primer argumento)
+#   def compactar(df, ...): ...
+#
+# El panel "⏱️ Perf" está oculto: aparece con ?perf=1 en la URL o con CN_PERF=1.
+
+LIMITE_SESION = 5000  # Medidas guardadas por sesión (las más viejas se descartan)
+_proceso = collections.deque(maxlen=1000)
+_candado = threading.Lock()
+
+def _en_sesion():
+    return get_script_run_ctx(suppress_warning=True) is not None
+
+def corrida():
+    """Marca el inicio de un rerun de la página (agrupa las medidas por corrida)."""
+    if _en_sesion():
+        st.session_state['_perf_corrida'] = st.session_state.get('_perf_corrida', 0) + 1
+
+def _registrar(medida):
+    if _en_sesion():
+        medida['Corrida'] = st.session_state.get('_perf_corrida', 0)
+        log = st.session_state.setdefault('_perf_log', [])
+        log.append(medida)
+        if len(log) > LIMITE_SESION:
+            del log[:len(log) - LIMITE_SESION]
+    else:
+        medida['Corrida'] = None
+        with _candado:
+            _proceso.append(medida)
+
+@contextlib.contextmanager
+def etapa(nombre, filas=None):
+    """Mide el bloque; el dict que entrega permite fijar 'Filas' al terminar."""
+    medida = {'Hora': datetime.now().strftime("%H:%M:%S"), 'Etapa': nombre, 'Filas': filas,
+              'Hilo': threading.current_thread().name}
+    inicio = time.perf_counter()
+    try:
+        yield medida
+    finally:
+        medida['Segundos'] = round(time.perf_counter() - inicio, 4)
+        _registrar(medida)
+
+def medir(nombre):
+    """Decorador: cada llamada es una etapa `nombre` con Filas = largo del primer argumento."""
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(datos, *args, **kwargs):
+            with etapa(nombre, len(datos)):
+                return funcion(datos, *args, **kwargs)
+        return envoltura
+    return decorador
+
+def log_sesion():
+    return pd.DataFrame(st.session_state.get('_perf_log', []))
+
+def log_proceso():
+    with _candado:
+        return pd.DataFrame(list(_proceso))
+
+def _visible():
+    return st.query_params.get("perf") == "1" or os.environ.get("CN_PERF") == "1"
+
+def panel():
+    """Panel oculto del sidebar: última corrida, resumen por etapa y log exportable."""
+    if not _visible():
+        return
+    sesion, proceso = log_sesion(), log_proceso()
+    with st.sidebar.expander("⏱️ Perf"):
+        if sesion.empty:
+            st.caption("Sin medidas en esta sesión (todo vino de caché).")
+        else:
+            ultima = sesion[sesion['Corrida'] == sesion['Corrida'].max()]
+            st.caption(f"Corrida {int(ultima['Corrida'].iloc[0])}: {ultima['Segundos'].sum():.2f}s medidos")
+            st.dataframe(ultima[['Etapa', 'Segundos', 'Filas']], hide_index=True, use_container_width=True)
+
+            resumen = sesion.groupby('Etapa')['Segundos'].agg(Veces='size', Media='mean', Maximo='max')
+            st.caption("Sesión completa")
+            st.dataframe(resumen.sort_values('Media', ascending=False).round(4), use_container_width=True)
+
+        if not proceso.empty:
+            st.caption("Proceso (descargas y calentamiento en segundo plano)")
+            st.dataframe(proceso[['Hora', 'Etapa', 'Segundos', 'Filas']].tail(20), hide_index=True, use_container_width=True)
+
+        exportar = pd.concat([sesion.assign(Origen="sesion"), proceso.assign(Origen="proceso")], ignore_index=True)
+        st.download_button("⬇️ Exportar log (CSV)", exportar.to_csv(index=False).encode("utf-8"),
+                           file_name=f"perf_{datetime.now():%Y%m%d_%H%M%S}.csv", mime="text/csv",
+                           disabled=exportar.empty)
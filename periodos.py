@@ -0,0 +1,60 @@
+import functools
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+import numpy as np
+import pandas as pd
+
+# --- PERÍODOS DEL SIDEBAR ---
+# Un solo motor para los presets de todas las páginas, con la misma zona horaria
+# (la del negocio) para "hoy". Cada preset se resuelve una vez por día (lru_cache).
+
+ZONA_HORARIA = ZoneInfo("America/Bogota")
+
+def hoy():
+    """Fecha de hoy en la zona horaria del negocio (GMT-5)."""
+    return datetime.now(ZONA_HORARIA).date()
+
+@functools.lru_cache(maxsize=128)
+def resolver(preset, dia):
+    """(inicio, fin) del `preset` visto desde `dia`. Memoizado: la clave incluye el día."""
+    if preset == "Hoy": return dia, dia
+    if preset == "Ayer": return dia - timedelta(days=1), dia - timedelta(days=1)
+    if preset == "Esta Semana": return dia - timedelta(days=dia.weekday()), dia
+    if preset == "Últimos 7 días": return dia - timedelta(days=7), dia
+    if preset == "Este Mes": return dia.replace(day=1), dia
+    if preset == "Mes Anterior":
+        fin = dia.replace(day=1) - timedelta(days=1)
+        return fin.replace(day=1), fin
+    if preset == "Últimos 30 días": return dia - timedelta(days=30), dia
+    if preset == "Este Trimestre": return dia.replace(month=((dia.month - 1) // 3) * 3 + 1, day=1), dia
+    if preset == "Año Actual": return dia.replace(month=1, day=1), dia
+    raise ValueError(f"Período desconocido: {preset}")
+
+# --- FILTRADO POR PERÍODO ---
+# Cada tabla limpia se guarda ordenada por su columna de fecha (datetime64, NaT al
+# final). Un período es entonces un par de búsquedas binarias (searchsorted) y un
+# slice posicional: O(log n) y sin copiar filas, en vez de comparar toda la columna
+# (.dt.date / .dt.normalize) en cada rerun.
+
+def ordenar_por_fecha(df, columna='Fecha'):
+    """Devuelve `df` ordenado (estable) por `columna`; no hace nada si ya lo está."""
+    if df.empty or columna not in df.columns:
+        return df
+    fechas = df[columna]
+    if fechas.is_monotonic_increasing and fechas.notna().all():
+        return df
+    return df.sort_values(columna, kind='stable', na_position='last')
+
+def limites(df, inicio, fin, columna='Fecha'):
+    """Posiciones [desde, hasta) de las filas con fecha en [inicio, fin] (días completos)."""
+    fechas = df[columna].to_numpy(dtype='datetime64[ns]')
+    desde = np.datetime64(pd.Timestamp(inicio).normalize(), 'ns')
+    hasta = np.datetime64(pd.Timestamp(fin).normalize() + pd.Timedelta(days=1), 'ns')
+    return int(np.searchsorted(fechas, desde, side='left')), int(np.searchsorted(fechas, hasta, side='left'))
+
+def rango(df, inicio, fin, columna='Fecha'):
+    """Filas de `df` (ordenado con ordenar_por_fecha) entre `inicio` y `fin`, ambos días incluidos."""
+    if df.empty or columna not in df.columns:
+        return df
+    desde, hasta = limites(df, inicio, fin, columna)
+    return df.iloc[desde:hasta]
@@ -0,0 +1,107 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+
+# --- REFRESCO EN SEGUNDO PLANO ---
+# Un hilo por proceso mantiene caliente cada fuente con su propia cadencia y cambia
+# el valor de forma atómica (una sola asignación). Los renders solo leen el último
+# valor: nunca esperan a la red, salvo la primerísima carga de una fuente.
+
+class _Tarea:
+    def __init__(self, funcion, cada):
+        self.funcion = funcion
+        self.cada = cada
+        self.valor = None
+        self.error = None
+        self.ultimo = None      # datetime del último refresco
+        self.duracion = None    # segundos del último refresco
+        self.proximo = 0.0      # time.monotonic() del próximo refresco
+        self.listo = threading.Event()
+        self.corriendo = threading.Lock()
+
+REINTENTO_ERROR = 30  # segundos hasta reintentar una fuente que falló
+
+class Refrescador:
+    def __init__(self, tick=1.0, hilos=6):
+        self.tick = tick
+        self._tareas = {}
+        self._lock = threading.Lock()
+        self._hilo = None
+        # Las fuentes se descargan en paralelo: el tiempo total ≈ la hoja más lenta
+        self._pool = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="fuente")
+
+    def registrar(self, clave, funcion, cada):
+        """Registra una fuente (idempotente) y arranca el hilo si hace falta."""
+        with self._lock:
+            if clave not in self._tareas:
+                self._tareas[clave] = _Tarea(funcion, cada)
+            if self._hilo is None or not self._hilo.is_alive():
+                self._hilo = threading.Thread(target=self._bucle, name="refrescador", daemon=True)
+                self._hilo.start()
+
+    def _primera_carga(self, tarea):
+        if not tarea.listo.is_set():
+            with tarea.corriendo:
+                if not tarea.listo.is_set():
+                    self._ejecutar(tarea)
+
+    def obtener(self, clave):
+        """Último valor de la fuente. Solo bloquea si nunca se ha cargado."""
+        tarea = self._tareas[clave]
+        self._primera_carga(tarea)
+        if tarea.valor is None and tarea.error is not None:
+            raise tarea.error
+        return tarea.valor
+
+    def precargar(self, claves):
+        """Primera carga concurrente de varias fuentes (los errores quedan en cada tarea)."""
+        wait([self._pool.submit(self._primera_carga, self._tareas[c]) for c in claves])
+
+    def refrescar(self, clave=None):
+        """Fuerza el refresco ya (de una fuente o de todas, en paralelo) y espera a que termine."""
+        claves = [clave] if clave else list(self._tareas)
+        wait([self._pool.submit(self._refrescar_tarea, self._tareas[c]) for c in claves])
+
+    def _refrescar_tarea(self, tarea):
+        with tarea.corriendo:
+            self._ejecutar(tarea)
+
+    def estado(self):
+        """Una fila por fuente: último refresco, duración, próximo refresco y error."""
+        ahora = time.monotonic()
+        return [{
+            'Fuente': clave,
+            'Último refresco': tarea.ultimo.strftime("%H:%M:%S") if tarea.ultimo else "—",
+            'Duración (s)': round(tarea.duracion, 2) if tarea.duracion is not None else None,
+            'Próximo en (s)': max(int(tarea.proximo - ahora), 0) if tarea.listo.is_set() else None,
+            'Error': str(tarea.error) if tarea.error else "",
+        } for clave, tarea in list(self._tareas.items())]
+
+    def _ejecutar(self, tarea):
+        inicio = time.perf_counter()
+        try:
+            tarea.valor = tarea.funcion()  # Swap atómico: los lectores ven el valor viejo o el nuevo
+            tarea.error = None
+            espera = tarea.cada
+        except Exception as e:  # Se conserva el último valor bueno
+            tarea.error = e
+            espera = min(tarea.cada, REINTENTO_ERROR)
+        tarea.duracion = time.perf_counter() - inicio
+        tarea.ultimo = datetime.now()
+        tarea.proximo = time.monotonic() + espera
+        tarea.listo.set()
+
+    def _refrescar_si_libre(self, tarea):
+        if tarea.corriendo.acquire(blocking=False):
+            try: self._ejecutar(tarea)
+            finally: tarea.corriendo.release()
+
+    def _bucle(self):
+        while True:
+            ahora = time.monotonic()
+            # Solo refrescamos fuentes ya cargadas una vez (la primera carga es bajo demanda)
+            vencidas = [t for t in list(self._tareas.values()) if t.listo.is_set() and ahora >= t.proximo]
+            if vencidas:
+                wait([self._pool.submit(self._refrescar_si_libre, t) for t in vencidas])
+            time.sleep(self.tick)
@@ -0,0 +1,65 @@
+import argparse
+import hashlib
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+# --- SERVIDOR LOCAL DE HOJAS ---
+# Sustituto offline de Google Sheets publicado: sirve los CSV de una carpeta
+# ({nombre}.csv, p. ej. ventas.csv, leads_all.csv) con ETag y Last-Modified, y
+# responde 304 a las peticiones condicionales. Para usarlo con los dashboards:
+#
+#   python servidor_local.py carpeta_csv --puerto 8765
+#   CN_SERVIDOR_FUENTES=http://localhost:8765 streamlit run app.py
+
+class ManejadorCSV(SimpleHTTPRequestHandler):
+    def send_head(self):
+        ruta = self.translate_path(self.path)
+        if not os.path.isfile(ruta):
+            self.send_error(404, "Hoja no encontrada")
+            return None
+
+        with open(ruta, 'rb') as f:
+            contenido = f.read()
+        etag = f'"{hashlib.md5(contenido).hexdigest()}"'
+        modificado = int(os.path.getmtime(ruta))
+
+        if self._sin_cambios(etag, modificado):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return None
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/csv; charset=utf-8")
+        self.send_header("Content-Length", str(len(contenido)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", formatdate(modificado, usegmt=True))
+        self.end_headers()
+        self.wfile.write(contenido)
+        return None
+
+    def _sin_cambios(self, etag, modificado):
+        # If-None-Match manda sobre If-Modified-Since (RFC 9110)
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            return etag in [e.strip() for e in if_none_match.split(",")]
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since:
+            try: return modificado <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError): return False
+        return False
+
+def main():
+    parser = argparse.ArgumentParser(description="Sirve CSV locales con validadores HTTP (ETag / Last-Modified).")
+    parser.add_argument("carpeta", help="Carpeta con los {nombre}.csv de cada fuente")
+    parser.add_argument("--puerto", type=int, default=8765)
+    args = parser.parse_args()
+
+    manejador = lambda *a, **kw: ManejadorCSV(*a, directory=args.carpeta, **kw)
+    servidor = ThreadingHTTPServer(("127.0.0.1", args.puerto), manejador)
+    print(f"Sirviendo {args.carpeta} en http://127.0.0.1:{args.puerto}")
+    servidor.serve_forever()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+import hashlib
+import json
+import os
+import threading
+import numpy as np
+import pandas as pd
+import almacen
+import periodos
+from limpieza import parsear_numeros
+
+# --- REGISTRO DE LANZAMIENTOS ---
+# Nombre visible -> fuente (nombre en datos.FUENTES) con la hoja VDP de ese lanzamiento.
+# Lanzamientos nuevos o archivados se agregan sin tocar código:
+#   CN_LANZAMIENTOS='{"VDP Marzo": "vdp_marzo"}' CN_FUENTES='{"vdp_marzo": "https://..."}'
+
+PRINCIPAL = "vdp"  # Único lanzamiento con refresco en segundo plano (su hoja queda residente)
+LANZAMIENTOS = {"VDP": PRINCIPAL}
+if os.environ.get("CN_LANZAMIENTOS"):
+    LANZAMIENTOS.update(json.loads(os.environ["CN_LANZAMIENTOS"]))
+
+# --- MÉTRICAS DEL LANZAMIENTO VDP ---
+# Economía unitaria del embudo (CPL, CPA, CPG y tasas de conversión) con
+# operaciones vectorizadas y a prueba de división por cero. Se calcula una vez por
+# refresco a nivel diario y se guarda junto al agregado; los períodos se resuelven
+# sumando días y dividiendo los totales (ratio de sumas, no suma de ratios).
+
+VOLUMENES = ['Spent', 'Clicks', 'Visitas LP', 'Leads Hyros', 'API Hyros', 'Grupo']
+
+# Métrica -> (numerador, denominador, escala). Con denominador 0 la métrica vale 0.
+UNITARIAS = {
+    'CPL': ('Spent', 'Leads Hyros', 1),
+    'CPA': ('Spent', 'API Hyros', 1),
+    'CPG': ('Spent', 'Grupo', 1),
+    'Click_a_Visita': ('Visitas LP', 'Clicks', 100),   # %
+    'Lead_a_Grupo': ('Grupo', 'Leads Hyros', 100),     # %
+}
+
+# Etapas del embudo (en orden) -> columna de volumen
+EMBUDO = {
+    'Clicks Anuncios': 'Clicks',
+    'Visitas LP': 'Visitas LP',
+    'Leads Captados': 'Leads Hyros',
+    'Leads en API': 'API Hyros',
+    'Unidos a Grupo': 'Grupo',
+}
+
+def dividir(numerador, denominador, escala=1):
+    """numerador / denominador * escala elemento a elemento; 0 donde el denominador no es > 0."""
+    numerador = np.asarray(numerador, dtype=float)
+    denominador = np.asarray(denominador, dtype=float)
+    resultado = np.zeros(np.broadcast(numerador, denominador).shape)
+    np.divide(numerador * escala, denominador, out=resultado, where=denominador > 0)
+    return resultado
+
+def con_unitarias(totales):
+    """Agrega las métricas de UNITARIAS a un DataFrame (una fila por día) o a una Serie (un período)."""
+    totales = totales.copy()
+    for metrica, (numerador, denominador, escala) in UNITARIAS.items():
+        valor = dividir(totales[numerador], totales[denominador], escala)
+        totales[metrica] = valor if isinstance(totales, pd.DataFrame) else float(valor)
+    return totales
+
+def diario(df):
+    """Volúmenes por día (ordenado por Fecha) con su economía unitaria."""
+    if df.empty or 'Fecha' not in df.columns:
+        return pd.DataFrame(columns=['Fecha', *VOLUMENES, *UNITARIAS])
+    volumenes = df.reindex(columns=['Fecha', *VOLUMENES], fill_value=0.0)
+    por_dia = volumenes.groupby('Fecha', sort=True)[VOLUMENES].sum().reset_index()
+    return con_unitarias(por_dia)
+
+def periodo(dias):
+    """Totales de un corte del diario (Serie) con economía unitaria y días activos."""
+    totales = con_unitarias(dias[VOLUMENES].sum())
+    totales['Dias_Activos'] = (dias['Fecha'].max() - dias['Fecha'].min()).days + 1 if len(dias) else 1
+    totales['Gasto_Diario'] = totales['Spent'] / totales['Dias_Activos']
+    return totales
+
+def embudo(totales):
+    """Etapa, Valor y % respecto de la etapa anterior (la primera es 100%)."""
+    valores = np.array([totales[columna] for columna in EMBUDO.values()], dtype=float)
+    anteriores = np.concatenate([[valores[0]], valores[:-1]])
+    porcentajes = dividir(valores, anteriores, 100)
+    porcentajes[0] = 100.0
+    return pd.DataFrame({'Etapa': list(EMBUDO), 'Valor': valores, 'Pct': porcentajes})
+
+# --- LIMPIEZA DE LA HOJA ---
+
+def limpiar(crudo):
+    """Hoja cruda (todo texto, números europeos) -> (filas ordenadas por Fecha, celdas inválidas por columna)."""
+    df = crudo.copy()
+    df.columns = df.columns.str.strip()
+    invalidos = {}
+    for col in VOLUMENES:
+        if col in df.columns:
+            df[col], malos = parsear_numeros(df[col], formato="europeo")
+            if malos.any():
+                invalidos[col] = int(malos.sum())
+    if 'Fecha' in df.columns:
+        # Filas sin fecha válida se descartan (evitan errores de filtro)
+        df['Fecha'] = pd.to_datetime(df['Fecha'], dayfirst=True, errors='coerce')
+        df = periodos.ordenar_por_fecha(df.dropna(subset=['Fecha']))
+    return df, invalidos
+
+# --- ALMACÉN PARTICIONADO POR LANZAMIENTO ---
+# Cada lanzamiento se ingiere una vez por refresco a tablas locales:
+#   vdp_filas/<fuente>/<AAAA-MM>  filas limpias del mes (solo se reescriben los meses que cambian)
+#   vdp_diario/<fuente>           agregado diario con su economía unitaria
+#   vdp_lanzamientos_<fuente>     manifiesto del lanzamiento (versión y huella de cada mes)
+# La página carga solo el lanzamiento activo; la comparación lee solo los diarios
+# (unas cientos de filas por lanzamiento), así la memoria no crece con el archivo.
+
+TABLA_FILAS = "vdp_filas"
+TABLA_DIARIO = "vdp_diario"
+MANIFIESTO = "vdp_lanzamientos"
+VERSION_PARTICIONES = 1  # Subir si cambia limpiar() o diario() para volver a ingerir todo
+
+# Un manifiesto por lanzamiento (ingerir uno no reescribe el de otro) y un candado por
+# proceso: dos sesiones que ingieren a la vez no se pisan la lectura-modificación-escritura.
+_INGESTA = threading.Lock()
+
+def _manifiesto(fuente):
+    return f"{MANIFIESTO}_{fuente}"
+
+def _huella(df):
+    return hashlib.md5(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes()).hexdigest()
+
+def ingerir(fuente, df):
+    """Guarda las filas limpias de un lanzamiento particionadas por mes y devuelve (y guarda) su diario."""
+    with _INGESTA:
+        return _ingerir(fuente, df)
+
+def _ingerir(fuente, df):
+    previo = almacen.cargar(_manifiesto(fuente)) or {}
+    vistos = previo.get('meses', {}) if previo.get('version') == VERSION_PARTICIONES else {}
+
+    meses = {}
+    if not df.empty and 'Fecha' in df.columns:
+        for mes, filas in df.groupby(df['Fecha'].dt.strftime('%Y-%m'), sort=False):
+            meses[mes] = _huella(filas)
+            if vistos.get(mes) != meses[mes]:
+                almacen.guardar_particion(f"{TABLA_FILAS}/{fuente}", mes, filas)
+    for mes in set(almacen.particiones(f"{TABLA_FILAS}/{fuente}")) - set(meses):
+        almacen.borrar_particion(f"{TABLA_FILAS}/{fuente}", mes)
+
+    por_dia = diario(df)
+    almacen.guardar_particion(TABLA_DIARIO, fuente, por_dia)
+    almacen.guardar(_manifiesto(fuente), {'version': VERSION_PARTICIONES, 'meses': meses, 'filas': len(df)})
+    return por_dia
+
+def ingerido(fuente):
+    """True si el lanzamiento ya tiene su diario guardado con la versión actual."""
+    manifiesto = almacen.cargar(_manifiesto(fuente)) or {}
+    return manifiesto.get('version') == VERSION_PARTICIONES and fuente in almacen.particiones(TABLA_DIARIO)
+
+def filas(fuente, inicio, fin):
+    """Filas limpias del lanzamiento entre `inicio` y `fin`, leyendo solo los meses que tocan."""
+    meses = pd.period_range(pd.Timestamp(inicio), pd.Timestamp(fin), freq='M').strftime('%Y-%m')
+    guardados = set(almacen.particiones(f"{TABLA_FILAS}/{fuente}"))
+    df = almacen.leer_particiones(f"{TABLA_FILAS}/{fuente}", [mes for mes in meses if mes in guardados])
+    return periodos.rango(df, inicio, fin)
+
+# --- COMPARACIÓN ENTRE LANZAMIENTOS ---
+
+def comparar(lanzamientos):
+    """Métricas de la fase de captación por lanzamiento, desde los diarios ya agregados.
+
+    `lanzamientos`: {nombre visible: fuente}. Devuelve (resumen, curvas): una fila por
+    lanzamiento con totales y economía unitaria, y el diario de cada uno alineado por
+    día del lanzamiento (Día 1 = su primera fecha) con volúmenes acumulados y CPL acumulado.
+    """
+    diarios = []
+    for nombre, fuente in lanzamientos.items():
+        por_dia = almacen.leer_particion(TABLA_DIARIO, fuente)
+        if por_dia is not None and not por_dia.empty:
+            diarios.append(por_dia.assign(Lanzamiento=nombre))
+    if not diarios:
+        return pd.DataFrame(), pd.DataFrame()
+
+    curvas = pd.concat(diarios, ignore_index=True)
+    inicio = curvas.groupby('Lanzamiento', sort=False)['Fecha'].transform('min')
+    curvas['Dia_Lanzamiento'] = (curvas['Fecha'] - inicio).dt.days + 1
+    acumulados = curvas.groupby('Lanzamiento', sort=False)[['Spent', 'Leads Hyros', 'Grupo']].cumsum()
+    curvas[[f"{col} Acum" for col in acumulados.columns]] = acumulados.to_numpy()
+    curvas['CPL Acum'] = dividir(curvas['Spent Acum'], curvas['Leads Hyros Acum'])
+
+    resumen = curvas.groupby('Lanzamiento', sort=False).agg(
+        Inicio=('Fecha', 'min'), Fin=('Fecha', 'max'), **{col: (col, 'sum') for col in VOLUMENES})
+    resumen['Dias_Activos'] = (resumen['Fin'] - resumen['Inicio']).dt.days + 1
+    resumen['Gasto_Diario'] = resumen['Spent'] / resumen['Dias_Activos']
+    return con_unitarias(resumen).reset_index(), curvas